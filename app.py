@@ -1,25 +1,36 @@
-from flask import Flask, render_template, request, send_file, jsonify, redirect, url_for, abort
+from flask import Flask, render_template, request, send_file, jsonify, redirect, url_for, abort, g, Response
 import os
 import pandas as pd
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-from data_processor import DataProcessor
 from jinja_pdf_generator import JinjaPDFGenerator
+from job_queue import get_job_queue
+from session_store import get_session_store, SessionMemoryError
+from zip_stream import iter_zip
+from upload_stream import receive_upload
+from upload_store import get_upload_store
+from dataset_cache import DatasetCache
+from ingest import FORMAT_VERSION
+from metrics import count, render_prometheus
+from profiling import profile_run
 import shutil
 from datetime import datetime
 import secrets
 import re
+from itertools import islice
+
+# gunicorn 워커와 작업 프로세스의 측정값을 /metrics에서 합산하도록 공유 폴더 지정
+os.environ.setdefault('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'metrics'))
 
 app = Flask(__name__, static_folder='static')
 
 # SECRET_KEY를 환경 변수에서 가져오거나 랜덤 생성
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
-app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'outputs'
 app.config['SAMPLE_FOLDER'] = 'static/samples'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 # 업로드 폴더 생성
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 os.makedirs(app.config['SAMPLE_FOLDER'], exist_ok=True)
 
@@ -49,16 +60,54 @@ def sanitize_filename(filename):
         name = name[:100]
     return f"{name}{ext}"
 
-# 세션별 데이터 프로세서 (동시성 문제 해결)
-data_processors = {}
+# 세션별 데이터 프로세서 (쿠키의 무작위 세션 ID 기준, TTL/메모리 한도로 정리)
+SESSION_COOKIE = 'score_session'
+session_store = get_session_store()
+# 업로드 파일은 내용 해시 이름으로 한 번만 저장 (세션별 목록은 저장소가 관리)
+upload_store = get_upload_store()
 pdf_generator = JinjaPDFGenerator()
+# 작업 큐 디스패처는 앱 시작 때 시작 (재시작 전에 대기 중이던 작업을 새 작업 등록 없이 바로 실행)
+get_job_queue().start()
+
+def get_session_id(create=True):
+    """요청의 세션 ID (없거나 형식이 틀리면 새로 발급해 응답 쿠키로 설정)"""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if session_store.is_valid_id(session_id):
+        return session_id
+    if not create:
+        return None
+    if 'new_session_id' not in g:
+        g.new_session_id = secrets.token_urlsafe(24)
+    return g.new_session_id
 
 def get_session_data_processor():
     """세션별 데이터 프로세서 반환"""
-    session_id = request.remote_addr  # 실제로는 session ID 사용 권장
-    if session_id not in data_processors:
-        data_processors[session_id] = DataProcessor()
-    return data_processors[session_id]
+    return session_store.get(get_session_id())
+
+@app.after_request
+def set_session_cookie(response):
+    """새로 발급한 세션 ID를 쿠키로 저장"""
+    if 'new_session_id' in g:
+        response.set_cookie(SESSION_COOKIE, g.new_session_id, max_age=int(session_store.ttl),
+                            httponly=True, samesite='Lax', secure=request.is_secure)
+    return response
+
+@app.after_request
+def count_request(response):
+    """요청 수 카운터 (라우트 패턴 기준, 정적 파일 제외)"""
+    if request.endpoint != 'static':
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        count('scorereport_http_requests_total', method=request.method, endpoint=endpoint,
+              status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 측정값 (METRICS_TOKEN이 설정되면 Authorization: Bearer <토큰> 필요)"""
+    token = os.environ.get('METRICS_TOKEN')
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        abort(401)
+    return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/')
 def index():
@@ -67,86 +116,82 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_files():
-    """파일 업로드 처리"""
+    """
+    파일 업로드 처리
+
+    요청 본문을 받는 대로 파일별로 업로드 저장소에 저장하면서, 과목 파일은 받는 동안 스레드 풀에서 바로 읽음
+    (모든 파일을 받은 뒤 다시 열어 하나씩 읽지 않음, 어느 세션이든 읽은 적 있는 파일은 캐시에서 바로 로드)
+    """
     try:
         print("[업로드] 파일 업로드 요청 받음")
-        print(f"[업로드] 요청 파일 목록: {list(request.files.keys())}")
         
         data_processor = get_session_data_processor()
         
+        if request.mimetype != 'multipart/form-data' or 'boundary' not in request.mimetype_params:
+            return jsonify({'error': '학생명 파일이 필요합니다.'}), 400
+        
+        def accept(name, filename):
+            """파트별 파일 형식 검증 (저장 경로는 내용 해시로 정해지므로 파일명은 기록용)"""
+            return bool(filename) and allowed_file(filename)
+        
+        upload = receive_upload(request.stream, request.mimetype_params['boundary'], upload_store, accept,
+                                max_form_memory_size=request.max_form_memory_size,
+                                max_parts=request.max_form_parts)
+        print(f"[업로드] 요청 파일 목록: {list(upload.filenames.keys())}")
+        
+        # 세션 업로드 목록에 기록
+        session_id = get_session_id()
+        for part in upload.parts():
+            upload_store.record(session_id, part.name, part.filename, part.content_hash, part.path)
+        
         # 학생명 파일 확인 (필수)
-        if 'student_names' not in request.files:
+        if 'student_names' not in upload.filenames:
             print("[오류] 학생명 파일이 요청에 포함되지 않음")
             return jsonify({'error': '학생명 파일이 필요합니다.'}), 400
         
-        student_names_file = request.files['student_names']
-        
         # 파일명 검증
-        if not student_names_file.filename:
+        if not upload.filenames['student_names']:
             return jsonify({'error': '학생명 파일명이 비어있습니다.'}), 400
         
-        # 학생명 파일 저장
-        if student_names_file and allowed_file(student_names_file.filename):
-            filename = sanitize_filename(student_names_file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            
-            # 경로 안전성 확인
-            if not is_safe_path(app.config['UPLOAD_FOLDER'], filepath):
-                return jsonify({'error': '유효하지 않은 파일 경로입니다.'}), 400
-            
-            student_names_file.save(filepath)
-            print(f"[업로드] 학생명 파일 저장 완료: {filepath}")
-            
-            # 학생명 데이터 로드
-            data_processor.load_student_names(filepath)
-            print(f"[업로드] 학생명 데이터 로드 완료: {len(data_processor.student_names)}명")
-        else:
+        if 'student_names' not in upload.files:
             return jsonify({'error': '유효하지 않은 학생명 파일입니다.'}), 400
         
-        # 등급컷 파일 확인 (선택사항)
-        if 'grade_cutoff' in request.files:
-            grade_cutoff_file = request.files['grade_cutoff']
-            
-            if grade_cutoff_file and grade_cutoff_file.filename and allowed_file(grade_cutoff_file.filename):
-                filename = sanitize_filename(grade_cutoff_file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                
-                # 경로 안전성 확인
-                if is_safe_path(app.config['UPLOAD_FOLDER'], filepath):
-                    grade_cutoff_file.save(filepath)
-                    # 등급컷 데이터 로드
-                    data_processor.load_grade_cutoff_data(filepath)
-                    print("[INFO] 등급컷 파일 업로드 완료")
-        
-        # 과목 파일들 처리
-        subject_files = {}
-        for key in request.files:
-            if key.startswith('subject_'):
-                subject_name = key.replace('subject_', '')
-                file = request.files[key]
-                
-                if file and file.filename and allowed_file(file.filename):
-                    filename = sanitize_filename(file.filename)
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                    
-                    # 경로 안전성 확인
-                    if not is_safe_path(app.config['UPLOAD_FOLDER'], filepath):
-                        continue
-                    
-                    file.save(filepath)
-                    subject_files[subject_name] = filepath
-        
-        # 과목 데이터 로드
-        for subject_name, filepath in subject_files.items():
-            data_processor.load_subject_data(subject_name, filepath)
-        
-        print(f"[업로드] 업로드 완료 - 과목 수: {len(subject_files)}")
+        filepath = upload.files['student_names'].path
+        print(f"[업로드] 학생명 파일 저장 완료: {filepath}")
+        
+        # 학생명 데이터 로드
+        data_processor.load_student_names(filepath)
+        print(f"[업로드] 학생명 데이터 로드 완료: {len(data_processor.student_names)}명")
+        
+        # 등급컷 파일 (선택사항)
+        if 'grade_cutoff' in upload.files:
+            data_processor.load_grade_cutoff_data(upload.files['grade_cutoff'].path)
+            print("[INFO] 등급컷 파일 업로드 완료")
+        
+        # 과목 데이터 로드 (받는 동안 이미 읽은 결과를 검증해 설정)
+        for subject_name, part in upload.subjects.items():
+            data_processor.load_subject_data(subject_name, part.path, part.content_key, part.result)
+        
+        # 세션 메모리 사용량 갱신 (한도를 넘으면 세션 데이터를 비우고 오류)
+        session_store.update(session_id)
+        upload_store.maybe_collect()
+        
+        print(f"[업로드] 업로드 완료 - 과목 수: {len(upload.subjects)}")
         return jsonify({
             'success': True,
-            'message': f'✅ {len(subject_files)}개 과목 파일이 업로드되었습니다.',
-            'subjects': list(subject_files.keys())
+            'message': f'✅ {len(upload.subjects)}개 과목 파일이 업로드되었습니다.',
+            'subjects': list(upload.subjects.keys())
         })
     
+    except RequestEntityTooLarge:
+        print("[ERROR] 업로드 크기 한도 초과")
+        limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+        return jsonify({'error': f'⚠️ 업로드 크기 한도({limit_mb}MB)를 넘었습니다.\n\n파일을 나눠서 올려주세요.'}), 413
+    
+    except SessionMemoryError as e:
+        print(f"[ERROR] 세션 메모리 한도 초과: {str(e)}")
+        return jsonify({'error': f'⚠️ {str(e)}\n\n파일을 나눠서 처리해주세요.'}), 413
+    
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -154,6 +199,58 @@ def upload_files():
         print(f"[ERROR] 상세 오류:\n{error_details}")
         return jsonify({'error': f'파일 업로드 중 오류가 발생했습니다.\n\n{str(e)}'}), 500
 
+@app.route('/upload-subject', methods=['POST'])
+def upload_subject():
+    """
+    과목 파일 1개만 교체 (form: subject=과목 이름, file=과목 파일)
+
+    내용이 마지막으로 올린 파일과 같으면 다시 읽지 않고,
+    다르면 다른 과목은 그대로 두고 이 과목만 다시 통합/등급 계산
+    """
+    try:
+        data_processor = get_session_data_processor()
+
+        subject_name = (request.form.get('subject') or '').strip()
+        if not subject_name:
+            return jsonify({'error': '과목 이름(subject)이 필요합니다.'}), 400
+
+        file = request.files.get('file')
+        if not file or not file.filename or not allowed_file(file.filename):
+            return jsonify({'error': '유효하지 않은 과목 파일입니다.'}), 400
+
+        # 내용 해시 이름으로 저장 (같은 내용이 이미 있으면 기존 파일 사용)
+        content_hash, filepath = upload_store.put(file.stream, file.filename)
+        upload_store.record(get_session_id(), f'subject_{subject_name}', file.filename, content_hash, filepath)
+        print(f"[업로드] {subject_name} 과목 파일 교체 요청: {file.filename} → {filepath}")
+        content_key = DatasetCache.derive_key(content_hash, 'subject', FORMAT_VERSION)
+        changed = data_processor.reload_subject_data(subject_name, filepath, content_key)
+
+        # 세션 메모리 사용량 갱신 (한도를 넘으면 세션 데이터를 비우고 오류)
+        session_store.update(get_session_id())
+
+        if not changed:
+            message = f'✅ {subject_name} 파일이 이전과 같아 그대로 사용합니다.'
+        else:
+            message = f'✅ {subject_name} 과목 데이터를 다시 불러왔습니다.'
+        return jsonify({
+            'success': True,
+            'message': message,
+            'subject': subject_name,
+            'changed': changed,
+            'subjects': list(data_processor.subject_data.keys())
+        })
+
+    except SessionMemoryError as e:
+        print(f"[ERROR] 세션 메모리 한도 초과: {str(e)}")
+        return jsonify({'error': f'⚠️ {str(e)}\n\n파일을 나눠서 처리해주세요.'}), 413
+
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"[ERROR] 과목 파일 교체 오류: {str(e)}")
+        print(f"[ERROR] 상세 오류:\n{error_details}")
+        return jsonify({'error': f'과목 파일 교체 중 오류가 발생했습니다.\n\n{str(e)}'}), 500
+
 @app.route('/process', methods=['POST'])
 def process_data():
     """데이터 처리 및 성적표 생성"""
@@ -167,71 +264,95 @@ def process_data():
         
         # 입력 검증
         pdf_title = data.get('pdf_title', '모의고사 성적표')[:100]  # 길이 제한
-        exam_name = data.get('exam_name', '2024학년도 모의고사')[:100]  # 길이 제한
         
-        # 데이터 처리
-        try:
+        # 출력 폴더 (프로파일링 결과도 여기에 저장)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_dir = os.path.join(app.config['OUTPUT_FOLDER'], timestamp)
+        profile = bool(data.get('profile'))
+        
+        # 데이터 처리 (profile이면 이 요청 스레드만 샘플링)
+        with profile_run(output_dir, 'process', enabled=profile, current_thread_only=True):
             processed_data = data_processor.process_all_data()
-        except Exception as e:
-            # process_all_data에서 발생한 오류를 그대로 전달
-            raise e
         
-        if processed_data is None or processed_data.empty:
+        # 처리 결과 캐시까지 포함해 세션 메모리 사용량 갱신 (넘으면 캐시만 버림)
+        session_store.update(get_session_id())
+        
+        if not processed_data:
             return jsonify({'error': '⚠️ 처리할 학생 데이터가 없습니다!\n\n파일 업로드 상태를 확인하거나\n파일 형식이 올바른지 확인해주세요.'}), 400
         
         # 학생 수 제한 (DoS 방지)
         if len(processed_data) > 1000:
             return jsonify({'error': '한 번에 최대 1000명까지만 처리할 수 있습니다.'}), 400
         
+        # changed_only: 등급컷/표점만 고친 뒤에는 결과가 바뀐 학생만 다시 생성
+        # (changed_student_ids가 None이면 전체를 새로 계산한 것이므로 전체 생성)
+        changed_ids = data_processor.changed_student_ids
+        if data.get('changed_only') and changed_ids is not None:
+            changed = set(changed_ids)
+            processed_data = {sid: student for sid, student in processed_data.items() if sid in changed}
+            if not processed_data:
+                return jsonify({
+                    'success': True,
+                    'message': '등급컷/표점 변경으로 결과가 바뀐 학생이 없습니다.',
+                    'changed_students': 0,
+                    'total': 0
+                })
+        
         # 출력 폴더 생성
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_dir = os.path.join(app.config['OUTPUT_FOLDER'], timestamp)
         os.makedirs(output_dir, exist_ok=True)
         
-        # PDF 생성
-        generated_files = []
-        failed_count = 0
+        def pdf_filename(student_data):
+            """파일명 안전하게 생성"""
+            student_name = str(student_data.get('name', 'student'))[:50]
+            student_id = str(student_data.get('student_id', ''))[:50]
+            return sanitize_filename(f"{student_name}_{student_id}.pdf")
         
-        for idx, row in processed_data.iterrows():
-            try:
-                student_data = row.to_dict()
-                
-                # 파일명 안전하게 생성
-                student_name = str(student_data.get('이름', f'student_{idx}'))[:50]
-                student_id = str(student_data.get('학번', idx))[:50]
-                safe_name = sanitize_filename(f"{student_name}_{student_id}.pdf")
-                
-                output_file = os.path.join(output_dir, safe_name)
-                
-                # 경로 안전성 확인
-                if not is_safe_path(output_dir, output_file):
-                    print(f"[경고] 안전하지 않은 경로: {output_file}")
-                    failed_count += 1
-                    continue
-                
-                # PDF 생성
-                pdf_generator.generate_pdf(student_data, output_file, pdf_title, exam_name)
-                generated_files.append(os.path.basename(output_file))
-                
-            except Exception as e:
-                print(f"[ERROR] 학생 {idx} PDF 생성 오류: {str(e)}")
+        # 경로 안전성 확인
+        students = []
+        filenames = {}
+        failed_count = 0
+        for student_id, student_data in processed_data.items():
+            filename = pdf_filename(student_data)
+            output_file = os.path.join(output_dir, filename)
+            if not is_safe_path(output_dir, output_file):
+                print(f"[경고] 안전하지 않은 경로: {output_file}")
                 failed_count += 1
                 continue
+            students.append(student_data)
+            filenames[str(student_data['student_id'])] = filename
         
-        # 생성된 파일이 하나도 없으면 오류
-        if len(generated_files) == 0:
+        if not students:
             return jsonify({'error': f'❌ 성적표 생성에 실패했습니다.\n\n총 {len(processed_data)}명 중 {failed_count}명 실패\n\n파일 형식을 확인하거나 서버 로그를 확인해주세요.'}), 500
         
-        message = f'✅ {len(generated_files)}개의 성적표가 생성되었습니다!'
+        # PDF 생성은 작업 큐에서 (요청은 작업 ID만 받고 바로 반환, /jobs/<id>로 진행 상황 확인)
+        chunk_size = data.get('chunk_size')
+        job_id = get_job_queue().submit('job_queue:run_report_job', {
+            'students': students,
+            'filenames': filenames,
+            'output_dir': output_dir,
+            'pdf_title': pdf_title,
+            'merge_pdf': bool(data.get('merge_pdf')),
+            'chunk_size': int(chunk_size) if chunk_size else None,
+            'profile': profile,
+        }, total=len(students))
+        
+        message = f'⏳ {len(students)}명의 성적표 생성을 시작했습니다.'
         if failed_count > 0:
-            message += f'\n\n⚠️ {failed_count}개는 생성 실패했습니다.'
+            message += f'\n\n⚠️ {failed_count}명은 파일명 문제로 제외되었습니다.'
         
         return jsonify({
             'success': True,
             'message': message,
-            'files': generated_files,
-            'output_dir': timestamp
-        })
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id),
+            'output_dir': timestamp,
+            'changed_students': None if changed_ids is None else len(changed_ids),
+            'total': len(students)
+        }), 202
+    
+    except SessionMemoryError as e:
+        print(f"[ERROR] 세션 메모리 한도 초과: {str(e)}")
+        return jsonify({'error': f'⚠️ {str(e)}\n\n파일을 나눠서 처리해주세요.'}), 413
     
     except Exception as e:
         import traceback
@@ -250,6 +371,44 @@ def process_data():
         else:
             return jsonify({'error': f'데이터 처리 중 오류가 발생했습니다.\n\n오류 내용: {error_message}'}), 500
 
+def _job_response(job):
+    """작업 상태 응답 (진행률, 지금까지 생성된 파일)"""
+    total = job['total'] or 0
+    processed = job['done'] + job['failed']
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'total': total,
+        'done': job['done'],
+        'failed': job['failed'],
+        'progress': round(processed / total * 100, 1) if total else 0,
+        'files': job['files'],
+        'cancel_requested': job['cancel_requested'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+    }
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """성적표 생성 작업 진행 상황 및 부분 결과"""
+    job = get_job_queue().get(secure_filename(job_id))
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(_job_response(job))
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """성적표 생성 작업 취소 (이미 만든 PDF는 유지)"""
+    job_id = secure_filename(job_id)
+    queue = get_job_queue()
+    if queue.get(job_id) is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    if not queue.cancel(job_id):
+        return jsonify({'error': '이미 끝난 작업입니다.'}), 409
+    return jsonify({'success': True, 'message': '작업 취소를 요청했습니다.'})
+
 @app.route('/download/<output_dir>/<filename>')
 def download_file(output_dir, filename):
     """생성된 PDF 다운로드"""
@@ -275,6 +434,31 @@ def download_file(output_dir, filename):
         print(f"[ERROR] 파일 다운로드 오류: {str(e)}")
         abort(500)
 
+@app.route('/download-batch/<output_dir>')
+def download_batch(output_dir):
+    """출력 폴더 전체를 ZIP으로 스트리밍 다운로드 (임시 파일 없이, PDF는 무압축)"""
+    # 입력 검증 - 경로 순회 공격 방지
+    output_dir = secure_filename(output_dir)
+    folder = os.path.join(app.config['OUTPUT_FOLDER'], output_dir)
+    
+    if not output_dir or not is_safe_path(app.config['OUTPUT_FOLDER'], folder):
+        abort(403)
+    if not os.path.isdir(folder):
+        abort(404)
+    
+    files = [
+        (entry.name, entry.path)
+        for entry in sorted(os.scandir(folder), key=lambda entry: entry.name)
+        if entry.is_file(follow_symlinks=False) and not entry.name.endswith('.tmp')
+    ]
+    if not files:
+        abort(404)
+    
+    response = Response(iter_zip(files), mimetype='application/zip', direct_passthrough=True)
+    response.headers['Content-Disposition'] = f'attachment; filename="reports_{output_dir}.zip"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/download-sample/<filename>')
 def download_sample(filename):
     """샘플 파일 다운로드"""
@@ -321,31 +505,23 @@ def preview_report():
         if not data:
             return jsonify({'error': '요청 데이터가 없습니다.'}), 400
         
+        student_id = data.get('student_id')
         student_name = data.get('student_name')
-        if not student_name:
-            return jsonify({'error': '학생 이름이 필요합니다.'}), 400
-        
-        # 처리된 데이터에서 학생 찾기
-        processed_data = data_processor.process_all_data()
-        
-        if processed_data is None or processed_data.empty:
-            return jsonify({'error': '처리된 데이터가 없습니다.'}), 400
+        if not student_id and not student_name:
+            return jsonify({'error': '학생 이름 또는 수험번호가 필요합니다.'}), 400
         
-        student_records = processed_data[processed_data['이름'] == student_name]
+        # 처리 결과는 업로드가 바뀔 때까지 캐시되므로 학생 조회만 수행
+        if student_id:
+            student_data = data_processor.get_student(student_id)
+        else:
+            matches = data_processor.find_students_by_name(student_name)
+            student_data = matches[0] if matches else None
         
-        if student_records.empty:
+        if student_data is None:
             return jsonify({'error': '해당 학생을 찾을 수 없습니다.'}), 404
         
-        student_data = student_records.iloc[0].to_dict()
-        
-        # HTML 렌더링
-        return render_template('report.html', 
-                             student=student_data,
-                             report={
-                                 'exam_name': data.get('exam_name', '모의고사')[:100],
-                                 'issued_at': datetime.now().strftime('%Y-%m-%d')
-                             },
-                             scores=format_scores_for_template(student_data))
+        pdf_title = data.get('pdf_title', '모의고사 성적표')[:100]
+        return pdf_generator.render_html(student_data, pdf_title)
     
     except Exception as e:
         print(f"[ERROR] 미리보기 오류: {str(e)}")
@@ -356,16 +532,17 @@ def list_students():
     """업로드된 데이터의 학생 목록 반환"""
     try:
         data_processor = get_session_data_processor()
-        processed_data = data_processor.process_all_data()
-        
-        if processed_data is None or processed_data.empty:
+        if not data_processor.student_names or not data_processor.subject_data:
             return jsonify({'students': []})
         
-        students = processed_data['이름'].unique().tolist()
+        processed_data = data_processor.process_all_data()
+        session_store.update(get_session_id())
         
         # 목록 크기 제한
-        if len(students) > 1000:
-            students = students[:1000]
+        students = [
+            {'student_id': student_id, 'name': student_data['name']}
+            for student_id, student_data in islice(processed_data.items(), 1000)
+        ]
         
         return jsonify({'students': students})
     
@@ -377,27 +554,12 @@ def list_students():
 def clear_data():
     """업로드된 데이터 초기화"""
     try:
-        # 세션 데이터 프로세서 초기화
-        session_id = request.remote_addr
-        if session_id in data_processors:
-            del data_processors[session_id]
-        
-        # 업로드 폴더 비우기 (보안: 안전하게 처리)
-        upload_folder = app.config['UPLOAD_FOLDER']
-        if os.path.exists(upload_folder):
-            # 업로드 폴더 내의 파일만 삭제
-            for filename in os.listdir(upload_folder):
-                file_path = os.path.join(upload_folder, filename)
-                
-                # 경로 안전성 확인
-                if not is_safe_path(upload_folder, file_path):
-                    continue
-                
-                try:
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
-                except Exception as e:
-                    print(f"[WARNING] 파일 삭제 실패: {file_path} - {str(e)}")
+        # 세션 데이터 프로세서와 업로드 목록 삭제 (다른 세션이 쓰지 않는 업로드 파일은 저장소 정리 때 삭제)
+        session_id = get_session_id(create=False)
+        if session_id:
+            session_store.discard(session_id)
+            upload_store.discard_session(session_id)
+        upload_store.collect_garbage()
         
         return jsonify({'success': True, 'message': '데이터가 초기화되었습니다.'})
     
@@ -405,23 +567,6 @@ def clear_data():
         print(f"[ERROR] 데이터 초기화 오류: {str(e)}")
         return jsonify({'error': '데이터 초기화 중 오류가 발생했습니다.'}), 500
 
-def format_scores_for_template(student_data):
-    """템플릿에 맞게 점수 데이터 포맷"""
-    scores = []
-    subjects = ['국어', '수학', '영어', '한국사', '탐구1', '탐구2']
-    
-    for subject in subjects:
-        if f'{subject}_원점수' in student_data:
-            scores.append({
-                'subject': subject,
-                'raw': student_data.get(f'{subject}_원점수', '-'),
-                'std': student_data.get(f'{subject}_표준점수', '-'),
-                'percentile': student_data.get(f'{subject}_백분위', '-'),
-                'grade': student_data.get(f'{subject}_등급', '-')
-            })
-    
-    return scores
-
 if __name__ == '__main__':
     print("=" * 60)
     print("성적 관리 시스템 웹 서버가 시작되었습니다!")
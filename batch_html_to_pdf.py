@@ -7,10 +7,12 @@ import os
 import sys
 import time
 from pathlib import Path
-from playwright_pdf_converter import html_file_to_pdf_sync
+from playwright_pdf_converter import html_file_to_pdf_sync, iter_batch_to_pdf_sync
+from pdf_cache import get_pdf_cache
 
 def batch_html_to_pdf(input_folder: str, output_folder: str = None, 
-                     recursive: bool = False, overwrite: bool = False):
+                     recursive: bool = False, overwrite: bool = False,
+                     concurrency: int = None, use_cache: bool = True):
     """
     폴더 내 모든 HTML 파일을 PDF로 일괄 변환
     
@@ -19,6 +21,8 @@ def batch_html_to_pdf(input_folder: str, output_folder: str = None,
         output_folder: PDF 출력 폴더 (없으면 입력 폴더와 동일)
         recursive: 하위 폴더까지 재귀적으로 검색
         overwrite: 기존 PDF 파일 덮어쓰기 여부
+        concurrency: 동시에 변환할 파일 수 (기본: 브라우저 풀 용량)
+        use_cache: 내용이 같은 HTML은 PDF 캐시에서 복사 (HTML이 참조하는 이미지 등이 바뀌었으면 끌 것)
     """
     
     # 입력 폴더 확인
@@ -59,55 +63,60 @@ def batch_html_to_pdf(input_folder: str, output_folder: str = None,
     print(f"발견된 HTML 파일: {len(html_files)}개")
     print()
     
-    # 변환 시작
+    # 변환 대상 정리
     success_count = 0
     error_count = 0
     start_time = time.time()
+    items = []
     
     for i, html_file in enumerate(html_files, 1):
-        try:
-            # 상대 경로 계산
-            rel_path = os.path.relpath(html_file, input_folder)
-            print(f"[{i}/{len(html_files)}] 처리 중: {rel_path}")
-            
-            # 출력 파일명 생성
-            base_name = os.path.splitext(os.path.basename(html_file))[0]
-            pdf_name = f"{base_name}.pdf"
-            
-            # 출력 경로 설정
-            if recursive:
-                # 하위 폴더 구조 유지
-                rel_dir = os.path.dirname(rel_path)
-                if rel_dir:
-                    pdf_dir = os.path.join(output_folder, rel_dir)
-                    os.makedirs(pdf_dir, exist_ok=True)
-                    pdf_path = os.path.join(pdf_dir, pdf_name)
-                else:
-                    pdf_path = os.path.join(output_folder, pdf_name)
+        # 상대 경로 계산
+        rel_path = os.path.relpath(html_file, input_folder)
+        
+        # 출력 파일명 생성
+        base_name = os.path.splitext(os.path.basename(html_file))[0]
+        pdf_name = f"{base_name}.pdf"
+        
+        # 출력 경로 설정
+        if recursive:
+            # 하위 폴더 구조 유지
+            rel_dir = os.path.dirname(rel_path)
+            if rel_dir:
+                pdf_dir = os.path.join(output_folder, rel_dir)
+                os.makedirs(pdf_dir, exist_ok=True)
+                pdf_path = os.path.join(pdf_dir, pdf_name)
             else:
                 pdf_path = os.path.join(output_folder, pdf_name)
-            
-            # 기존 파일 확인
-            if os.path.exists(pdf_path) and not overwrite:
-                print(f"  건너뛰기 (이미 존재): {pdf_name}")
-                continue
-            
-            # PDF 변환
-            success = html_file_to_pdf_sync(html_file, pdf_path)
-            
-            if success:
-                file_size = os.path.getsize(pdf_path)
-                print(f"  성공: {pdf_name} ({file_size:,} bytes)")
-                success_count += 1
-            else:
-                print(f"  실패: {pdf_name}")
-                error_count += 1
-                
-        except Exception as e:
-            print(f"  오류: {str(e)}")
-            error_count += 1
+        else:
+            pdf_path = os.path.join(output_folder, pdf_name)
         
+        # 기존 파일 확인
+        if os.path.exists(pdf_path) and not overwrite:
+            print(f"[{i}/{len(html_files)}] 건너뛰기 (이미 존재): {pdf_name}")
+            continue
+        
+        items.append({"key": rel_path, "html_file": html_file, "output_pdf": pdf_path})
+    
+    # 변환 시작 (브라우저 풀에서 여러 페이지 동시 출력)
+    results = []
+    if items:
+        print(f"변환 시작: {len(items)}개 (동시 {concurrency or '기본'}개)")
         print()
+        cache = get_pdf_cache() if use_cache else None
+        results = iter_batch_to_pdf_sync(items, concurrency, cache=cache)
+    
+    for done, result in enumerate(results, 1):
+        pdf_name = os.path.basename(result["output_pdf"])
+        if result["success"]:
+            file_size = os.path.getsize(result["output_pdf"])
+            source = "캐시" if result.get("cached") else f"{result['elapsed']:.2f}초"
+            print(f"[{done}/{len(items)}] 성공: {result['key']} → {pdf_name} ({file_size:,} bytes, {source})")
+            success_count += 1
+        else:
+            print(f"[{done}/{len(items)}] 실패: {result['key']} - {result['error']}")
+            error_count += 1
+    
+    print()
     
     # 결과 요약
     end_time = time.time()
@@ -171,6 +180,8 @@ def main():
         print("옵션:")
         print("  -r, --recursive    하위 폴더까지 재귀 검색")
         print("  -o, --overwrite    기존 PDF 파일 덮어쓰기")
+        print("  -j N, --jobs N     동시에 변환할 파일 수")
+        print("  --no-cache         PDF 캐시를 사용하지 않고 모두 새로 변환")
         print()
         print("예시:")
         print("  python batch_html_to_pdf.py ./html_files")
@@ -179,13 +190,22 @@ def main():
         return
     
     # 명령행 인수 파싱
-    input_folder = sys.argv[1]
-    output_folder = sys.argv[2] if len(sys.argv) > 2 else None
-    recursive = '-r' in sys.argv or '--recursive' in sys.argv
-    overwrite = '-o' in sys.argv or '--overwrite' in sys.argv
+    args = sys.argv[1:]
+    concurrency = None
+    for flag in ('-j', '--jobs'):
+        if flag in args:
+            pos = args.index(flag)
+            concurrency = int(args[pos + 1])
+            del args[pos:pos + 2]
+    positional = [a for a in args if not a.startswith('-')]
+    input_folder = positional[0]
+    output_folder = positional[1] if len(positional) > 1 else None
+    recursive = '-r' in args or '--recursive' in args
+    overwrite = '-o' in args or '--overwrite' in args
+    use_cache = '--no-cache' not in args
     
     # 배치 변환 실행
-    success = batch_html_to_pdf(input_folder, output_folder, recursive, overwrite)
+    success = batch_html_to_pdf(input_folder, output_folder, recursive, overwrite, concurrency, use_cache)
     
     if success:
         print("\n배치 변환이 완료되었습니다!")
@@ -0,0 +1,421 @@
+"""
+채점·성적표 파이프라인 벤치마크
+가상의 학생 집단(1천/1만/10만 명, 전 과목·선택과목 코드)을 만들어
+단계별(읽기, 통합, 등급 계산, 템플릿 렌더링, PDF 출력, ZIP) 시간·최대 메모리·처리량을 JSON으로 기록하고
+저장된 기준(baseline)과 비교해 느려진 단계를 표시
+
+사용법:
+    python benchmark.py                          # 1000, 10000, 100000명
+    python benchmark.py --sizes 1000 10000 --pdf-limit 0
+    python benchmark.py --save-baseline          # 이번 결과를 기준으로 저장
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+from typing import Any, Callable, Dict, List, Optional
+
+# 반복 실행해도 매번 실제로 파싱/출력하도록 캐시 끔 (--warm-cache로 켤 수 있음)
+os.environ.setdefault('DATASET_CACHE_ENABLED', '0')
+os.environ.setdefault('PDF_CACHE_ENABLED', '0')
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmark_results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+DEFAULT_SIZES = (1000, 10000, 100000)
+# 기준보다 처리량이 이 비율 이상 떨어지면 느려진 것으로 표시
+DEFAULT_TOLERANCE = 0.2
+
+# 과목 파일 → (문항 수, 선택과목 후보)  (선택과목은 DataProcessor.subject_codes의 이름)
+SUBJECT_LAYOUT = {
+    '국어': (45, ("화법과 작문", "언어와 매체")),
+    '수학': (30, ("확률과 통계", "미분과 적분", "기하")),
+    '영어': (45, ("영어",)),
+    '한국사': (20, ("한국사",)),
+    '탐구1': (20, ("생활과 윤리", "윤리와 사상", "한국지리", "세계지리", "동아시아사", "세계사", "경제",
+                 "정치와 법", "사회·문화")),
+    '탐구2': (20, ("물리학Ⅰ", "화학Ⅰ", "생명과학Ⅰ", "지구과학Ⅰ", "물리학Ⅱ", "화학Ⅱ", "생명과학Ⅱ", "지구과학Ⅱ")),
+}
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN_SYLLABLES = "민서준지현우예도하윤수영진주원채은호성연유재희승"
+ABSENT_RATE = 0.01
+
+STAGES = ('ingest', 'merge', 'grade', 'render', 'pdf', 'zip')
+STAGE_LABELS = {
+    'generate': '데이터 생성', 'ingest': '파일 읽기', 'merge': '학생별 통합', 'grade': '등급 계산',
+    'render': '템플릿 렌더링', 'pdf': 'PDF 출력', 'zip': 'ZIP',
+}
+
+
+# ----------------------------------------------------------------------
+# 가상 데이터 생성
+# ----------------------------------------------------------------------
+def generate_cohort(n_students: int, output_dir: str, seed: int = 0) -> Dict[str, str]:
+    """
+    학생명 파일과 과목별 채점결과 파일 생성 (load_student_names/load_subject_data 형식)
+
+    Args:
+        n_students: 학생 수
+        output_dir: 저장 폴더
+        seed: 난수 시드 (같은 시드면 같은 데이터)
+
+    Returns:
+        Dict[str, str]: {'학생명': 경로, 과목: 경로, ...}
+    """
+    from data_processor import DataProcessor
+
+    rng = np.random.default_rng(seed)
+    subject_codes = DataProcessor().subject_codes
+    os.makedirs(output_dir, exist_ok=True)
+    exam_numbers = np.arange(1, n_students + 1) + 2_000_000
+
+    surnames = np.array(list(SURNAMES), dtype=object)
+    syllables = np.array(list(GIVEN_SYLLABLES), dtype=object)
+    names = (surnames[rng.integers(len(surnames), size=n_students)]
+             + syllables[rng.integers(len(syllables), size=n_students)]
+             + syllables[rng.integers(len(syllables), size=n_students)])
+    paths = {'학생명': os.path.join(output_dir, "students.csv")}
+    pd.DataFrame({'수험번호': exam_numbers, '이름': names}).to_csv(paths['학생명'], index=False, encoding='utf-8-sig')
+
+    for subject, (n_items, electives) in SUBJECT_LAYOUT.items():
+        elective = rng.integers(len(electives), size=n_students)
+        # 학생 실력(0~1)에 따라 문항별 오답 여부 결정
+        ability = rng.beta(5, 2, size=n_students)
+        wrong = rng.random((n_students, n_items)) > ability[:, None]
+        wrong_count = wrong.sum(axis=1)
+        scores = np.round(100 * (n_items - wrong_count) / n_items).astype(int)
+        item_numbers = np.arange(1, n_items + 1)
+        wrong_text = np.array([', '.join(map(str, item_numbers[row])) if row.any() else '없음' for row in wrong],
+                              dtype=object)
+
+        frame = pd.DataFrame({
+            '수험번호': exam_numbers,
+            '과목코드': [subject_codes[electives[i]] for i in elective],
+            '총점': scores.astype(object),
+            '만점': 100,
+            '정답수': n_items - wrong_count,
+            '오답번호': wrong_text,
+            '선택과목': [electives[i] for i in elective],
+            '선택과목코드': [subject_codes[electives[i]] for i in elective],
+        })
+        absent = rng.random(n_students) < ABSENT_RATE
+        frame.loc[absent, '총점'] = '결시'
+        paths[subject] = os.path.join(output_dir, f"{subject}.csv")
+        frame.to_csv(paths[subject], index=False, encoding='utf-8-sig')
+    return paths
+
+
+# ----------------------------------------------------------------------
+# 측정
+# ----------------------------------------------------------------------
+def peak_rss_mb() -> Optional[float]:
+    """현재 프로세스의 최대 메모리 사용량 (MB, 측정할 수 없으면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageTimer:
+    """단계별 측정 결과 기록 (시간, 처리량, 단계가 끝난 시점의 최대 메모리)"""
+
+    def __init__(self, quiet: bool = True):
+        self.quiet = quiet
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, name: str, fn: Callable[[], Any], unit: str = 'rows', count: Callable[[Any], int] = None):
+        """fn 실행 시간 측정 (count(fn 결과) = 처리한 항목 수)"""
+        output = open(os.devnull, 'w', encoding='utf-8') if self.quiet else None
+        try:
+            with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+                start = time.perf_counter()
+                result = fn()
+                seconds = time.perf_counter() - start
+        finally:
+            if output:
+                output.close()
+        items = count(result) if count else None
+        self.stages[name] = {
+            'seconds': round(seconds, 4),
+            'items': items,
+            'unit': unit,
+            'throughput': round(items / seconds, 1) if items and seconds > 0 else None,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        print(f"  {STAGE_LABELS.get(name, name):<10} {seconds:8.3f}s  {_format_throughput(self.stages[name])}")
+        return result
+
+    def skip(self, name: str, reason: str):
+        self.stages[name] = {'skipped': reason}
+        print(f"  {STAGE_LABELS.get(name, name):<10} 건너뜀 ({reason})")
+
+
+def _format_throughput(stage: Dict[str, Any]) -> str:
+    if stage.get('throughput') is None:
+        return ''
+    return f"{stage['items']:,} {stage['unit']}, {stage['throughput']:,.0f} {stage['unit']}/s"
+
+
+def run_cohort(n_students: int, work_dir: str, render_limit: int, pdf_limit: int, quiet: bool = True) -> Dict[str, Any]:
+    """
+    학생 n명 집단으로 전체 파이프라인을 단계별로 실행·측정
+
+    Args:
+        n_students: 학생 수
+        work_dir: 입력/출력 파일을 둘 폴더
+        render_limit: 렌더링할 최대 학생 수 (0이면 전원)
+        pdf_limit: PDF로 출력할 최대 학생 수 (0이면 PDF/ZIP 단계 건너뜀)
+        quiet: 처리 중 로그 출력 숨김
+
+    Returns:
+        Dict: {'students', 'stages': {단계: 측정 결과}}
+    """
+    from data_processor import DataProcessor
+    from zip_stream import iter_zip
+
+    timer = StageTimer(quiet)
+    input_dir = os.path.join(work_dir, "input")
+    output_dir = os.path.join(work_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = timer.run('generate', lambda: generate_cohort(n_students, input_dir), 'students',
+                      lambda _: n_students)
+
+    processor = DataProcessor()
+
+    def ingest():
+        processor.load_student_names(paths['학생명'])
+        for subject in SUBJECT_LAYOUT:
+            processor.load_subject_data(subject, paths[subject])
+        return sum(len(df) for df in processor.subject_data.values())
+
+    timer.run('ingest', ingest, 'rows', lambda rows: rows)
+
+    # process_all_data()와 같은 순서로 단계를 나누어 실행
+    def merge():
+        if processor.grade_cutoff_data is None:
+            processor._set_default_grade_cutoffs()
+        table, _ = processor._build_student_table()
+        return table
+
+    table = timer.run('merge', merge, 'rows', len)
+
+    def grade():
+        grades, standard_scores, percentiles = processor.calculate_grades_batch(
+            table['subject_code'].to_numpy(dtype=object),
+            np.asarray(table['total_score'].tolist(), dtype=float)
+        )
+        table['grade'] = processor._grade_values(grades)
+        table['standard_score'] = processor._grade_values(standard_scores)
+        table['percentile'] = processor._grade_values(percentiles)
+        return processor._assemble_student_data(table)
+
+    student_data = timer.run('grade', grade, 'rows', lambda _: len(table))
+    students = list(student_data.values())
+
+    from jinja_pdf_generator import JinjaPDFGenerator
+    generator = JinjaPDFGenerator()
+    render_students = students[:render_limit] if render_limit else students
+
+    def render():
+        return sum(1 for _ in generator.render_html_many(render_students, "벤치마크 성적표"))
+
+    timer.run('render', render, 'students', lambda rendered: rendered)
+
+    if not pdf_limit:
+        timer.skip('pdf', "--pdf-limit 0")
+        timer.skip('zip', "PDF 없음")
+        return {'students': n_students, 'stages': timer.stages}
+
+    def print_pdfs():
+        results = generator.generate_pdfs(students[:pdf_limit], output_dir, "벤치마크 성적표")
+        failed = [result for result in results if not result.get('success')]
+        if failed and len(failed) == len(results):
+            raise RuntimeError(failed[0].get('error') or "PDF 출력 실패")
+        return len(results) - len(failed)
+
+    try:
+        timer.run('pdf', print_pdfs, 'students', lambda printed: printed)
+    except Exception as e:
+        # Chromium이 없는 환경 등
+        timer.skip('pdf', f"출력 불가: {str(e).splitlines()[0][:120]}")
+        timer.skip('zip', "PDF 없음")
+        return {'students': n_students, 'stages': timer.stages}
+    finally:
+        try:
+            from browser_pool import close_browser_pool
+            close_browser_pool()
+        except Exception:
+            pass
+
+    pdf_files = [(name, os.path.join(output_dir, name)) for name in sorted(os.listdir(output_dir))
+                 if name.endswith('.pdf')]
+    timer.run('zip', lambda: sum(len(chunk) for chunk in iter_zip(pdf_files)), 'MB',
+              lambda size: round(size / (1024 * 1024), 3))
+    return {'students': n_students, 'stages': timer.stages}
+
+
+def _cohort_worker(queue, n_students: int, work_dir: str, render_limit: int, pdf_limit: int, quiet: bool):
+    """학생 수별로 새 프로세스에서 실행 (최대 메모리가 이전 실행의 영향을 받지 않도록)"""
+    try:
+        queue.put(run_cohort(n_students, work_dir, render_limit, pdf_limit, quiet))
+    except Exception as e:
+        import traceback
+        queue.put({'students': n_students, 'error': f"{str(e)}\n{traceback.format_exc()}"})
+
+
+def run_benchmark(sizes, render_limit: int = 2000, pdf_limit: int = 20, quiet: bool = True,
+                  keep_files: bool = False) -> Dict[str, Any]:
+    """
+    학생 수별 벤치마크 실행
+
+    Returns:
+        Dict: {'meta': 실행 환경, 'runs': [run_cohort() 결과, ...]}
+    """
+    runs = []
+    context = multiprocessing.get_context('spawn')
+    for n_students in sizes:
+        print(f"[벤치마크] 학생 {n_students:,}명")
+        work_dir = tempfile.mkdtemp(prefix=f"benchmark_{n_students}_")
+        queue = context.Queue()
+        process = context.Process(target=_cohort_worker,
+                                  args=(queue, n_students, work_dir, render_limit, pdf_limit, quiet))
+        process.start()
+        result = queue.get()
+        process.join()
+        if keep_files:
+            print(f"  파일: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if 'error' in result:
+            print(f"[오류] {n_students}명 실행 실패:\n{result['error']}")
+        runs.append(result)
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'render_limit': render_limit,
+            'pdf_limit': pdf_limit,
+        },
+        'runs': runs,
+    }
+
+
+# ----------------------------------------------------------------------
+# 기준과 비교
+# ----------------------------------------------------------------------
+def compare_with_baseline(results: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    단계별 처리량을 기준과 비교 (학생 수가 같은 실행끼리)
+
+    Returns:
+        List[dict]: 비교 결과 (students, stage, baseline, current, ratio, regression)
+    """
+    baseline_runs = {run['students']: run for run in baseline.get('runs', []) if 'stages' in run}
+    rows = []
+    for run in results['runs']:
+        base_run = baseline_runs.get(run['students'])
+        if base_run is None or 'stages' not in run:
+            continue
+        for stage in STAGES:
+            current = run['stages'].get(stage, {}).get('throughput')
+            previous = base_run['stages'].get(stage, {}).get('throughput')
+            if not current or not previous:
+                continue
+            ratio = current / previous
+            rows.append({
+                'students': run['students'],
+                'stage': stage,
+                'baseline': previous,
+                'current': current,
+                'ratio': round(ratio, 3),
+                'regression': ratio < 1 - tolerance,
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    if not rows:
+        print("[비교] 비교할 기준 결과가 없습니다.")
+        return
+    print(f"{'학생 수':>8}  {'단계':<10} {'기준/s':>12} {'이번/s':>12} {'비율':>6}")
+    for row in rows:
+        mark = "  ← 느려짐" if row['regression'] else ""
+        print(f"{row['students']:>8,}  {STAGE_LABELS[row['stage']]:<10} {row['baseline']:>12,.0f} "
+              f"{row['current']:>12,.0f} {row['ratio']:>6.2f}{mark}")
+
+
+def main(argv=None) -> int:
+    """명령행: 벤치마크 실행 → benchmark_results/에 JSON 저장, 기준과 비교 (느려진 단계가 있으면 1 반환)"""
+    parser = argparse.ArgumentParser(description="채점·성적표 파이프라인 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="학생 수 (여러 개)")
+    parser.add_argument('--render-limit', type=int, default=2000, help="렌더링할 최대 학생 수 (0: 전원)")
+    parser.add_argument('--pdf-limit', type=int, default=20, help="PDF로 출력할 최대 학생 수 (0: PDF/ZIP 생략)")
+    parser.add_argument('--output', help="결과 JSON 경로 (기본: benchmark_results/benchmark_<시각>.json)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="비교할 기준 JSON")
+    parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준으로 저장")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="허용 처리량 감소 비율")
+    parser.add_argument('--warm-cache', action='store_true', help="데이터/PDF 캐시를 켠 상태로 측정")
+    parser.add_argument('--verbose', action='store_true', help="처리 중 로그 출력")
+    parser.add_argument('--keep-files', action='store_true', help="생성한 입력/출력 파일 유지")
+    args = parser.parse_args(argv)
+
+    if args.warm_cache:
+        os.environ['DATASET_CACHE_ENABLED'] = '1'
+        os.environ['PDF_CACHE_ENABLED'] = '1'
+
+    results = run_benchmark(args.sizes, args.render_limit, args.pdf_limit, quiet=not args.verbose,
+                            keep_files=args.keep_files)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"benchmark_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"[저장] {output}")
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare_with_baseline(results, baseline, args.tolerance)
+        print_comparison(rows)
+        regressions = [row for row in rows if row['regression']]
+    else:
+        print(f"[비교] 기준 파일이 없습니다: {args.baseline} (--save-baseline으로 저장)")
+
+    if args.save_baseline:
+        shutil.copyfile(output, args.baseline)
+        print(f"[저장] 기준 결과: {args.baseline}")
+
+    if regressions:
+        print(f"[경고] 기준보다 {args.tolerance:.0%} 이상 느려진 단계 {len(regressions)}개")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
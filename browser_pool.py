@@ -0,0 +1,305 @@
+"""
+프로세스 단위 Chromium 브라우저 풀
+학생마다 브라우저를 새로 띄우지 않고, 한 번 띄운 브라우저/컨텍스트를 재사용해 PDF를 출력
+"""
+
+import os
+import asyncio
+import atexit
+import threading
+import concurrent.futures
+from typing import Any, Awaitable, Callable, List, Optional
+
+from playwright.async_api import async_playwright
+
+
+# 풀 크기 기본값 (환경 변수로 조정 가능)
+DEFAULT_BROWSERS = int(os.environ.get('PDF_POOL_BROWSERS', '1'))
+DEFAULT_CONTEXTS_PER_BROWSER = int(os.environ.get('PDF_POOL_CONTEXTS', '4'))
+DEFAULT_MAX_RENDERS = int(os.environ.get('PDF_POOL_MAX_RENDERS', '500'))
+# 동기 호출(submit/run)의 제한 시간(초), 통합 PDF 한 묶음 출력도 들어가도록 넉넉하게
+DEFAULT_TIMEOUT = float(os.environ.get('PDF_POOL_TIMEOUT', '600'))
+# 멈춘 브라우저는 close()도 끝나지 않을 수 있으므로 이 시간만 기다리고 버림
+CLOSE_TIMEOUT = 10
+
+LAUNCH_ARGS = ['--no-sandbox', '--disable-dev-shm-usage']
+
+
+class _BrowserSlot:
+    """브라우저 1개와 그 위의 컨텍스트들"""
+
+    def __init__(self, index: int, contexts: int):
+        self.index = index
+        self.browser = None
+        self.contexts: List[Any] = [None] * contexts
+        self.renders = 0
+        self.in_flight = 0
+        self.generation = 0
+        self.draining = False
+        self.drained: Optional[asyncio.Event] = None
+        # 같은 브라우저의 컨텍스트들이 동시에 (재)시작하지 않도록 (이벤트 루프 안에서 생성)
+        self.launch_lock: Optional[asyncio.Lock] = None
+
+    def is_alive(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    N개 브라우저 × M개 컨텍스트 풀
+
+    - 첫 렌더링 요청 시 브라우저를 띄움 (lazy start)
+    - 요청마다 브라우저 연결 상태를 확인하고, 죽었으면 다시 띄움
+    - 브라우저당 max_renders회 출력하면 진행 중인 작업이 끝난 뒤 교체
+    - 동기 호출이 timeout초 안에 끝나지 않으면 작업을 취소하고 그 브라우저를 교체
+    - 전용 스레드의 이벤트 루프에서 동작하므로 Flask/Tkinter 같은 동기 코드에서도 호출 가능
+    """
+
+    def __init__(self, browsers: int = DEFAULT_BROWSERS,
+                 contexts_per_browser: int = DEFAULT_CONTEXTS_PER_BROWSER,
+                 max_renders: int = DEFAULT_MAX_RENDERS, timeout: float = DEFAULT_TIMEOUT):
+        self.browsers = max(1, browsers)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.max_renders = max(1, max_renders)
+        self.timeout = timeout
+
+        self._slots = [_BrowserSlot(i, self.contexts_per_browser) for i in range(self.browsers)]
+        self._playwright = None
+        self._tokens: Optional[asyncio.Queue] = None
+        self._starting: Optional[asyncio.Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def capacity(self) -> int:
+        """동시에 열 수 있는 페이지 수"""
+        return self.browsers * self.contexts_per_browser
+
+    # ------------------------------------------------------------------
+    # 이벤트 루프 스레드
+    # ------------------------------------------------------------------
+    def _ensure_loop(self):
+        """전용 이벤트 루프 스레드 시작 (최초 1회)"""
+        if self._loop is not None:
+            return
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            if self._closed:
+                raise RuntimeError("브라우저 풀이 이미 종료되었습니다.")
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True)
+            thread.start()
+            self._thread = thread
+            self._loop = loop
+
+    def submit_async(self, coro: Awaitable) -> concurrent.futures.Future:
+        """코루틴을 풀 이벤트 루프에 예약하고 Future 반환 (기다리지 않음)"""
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        코루틴을 풀 이벤트 루프에서 실행하고 결과를 기다림 (동기 호출용)
+
+        timeout(없으면 self.timeout)초가 지나면 코루틴을 취소하고 TimeoutError
+        (render() 중이었으면 쓰던 브라우저는 멈춘 것으로 보고 교체)
+        """
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit_async(coro)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"브라우저 풀 작업이 제한 시간 {timeout:g}초를 넘었습니다.") from None
+
+    def run(self, page_fn: Callable[[Any], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """페이지 하나를 빌려 page_fn(page)를 실행 (동기 호출용, timeout은 submit()과 같음)"""
+        return self.submit(self.render(page_fn), timeout)
+
+    # ------------------------------------------------------------------
+    # 브라우저 관리 (이벤트 루프 스레드에서만 호출)
+    # ------------------------------------------------------------------
+    async def _ensure_started(self):
+        if self._tokens is not None:
+            return
+        # 동시에 들어온 첫 요청들이 Playwright를 한 번만 띄우도록 공유
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self._start())
+        try:
+            await asyncio.shield(self._starting)
+        except Exception:
+            self._starting = None
+            raise
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        tokens = asyncio.Queue()
+        # 컨텍스트 단위 토큰: (브라우저 번호, 컨텍스트 번호)
+        for ctx_index in range(self.contexts_per_browser):
+            for slot in self._slots:
+                tokens.put_nowait((slot.index, ctx_index))
+        self._tokens = tokens
+
+    async def _launch(self, slot: _BrowserSlot):
+        """브라우저 (재)시작"""
+        await self._close_browser(slot)
+        slot.browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        slot.contexts = [None] * self.contexts_per_browser
+        slot.renders = 0
+        slot.generation += 1
+        print(f"[브라우저풀] 브라우저 #{slot.index} 시작 (세대 {slot.generation})")
+
+    async def _close_browser(self, slot: _BrowserSlot):
+        browser = slot.browser
+        slot.browser = None
+        slot.contexts = [None] * self.contexts_per_browser
+        if browser is not None:
+            try:
+                await asyncio.wait_for(browser.close(), CLOSE_TIMEOUT)
+            except Exception as e:
+                print(f"[브라우저풀] 브라우저 #{slot.index} 종료 오류: {str(e)}")
+
+    async def _get_context(self, slot: _BrowserSlot, ctx_index: int):
+        """
+        헬스 체크 후 컨텍스트 반환 (필요 시 브라우저/컨텍스트 재생성)
+
+        브라우저별 잠금 안에서 확인/재시작하므로, 같은 브라우저의 여러 요청이 동시에
+        죽은 것을 보더라도 한 번만 다시 띄움 (나머지는 잠금을 얻은 뒤 다시 확인)
+
+        Returns:
+            (컨텍스트, 브라우저 세대)
+        """
+        if slot.launch_lock is None:
+            slot.launch_lock = asyncio.Lock()
+        async with slot.launch_lock:
+            if not slot.is_alive():
+                if slot.browser is not None:
+                    print(f"[브라우저풀] 브라우저 #{slot.index} 연결 끊김 감지, 재시작합니다.")
+                await self._launch(slot)
+            if slot.contexts[ctx_index] is None:
+                slot.contexts[ctx_index] = await slot.browser.new_context()
+            return slot.contexts[ctx_index], slot.generation
+
+    async def render(self, page_fn: Callable[[Any], Awaitable[Any]]) -> Any:
+        """
+        풀에서 컨텍스트를 빌려 새 페이지에서 page_fn(page) 실행
+
+        브라우저가 중간에 죽으면 한 번 재시작 후 다시 시도,
+        취소되면(submit()의 제한 시간 초과 등) 멈춘 브라우저일 수 있으므로 닫고 다음 요청에서 다시 띄움
+        """
+        await self._ensure_started()
+        slot_index, ctx_index = await self._tokens.get()
+        slot = self._slots[slot_index]
+        # 교체 대기 중인 브라우저면 진행 중인 작업이 모두 끝날 때까지 대기
+        try:
+            while slot.draining:
+                await slot.drained.wait()
+        except asyncio.CancelledError:
+            self._tokens.put_nowait((slot_index, ctx_index))
+            raise
+        slot.in_flight += 1
+        cancelled = False
+        try:
+            for attempt in range(2):
+                page = None
+                generation = None
+                try:
+                    context, generation = await self._get_context(slot, ctx_index)
+                    page = await context.new_page()
+                    return await page_fn(page)
+                except Exception:
+                    # 쓰던 브라우저가 죽었거나 그 사이 다른 요청이 새로 띄운 경우
+                    # (죽은 브라우저 정리/재시작은 다음 _get_context가 잠금 안에서 처리)
+                    crashed = not slot.is_alive() or (generation is not None and generation != slot.generation)
+                    if not crashed or attempt == 1:
+                        raise
+                    print(f"[브라우저풀] 브라우저 #{slot.index} 비정상 종료, 재시도합니다.")
+                finally:
+                    if page is not None:
+                        try:
+                            await asyncio.wait_for(page.close(), CLOSE_TIMEOUT)
+                        except Exception:
+                            pass
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if cancelled and slot.browser is not None:
+                # 같은 브라우저의 다른 요청은 연결 끊김으로 보고 재시작 후 재시도
+                print(f"[브라우저풀] 브라우저 #{slot.index} 작업 취소(응답 없음), 교체합니다.")
+                if slot.launch_lock is None:
+                    slot.launch_lock = asyncio.Lock()
+                async with slot.launch_lock:
+                    await self._close_browser(slot)
+            slot.renders += 1
+            slot.in_flight -= 1
+            if slot.renders >= self.max_renders and not slot.draining:
+                slot.draining = True
+                slot.drained = asyncio.Event()
+            if slot.draining and slot.in_flight == 0:
+                print(f"[브라우저풀] 브라우저 #{slot.index} {slot.renders}회 사용, 교체합니다.")
+                await self._close_browser(slot)
+                slot.renders = 0
+                slot.draining = False
+                slot.drained.set()
+            self._tokens.put_nowait((slot_index, ctx_index))
+
+    async def _shutdown(self):
+        for slot in self._slots:
+            await self._close_browser(slot)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._tokens = None
+        self._starting = None
+
+    def close(self):
+        """모든 브라우저 종료 및 이벤트 루프 정지"""
+        with self._start_lock:
+            self._closed = True
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=30)
+        except Exception as e:
+            print(f"[브라우저풀] 종료 오류: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+
+# 프로세스 전역 풀 (fork된 워커 프로세스는 각자 새 풀을 가짐)
+_pool: Optional[BrowserPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """현재 프로세스의 공유 브라우저 풀 반환"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = BrowserPool()
+                _pool_pid = pid
+    return _pool
+
+
+def close_browser_pool():
+    """공유 브라우저 풀 종료"""
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+    if pool is not None and _pool_pid == os.getpid():
+        pool.close()
+
+
+atexit.register(close_browser_pool)
@@ -1,13 +1,88 @@
+import hashlib
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Mapping, Optional, Tuple
+
+from dataset_cache import DatasetCache, get_dataset_cache
+from ingest import FORMAT_VERSION, IngestStats, read_subject_file
+from metrics import span, verbose
+
+# 업로드 템플릿(영어 과목명) → 프로그램 내부 과목명
+SUBJECT_NAME_MAPPING = {
+    'Korean': '국어',
+    'Language_and_Media': '언어와 매체',
+    'Speech_and_Writing': '화법과 작문',
+    'Math': '수학',
+    'Probability_and_Statistics': '확률과 통계',
+    'Calculus': '미적분',
+    'Geometry': '기하',
+    'English': '영어',
+    'Korean_History': '한국사',
+    'Life_and_Ethics': '생활과 윤리',
+    'Ethics_and_Ideology': '윤리와 사상',
+    'Korean_Geography': '한국지리',
+    'World_Geography': '세계지리',
+    'East_Asian_History': '동아시아사',
+    'World_History': '세계사',
+    'Economics': '경제',
+    'Politics_and_Law': '정치와 법',
+    'Social_Culture': '사회·문화',
+    'Physics_I': '물리학 I',
+    'Chemistry_I': '화학 I',
+    'Biology_I': '생명과학 I',
+    'Earth_Science_I': '지구과학 I',
+    'Physics_II': '물리학 II',
+    'Chemistry_II': '화학 II',
+    'Biology_II': '생명과학 II',
+    'Earth_Science_II': '지구과학 II'
+}
 
 class DataProcessor:
+    # 결시로 처리할 값 (소문자 비교)
+    ABSENT_TOKENS = ('결시', 'absent', '미응시', '불참', 'nan', 'none')
+    # 학생 이름에 허용하지 않는 문자
+    INVALID_NAME_CHARS = ('<', '>', '|', '?', '*')
+    # 과목 정보에 필요한 컬럼 (하나라도 없으면 해당 과목은 기본값으로 처리)
+    SUBJECT_INFO_COLUMNS = ('총점', '정답수', '오답번호', '선택과목', '선택과목코드')
+    # 처리 결과의 과목 정보 항목
+    SUBJECT_RESULT_KEYS = ('subject_name', 'subject_code', 'total_score', 'correct_count', 'wrong_answers',
+                           'grade', 'standard_score', 'percentile')
+    
+    # str.strip()이 제거하는 ASCII 공백 문자
+    _ASCII_WHITESPACE = np.frombuffer(b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f', dtype=np.uint8)
+    
+    # 점수 변환 상태 코드
+    _SCORE_OK, _SCORE_ABSENT, _SCORE_INVALID, _SCORE_NEGATIVE = 0, 1, 2, 3
+    
     def __init__(self):
         self.subject_data = {}
+        # 과목 → 마지막으로 로드한 파일 내용 키 (같은 파일을 다시 올리면 다시 읽지 않음)
+        self.subject_hashes: Dict[str, str] = {}
         self.grade_cutoff_data = None
         self.standard_scores = {}
         self.student_names = {}  # 수험번호 -> 이름 매핑
+        # 과목코드 → 과목명 인덱스 (subject_codes/등급컷이 바뀌면 다시 생성)
+        self._subject_code_index: Optional[Mapping[str, str]] = None
+        # process_all_data() 결과 캐시 (입력이 바뀔 때마다 버전 증가 → 다시 계산)
+        self._data_version = 0
+        self._processed: Optional[Dict[str, Any]] = None
+        self._processed_version = -1
+        self._ids_by_name: Optional[Dict[str, List[str]]] = None
+        # 학생-과목 통합 표 (과목 데이터/학생명이 바뀔 때만 다시 생성)
+        # 등급컷/표점만 바뀌면 이 표를 그대로 두고 바뀐 과목코드의 등급 컬럼만 다시 계산
+        self._raw_version = 0
+        self._table: Optional[pd.DataFrame] = None
+        self._table_result: Optional[Dict[str, Any]] = None  # 통합 표의 현재 등급 값으로 만든 결과
+        self._table_version = -1
+        self._grade_fingerprints: Dict[Any, str] = {}  # 과목코드 → 등급 계산 입력 지문
+        # 마지막 process_all_data()에서 결과가 바뀐 학생 수험번호 (None이면 전체를 새로 계산)
+        self.changed_student_ids: Optional[List[str]] = None
+        # update_subject_rows()로 바뀌었지만 아직 process_all_data()로 알리지 않은 학생
+        self._pending_changed_ids: List[str] = []
+        # 과목 → (과목 데이터, 정리된 수험번호 인덱스) (update_subject_rows()에서 행 찾기용)
+        self._subject_row_keys: Dict[str, Tuple[pd.DataFrame, pd.Index]] = {}
         # 과목 코드 매핑
         self.subject_codes = {
             # 국어 영역
@@ -47,8 +122,54 @@ class DataProcessor:
             "지구과학Ⅱ": "27"
         }
         
-    def load_subject_data(self, subject: str, file_path: str):
-        """과목별 데이터 로드"""
+    def load_subject_data(self, subject: str, file_path: str, content_key: Optional[str] = None,
+                          parsed: Optional[Callable[[], Tuple[pd.DataFrame, IngestStats]]] = None):
+        """
+        과목별 데이터 로드
+        
+        Args:
+            content_key: 이미 계산한 파일 내용 키 (업로드 중에 계산한 경우)
+            parsed: 이미 읽기 시작한 결과를 돌려주는 함수 (업로드와 동시에 읽은 경우 파일을 다시 읽지 않음,
+                    캐시에 같은 내용이 있으면 호출하지 않음, None을 돌려주면 파일에서 읽음)
+        """
+        content_key, df = self._read_subject_frame(subject, file_path, content_key, parsed)
+        self.subject_data[subject] = df
+        self.subject_hashes[subject] = content_key
+        self.invalidate_processed_data()
+        print(f"[완료] {subject} 데이터 로드 완료: {len(df)}명")
+    
+    def reload_subject_data(self, subject: str, file_path: str, content_key: Optional[str] = None) -> bool:
+        """
+        과목 1개의 파일만 다시 로드 (다른 과목은 다시 읽거나 통합하지 않음)
+        
+        파일 내용이 마지막으로 로드한 파일과 같으면(SHA-256) 아무것도 하지 않고,
+        다르면 replace_subject_data()로 이 과목의 행만 다시 통합/등급 계산
+        
+        Args:
+            content_key: 이미 계산한 파일 내용 키 (업로드 저장소에 저장하며 계산한 경우)
+        
+        Returns:
+            bool: 데이터가 바뀌었으면 True
+        """
+        if content_key is None:
+            content_key = DatasetCache.make_key(file_path, 'subject', FORMAT_VERSION)
+        if subject in self.subject_data and self.subject_hashes.get(subject) == content_key:
+            print(f"[유지] {subject}: 이전에 로드한 파일과 내용이 같아 다시 읽지 않습니다.")
+            return False
+        content_key, df = self._read_subject_frame(subject, file_path, content_key)
+        self.replace_subject_data(subject, df)
+        self.subject_hashes[subject] = content_key
+        print(f"[완료] {subject} 데이터 교체 완료: {len(df)}명")
+        return True
+    
+    def _read_subject_frame(self, subject: str, file_path: str, content_key: Optional[str] = None,
+                            parsed: Optional[Callable[[], Tuple[pd.DataFrame, IngestStats]]] = None):
+        """
+        과목 파일 읽기 (캐시에 같은 내용이 있으면 파싱 생략, 없고 parsed가 있으면 그 결과를 검증만)
+        
+        Returns:
+            (str, DataFrame): 파일 내용 키(SHA-256), 정리된 과목 데이터
+        """
         try:
             print(f"[파일] {subject} 파일 로드 시작: {file_path}")
             
@@ -63,80 +184,46 @@ class DataProcessor:
                 raise ValueError(f"파일이 비어있습니다: {file_path}")
             
             print(f"[크기] 파일 크기: {file_size} bytes")
+            ingest_span = span('ingest')
+            
+            # 같은 내용의 파일을 이미 읽었으면(다른 세션이 올린 파일 포함) 캐시에서 바로 가져옴
+            # (파싱 생략, 업로드 중에 읽고 있는 결과도 기다리지 않음)
+            if content_key is None:
+                content_key = DatasetCache.make_key(file_path, 'subject', FORMAT_VERSION)
+            cache_key, df = self._cached_frame('subject', file_path, content_key)
+            stats = None
+            if df is None:
+                # 업로드와 동시에 이미 읽은 결과 (없으면 파일에서 읽기)
+                result = parsed() if parsed is not None else None
+                if result is None:
+                    # 필요한 컬럼만 청크 단위로 읽으면서 정리 (필수 컬럼은 헤더에서 먼저 확인)
+                    print("[읽기] 파일 읽기 시도...")
+                    result = read_subject_file(file_path)
+                df, stats = result
+            if stats is not None:
+                print(f"[데이터] 로드된 데이터 행 수: {stats.rows} (청크 {stats.chunks}개)")
+                print(f"[데이터] 로드된 데이터 컬럼: {list(df.columns)}")
+                print("[확인] 필수 컬럼 확인 완료")
+                
+                if stats.dropped:
+                    print(f"[경고] {stats.dropped}개 행이 빈 데이터로 제거되었습니다.")
+                if stats.invalid['총점']:
+                    print(f"[경고] {stats.invalid['총점']}개의 총점 데이터가 유효하지 않습니다.")
+                if stats.invalid['만점']:
+                    print(f"[경고] {stats.invalid['만점']}개의 만점 데이터가 유효하지 않습니다.")
+                
+                # 최종 데이터 검증
+                if len(df) == 0:
+                    raise ValueError("유효한 데이터가 없습니다. 모든 행이 빈 데이터이거나 잘못된 형식입니다.")
+                self._store_cached_frame(cache_key, df)
             
-            # 파일 확장자에 따라 읽기 방법 결정
-            if file_path.endswith('.csv'):
-                print("[읽기] CSV 파일 읽기 시도...")
-                try:
-                    df = pd.read_csv(file_path, encoding='utf-8-sig')
-                except UnicodeDecodeError:
-                    print("[경고] UTF-8 인코딩 실패, 다른 인코딩 시도...")
-                    try:
-                        df = pd.read_csv(file_path, encoding='cp949')
-                    except UnicodeDecodeError:
-                        df = pd.read_csv(file_path, encoding='latin-1')
-            elif file_path.endswith('.xlsx'):
-                print("[읽기] Excel 파일 읽기 시도...")
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError(f"지원하지 않는 파일 형식입니다. 지원 형식: .csv, .xlsx, 현재: {file_path.split('.')[-1]}")
-            
-            print(f"[데이터] 로드된 데이터 행 수: {len(df)}")
-            print(f"[데이터] 로드된 데이터 컬럼: {list(df.columns)}")
-            
-            # 필수 컬럼 확인
-            required_columns = ['수험번호', '과목코드', '총점', '만점', '정답수', '오답번호']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            
-            if missing_columns:
-                available_columns = list(df.columns)
-                raise ValueError(f"필수 컬럼이 누락되었습니다.\n누락된 컬럼: {missing_columns}\n사용 가능한 컬럼: {available_columns}")
-            
-            print("[확인] 필수 컬럼 확인 완료")
-            
-            # 데이터 정리
-            print("[정리] 데이터 정리 시작...")
-            original_count = len(df)
-            df = df.dropna(subset=['수험번호', '총점'])  # 수험번호와 총점이 있는 행만 유지
-            cleaned_count = len(df)
-            
-            if cleaned_count < original_count:
-                print(f"[경고] {original_count - cleaned_count}개 행이 빈 데이터로 제거되었습니다.")
-            
-            # 숫자 데이터 변환
-            print("[변환] 숫자 데이터 변환 중...")
-            try:
-                df['총점'] = pd.to_numeric(df['총점'], errors='coerce')
-                invalid_scores = df['총점'].isna().sum()
-                if invalid_scores > 0:
-                    print(f"[경고] {invalid_scores}개의 총점 데이터가 유효하지 않습니다.")
-            except Exception as e:
-                raise ValueError(f"총점 데이터 변환 오류: {str(e)}")
-            
-            try:
-                df['만점'] = pd.to_numeric(df['만점'], errors='coerce')
-                invalid_maxes = df['만점'].isna().sum()
-                if invalid_maxes > 0:
-                    print(f"[경고] {invalid_maxes}개의 만점 데이터가 유효하지 않습니다.")
-            except Exception as e:
-                raise ValueError(f"만점 데이터 변환 오류: {str(e)}")
-            
-            try:
-                df['과목코드'] = df['과목코드'].astype(str)
-            except Exception as e:
-                raise ValueError(f"과목코드 데이터 변환 오류: {str(e)}")
-            
-            # 최종 데이터 검증
-            final_count = len(df)
-            if final_count == 0:
-                raise ValueError("유효한 데이터가 없습니다. 모든 행이 빈 데이터이거나 잘못된 형식입니다.")
-            
-            self.subject_data[subject] = df
-            print(f"[완료] {subject} 데이터 로드 완료: {final_count}명")
+            ingest_span.finish(items=len(df))
             
-            # 샘플 데이터 출력
-            print(f"[샘플] 샘플 데이터 (처음 3행):")
-            print(df.head(3).to_string())
+            # 샘플 데이터 출력 (LOG_LEVEL=DEBUG)
+            if verbose():
+                print(f"[샘플] 샘플 데이터 (처음 3행):")
+                print(df.head(3).to_string())
+            return content_key, df
             
         except FileNotFoundError as e:
             raise Exception(f"[오류] 파일 오류: {str(e)}")
@@ -146,21 +233,263 @@ class DataProcessor:
             import traceback
             error_details = traceback.format_exc()
             raise Exception(f"[오류] {subject} 데이터 로드 중 예상치 못한 오류:\n{str(e)}\n\n상세 오류:\n{error_details}")
-            
+
+    @staticmethod
+    def _cached_frame(kind: str, file_path: str, key: Optional[str] = None):
+        """
+        업로드 데이터 캐시 조회
+        
+        Args:
+            key: 이미 계산한 파일 내용 키 (없으면 여기서 계산)
+        
+        Returns:
+            (캐시 키, DataFrame 또는 None): 캐시를 쓰지 않으면 키도 None
+        """
+        cache = get_dataset_cache()
+        if cache is None:
+            return None, None
+        if key is None:
+            key = cache.make_key(file_path, kind, FORMAT_VERSION)
+        df = cache.get(key)
+        if df is not None:
+            print(f"[캐시] 이전에 읽은 같은 파일의 데이터 사용: {len(df)}행")
+        return key, df
+    
+    @staticmethod
+    def _store_cached_frame(cache_key: Optional[str], df: pd.DataFrame):
+        """읽은 데이터를 캐시에 저장 (실패해도 로드는 계속)"""
+        if cache_key is None:
+            return
+        try:
+            get_dataset_cache().put(cache_key, df)
+        except Exception as e:
+            print(f"[경고] 데이터 캐시 저장 실패: {str(e)}")
+    
+    def set_subject_data(self, subject: str, df: pd.DataFrame):
+        """
+        채점결과 DataFrame을 과목 데이터로 직접 설정 (OMR 채점 결과 등, 파일 저장/재로드 없이)
+
+        Args:
+            subject: 과목 이름 (예: '국어', '탐구1')
+            df: 수험번호, 과목코드, 총점, 만점, 정답수, 오답번호 컬럼을 가진 채점결과
+        """
+        required_columns = ['수험번호', '과목코드', '총점', '만점', '정답수', '오답번호']
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"필수 컬럼이 누락되었습니다: {missing_columns}")
+
+        df = df.dropna(subset=['수험번호', '총점'])
+        if df.empty:
+            raise ValueError(f"{subject}: 유효한 데이터가 없습니다.")
+
+        self.subject_data[subject] = df
+        self.subject_hashes.pop(subject, None)
+        self.invalidate_processed_data()
+        print(f"[완료] {subject} 채점결과 설정 완료: {len(df)}명")
+
+    def update_subject_rows(self, subject: str, updates: pd.DataFrame) -> List[str]:
+        """
+        과목 데이터 중 일부 학생의 행만 바꾸고, 그 학생들만 다시 통합/등급 계산
+        (OMR 정답 변경처럼 일부 학생의 점수만 바뀐 경우 전체 통합 없이 반영)
+        
+        통합 표가 아직 없거나 수험번호가 중복되면 과목 데이터만 바꾸고
+        다음 process_all_data()에서 전체 계산
+        
+        Args:
+            subject: 과목 이름 (이미 설정된 과목)
+            updates: 수험번호 + 바꿀 컬럼 (총점, 만점, 정답수, 오답번호 ...)
+        
+        Returns:
+            List[str]: 결과가 바뀐 학생 수험번호 (다음 process_all_data()의 changed_student_ids에도 포함)
+        """
+        if subject not in self.subject_data:
+            raise ValueError(f"{subject}: 설정되지 않은 과목입니다.")
+        if '수험번호' not in updates.columns:
+            raise ValueError("필수 컬럼이 누락되었습니다: ['수험번호']")
+        
+        df = self.subject_data[subject]
+        cached = self._subject_row_keys.get(subject)
+        keys = cached[1] if cached is not None and cached[0] is df else pd.Index(self._text_column(df['수험번호']))
+        update_keys = self._text_column(updates['수험번호'])
+        positions = keys.get_indexer(update_keys) if keys.is_unique else None
+        if positions is None or (positions < 0).any():
+            # 행 단위로 맞출 수 없으면 기존 행을 빼고 새 행을 붙여 과목 데이터 전체를 다시 설정
+            print(f"[경고] {subject}: 수험번호가 중복되거나 없는 학생이 있어 전체 데이터를 다시 처리합니다.")
+            kept = df[~keys.isin(update_keys)]
+            self.set_subject_data(subject, pd.concat([kept, updates], ignore_index=True))
+            return []
+        
+        # 원래 표는 캐시 등과 공유될 수 있으므로 바뀐 컬럼만 새 배열로 교체
+        df = df.copy(deep=False)
+        for column in updates.columns:
+            if column == '수험번호' or column not in df.columns:
+                continue
+            old = df[column].to_numpy()
+            new = updates[column].to_numpy()
+            values = old.astype(np.result_type(old.dtype, new.dtype))
+            values[positions] = new
+            df[column] = values
+        self.subject_data[subject] = df
+        self.subject_hashes.pop(subject, None)
+        self._subject_row_keys[subject] = (df, keys)
+        
+        table = self._table
+        if table is None or self._table_result is None or self._table_version != self._raw_version:
+            self.invalidate_processed_data()
+            return []
+        
+        subject_rows = np.flatnonzero(table['subject'].to_numpy(dtype=object) == subject)
+        table_ids = pd.Index(table['student_id'].to_numpy(dtype=object)[subject_rows])
+        if not table_ids.is_unique:
+            self.invalidate_processed_data()
+            return []
+        
+        with span('merge') as merge_span:
+            rows = df.iloc[np.unique(positions)]
+            names = {exam_number: self.student_names.get(exam_number)
+                     for exam_number in self._text_column(rows['수험번호'])}
+            valid_names = pd.Series({exam_number: name for exam_number, name in names.items()
+                                     if self._is_valid_name(name)}, dtype=object)
+            merged, _ = self._merge_subject(subject, rows, valid_names)
+            found = table_ids.get_indexer(merged['student_id'])
+            merged = merged[found >= 0]
+            targets = subject_rows[found[found >= 0]]
+            merge_span.items = len(targets)
+        if not len(targets):
+            return []
+        
+        with span('grade') as grade_span:
+            grades, standard_scores, percentiles = self.calculate_grades_batch(
+                merged['subject_code'].to_numpy(dtype=object),
+                np.asarray(merged['total_score'].tolist(), dtype=float)
+            )
+            columns = {column: merged[column].to_numpy(dtype=object)
+                       for column in ('subject_name', 'subject_code', 'total_score', 'correct_count', 'wrong_answers')}
+            columns['grade'] = self._grade_values(grades)
+            columns['standard_score'] = self._grade_values(standard_scores)
+            columns['percentile'] = self._grade_values(percentiles)
+            for column, values in columns.items():
+                column_values = table[column].to_numpy(dtype=object).copy()
+                column_values[targets] = values
+                table[column] = column_values
+            
+            # 결과가 바뀐 학생만 복사해서 수정 (이전 결과를 받은 쪽에는 영향 없음)
+            previous = self._table_result
+            student_data = dict(previous)
+            changed_ids = []
+            last = table['is_last'].to_numpy()[targets]
+            patched = zip(table['student_id'].to_numpy(dtype=object)[targets][last].tolist(),
+                          *(columns[column][last].tolist() for column in self.SUBJECT_RESULT_KEYS))
+            for student_id, *values in patched:
+                info = dict(zip(self.SUBJECT_RESULT_KEYS, values))
+                if previous[student_id]['subjects'].get(subject) == info:
+                    continue
+                student = student_data[student_id]
+                if student is previous[student_id]:
+                    student = student_data[student_id] = dict(student, subjects=dict(student['subjects']))
+                    changed_ids.append(student_id)
+                student['subjects'][subject] = info
+            self._table_result = student_data
+            grade_span.items = len(targets)
+        
+        print(f"[재계산] {subject}: {len(targets)}개 행 다시 계산, 결과가 바뀐 학생 {len(changed_ids)}명")
+        # 통합 표는 그대로 유효 → 다음 process_all_data()는 이 결과에서 시작
+        self._pending_changed_ids += changed_ids
+        self.invalidate_processed_data(raw=False)
+        return changed_ids
+
+    def replace_subject_data(self, subject: str, df: pd.DataFrame) -> Optional[List[str]]:
+        """
+        과목 1개의 데이터를 통째로 교체하고, 통합 표에서 그 과목의 행만 다시 통합/등급 계산
+        (다른 과목은 다시 통합하지 않고, 그 과목이 있거나 있었던 학생만 결과를 다시 묶음)
+        
+        통합 표가 아직 없으면 다음 process_all_data()에서 전체 계산
+        
+        Returns:
+            Optional[List[str]]: 결과가 바뀐 학생 수험번호 (None이면 다음에 전체 계산,
+                                 다음 process_all_data()의 changed_student_ids에도 포함)
+        """
+        self.subject_data[subject] = df
+        self.subject_hashes.pop(subject, None)
+        self._subject_row_keys.pop(subject, None)
+        
+        table = self._table
+        if table is None or self._table_result is None or self._table_version != self._raw_version:
+            self.invalidate_processed_data()
+            return None
+        
+        with span('merge') as merge_span:
+            block, _ = self._merge_subject(subject, df, self._valid_names())
+            # 통합 표는 과목 순서대로 이어 붙인 것이므로 이 과목의 행은 한 구간
+            subject_order = {name: position for position, name in enumerate(self.subject_data)}
+            table_order = table['subject'].map(subject_order).to_numpy()
+            start = int((table_order < subject_order[subject]).sum())
+            stop = start + int((table_order == subject_order[subject]).sum())
+            merge_span.items = 0 if block is None else len(block)
+        
+        with span('grade') as grade_span:
+            if block is not None and len(block):
+                grades, standard_scores, percentiles = self.calculate_grades_batch(
+                    block['subject_code'].to_numpy(dtype=object),
+                    np.asarray(block['total_score'].tolist(), dtype=float)
+                )
+                block['grade'] = self._grade_values(grades)
+                block['standard_score'] = self._grade_values(standard_scores)
+                block['percentile'] = self._grade_values(percentiles)
+                block['is_last'] = ~block.duplicated(['student_id', 'subject'], keep='last').to_numpy()
+                frames = [table.iloc[:start], block, table.iloc[stop:]]
+                grade_span.items = len(block)
+            else:
+                frames = [table.iloc[:start], table.iloc[stop:]]
+            new_table = pd.concat([frame for frame in frames if len(frame)], ignore_index=True)
+            if new_table.empty:
+                self.invalidate_processed_data()
+                return None
+            
+            # 이 과목이 있었거나 새로 생긴 학생만 결과를 다시 묶음 (나머지는 이전 결과와 공유)
+            affected = set(table['student_id'].iloc[start:stop].tolist())
+            if block is not None:
+                affected.update(block['student_id'].tolist())
+            rebuilt = self._assemble_student_data(new_table[new_table['student_id'].isin(affected).to_numpy()])
+            previous = self._table_result
+            changed = {student_id for student_id, student in rebuilt.items() if previous.get(student_id) != student}
+            # 학생 순서는 전체 계산과 같게 통합 표에 처음 나오는 순서
+            student_data = {student_id: rebuilt[student_id] if student_id in changed else previous[student_id]
+                            for student_id in pd.unique(new_table['student_id']).tolist()}
+            changed_ids = [student_id for student_id in student_data if student_id in changed]
+            
+            # 새로 생긴 과목코드는 지금 등급컷으로 계산했으므로 현재 지문으로 기록
+            # (이미 있던 과목코드는 그대로 두어, 등급컷이 바뀌었으면 process_all_data()에서 다시 계산)
+            if block is not None:
+                for code in pd.unique(block['subject_code']):
+                    self._grade_fingerprints.setdefault(code, self._grade_fingerprint(code))
+        
+        self._table = new_table
+        self._table_result = student_data
+        print(f"[재계산] {subject}: 과목 행 {stop - start}개 → {0 if block is None else len(block)}개 다시 통합, "
+              f"결과가 바뀐 학생 {len(changed_ids)}명")
+        self._pending_changed_ids += changed_ids
+        self.invalidate_processed_data(raw=False)
+        return changed_ids
+
     def load_student_names(self, file_path: str):
         """학생명 파일 로드 (수험번호 -> 이름 매핑)"""
         try:
             print(f"[학생명] 파일 로드 시작: {file_path}")
+            ingest_span = span('ingest')
             
-            if file_path.endswith('.csv'):
-                try:
-                    df = pd.read_csv(file_path, encoding='utf-8-sig')
-                except UnicodeDecodeError:
-                    df = pd.read_csv(file_path, encoding='cp949')
-            elif file_path.endswith('.xlsx'):
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError("지원하지 않는 파일 형식입니다. (.csv 또는 .xlsx만 가능)")
+            cache_key, df = self._cached_frame('student_names', file_path)
+            from_cache = df is not None
+            if not from_cache:
+                if file_path.endswith('.csv'):
+                    try:
+                        df = pd.read_csv(file_path, encoding='utf-8-sig')
+                    except UnicodeDecodeError:
+                        df = pd.read_csv(file_path, encoding='cp949')
+                elif file_path.endswith('.xlsx'):
+                    df = pd.read_excel(file_path)
+                else:
+                    raise ValueError("지원하지 않는 파일 형식입니다. (.csv 또는 .xlsx만 가능)")
             
             # 필수 컬럼 확인
             if '수험번호' not in df.columns:
@@ -176,12 +505,18 @@ class DataProcessor:
                 raise ValueError(f"필수 컬럼이 누락되었습니다: ['이름' 또는 '성명']\n현재 컬럼: {df.columns.tolist()}")
             
             print(f"[학생명] 사용 컬럼: 수험번호, {name_column}")
+            if not from_cache:
+                df = df[['수험번호', name_column]]
+                self._store_cached_frame(cache_key, df)
             
             # 수험번호 -> 이름 매핑 딕셔너리 생성
             self.student_names = dict(zip(df['수험번호'].astype(str), df[name_column]))
+            self.invalidate_processed_data()
+            ingest_span.finish(items=len(self.student_names))
             
             print(f"[학생명] 데이터 로드 완료: {len(self.student_names)}명")
-            print(f"[샘플] 첫 3명: {list(self.student_names.items())[:3]}")
+            if verbose():
+                print(f"[샘플] 첫 3명: {list(self.student_names.items())[:3]}")
             
         except Exception as e:
             import traceback
@@ -230,12 +565,15 @@ class DataProcessor:
             
             # 등급컷 데이터 저장
             self.grade_cutoff_data = df
+            self.invalidate_subject_code_index()
+            self.invalidate_processed_data(raw=False)
             print(f"[등급컷] 데이터 로드 완료: {len(df)}개 과목")
             
-            # 샘플 데이터 출력
-            print(f"[샘플] 첫 3개 과목:")
-            for idx, row in df.head(3).iterrows():
-                print(f"  - {row['과목명']} ({row['과목코드']})")
+            # 샘플 데이터 출력 (LOG_LEVEL=DEBUG)
+            if verbose():
+                print(f"[샘플] 첫 3개 과목:")
+                for idx, row in df.head(3).iterrows():
+                    print(f"  - {row['과목명']} ({row['과목코드']})")
             
         except Exception as e:
             import traceback
@@ -245,17 +583,152 @@ class DataProcessor:
     def set_grade_cutoff_data(self, grade_cutoff_data: Dict[str, Dict[int, float]]):
         """등급컷 데이터 직접 설정"""
         self.grade_cutoff_data = grade_cutoff_data
+        self.invalidate_subject_code_index()
+        self.invalidate_processed_data(raw=False)
         
     def set_standard_scores(self, standard_scores: Dict[str, float]):
         """표준점수 데이터 직접 설정"""
         self.standard_scores = standard_scores
+        self.invalidate_processed_data(raw=False)
         
     def set_grade_standard_scores(self, grade_standard_scores: Dict[str, Dict[int, float]]):
         """등급별 표준점수 데이터 직접 설정"""
         self.grade_standard_scores = grade_standard_scores
+        self.invalidate_processed_data(raw=False)
+        
+    def set_subject_codes(self, subject_codes: Dict[str, str]):
+        """과목명 → 과목코드 매핑 직접 설정"""
+        self.subject_codes = dict(subject_codes)
+        self.invalidate_subject_code_index()
+        self.invalidate_processed_data(raw=False)
+        
+    def load_subject_codes(self, file_path: str):
+        """과목코드 파일 로드 (subject_codes_upload_template.csv 형식 또는 과목명/과목코드 컬럼)"""
+        try:
+            print(f"[과목코드] 파일 로드 시작: {file_path}")
+            
+            # 과목코드의 앞자리 0을 유지하도록 문자열로 읽기
+            if file_path.endswith('.csv'):
+                try:
+                    df = pd.read_csv(file_path, encoding='utf-8-sig', dtype=str)
+                except UnicodeDecodeError:
+                    df = pd.read_csv(file_path, encoding='cp949', dtype=str)
+            elif file_path.endswith('.xlsx'):
+                df = pd.read_excel(file_path, dtype=str)
+            else:
+                raise ValueError("지원하지 않는 파일 형식입니다. (.csv 또는 .xlsx만 가능)")
+            
+            if {'Subject_Name', 'Subject_Code'}.issubset(df.columns):
+                name_column, code_column = 'Subject_Name', 'Subject_Code'
+            elif {'과목명', '과목코드'}.issubset(df.columns):
+                name_column, code_column = '과목명', '과목코드'
+            else:
+                raise ValueError(f"필수 컬럼이 누락되었습니다: ['Subject_Name', 'Subject_Code'] 또는 ['과목명', '과목코드']\n현재 컬럼: {df.columns.tolist()}")
+            
+            subject_codes = {}
+            for name, code in zip(df[name_column], df[code_column]):
+                if pd.isna(name) or pd.isna(code) or not str(name).strip() or not str(code).strip():
+                    continue
+                name = str(name).strip()
+                subject_codes[SUBJECT_NAME_MAPPING.get(name, name)] = str(code).strip()
+            
+            if not subject_codes:
+                raise ValueError("유효한 과목코드가 없습니다.")
+            
+            self.set_subject_codes(subject_codes)
+            print(f"[과목코드] 데이터 로드 완료: {len(subject_codes)}개 과목")
+            
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            raise Exception(f"과목코드 데이터 로드 중 오류:\n{str(e)}\n\n상세:\n{error_details}")
+    
+    def invalidate_subject_code_index(self):
+        """
+        과목코드 인덱스 무효화 (다음 조회 때 다시 생성)
+        
+        set_*/load_* 메서드는 자동으로 호출하므로, subject_codes나 grade_cutoff_data를
+        직접 수정한 경우에만 호출하면 됨
+        """
+        self._subject_code_index = None
+    
+    def cached_results(self) -> Tuple[Optional[pd.DataFrame], List[Dict[str, Any]]]:
+        """
+        메모리에 들고 있는 처리 결과 캐시 (학생-과목 통합 표, 결과 dict 목록 - 같은 dict는 한 번만)
+        
+        invalidate_processed_data()로 버릴 수 있음 (다음 처리 때 다시 계산)
+        """
+        results = {id(result): result for result in (self._processed, self._table_result) if result}
+        return self._table, list(results.values())
+    
+    def invalidate_processed_data(self, raw: bool = True):
+        """
+        process_all_data() 결과 캐시 무효화 (다음 호출 때 다시 계산)
+        
+        set_*/load_* 메서드는 자동으로 호출하므로, subject_data 등 입력을 직접 수정한 경우에만 호출하면 됨
+        
+        Args:
+            raw: 과목 데이터/학생명이 바뀌었으면 True (통합 표부터 다시 생성),
+                 등급컷/표점/과목코드만 바뀌었으면 False (바뀐 과목코드의 등급만 다시 계산)
+        """
+        self._data_version += 1
+        self._ids_by_name = None
+        if raw:
+            self._raw_version += 1
+            self._processed = None
+            self._table = None
+            self._table_result = None
+            self._pending_changed_ids = []
+            self._subject_row_keys = {}
+    
+    @property
+    def subject_code_index(self) -> Mapping[str, str]:
+        """
+        과목코드 → 등급컷이 있는 과목명 (읽기 전용)
+        
+        같은 코드가 여러 과목에 있으면 subject_codes 순서상 먼저 나오는 과목 사용
+        """
+        index = self._subject_code_index
+        if index is None:
+            index = self._build_subject_code_index()
+            self._subject_code_index = index
+        return index
+    
+    def _build_subject_code_index(self) -> Mapping[str, str]:
+        index = {}
+        grade_cutoff_data = self.grade_cutoff_data
+        # 파일에서 읽은 DataFrame 형태 등급컷은 과목 매칭에 쓰지 않음
+        if grade_cutoff_data is not None and not isinstance(grade_cutoff_data, pd.DataFrame):
+            for subject, code in self.subject_codes.items():
+                code = str(code).strip()
+                if code not in index and subject in grade_cutoff_data:
+                    index[code] = subject
+        # 새 dict를 만든 뒤 통째로 교체하므로 조회 중인 쪽은 이전 인덱스를 그대로 사용
+        return MappingProxyType(index)
+    
+    @staticmethod
+    def _normalize_subject_code(subject_code) -> str:
+        """업로드된 과목코드 정리 (공백 제거, 5.0 -> 5, 7 -> 07)"""
+        subject_code_str = str(subject_code).strip()
+        if '.' in subject_code_str:
+            subject_code_str = subject_code_str.split('.')[0]
+        if len(subject_code_str) == 1:
+            subject_code_str = f"0{subject_code_str}"
+        return subject_code_str
             
     def process_all_data(self) -> Dict[str, Any]:
-        """모든 데이터 처리 및 통합"""
+        """
+        모든 데이터 처리 및 통합
+        
+        입력(과목 데이터, 학생명, 등급컷, 과목코드 ...)이 바뀌지 않았으면 이전 결과를 그대로 반환
+        (반환된 dict는 캐시와 공유되므로 수정하지 말 것)
+        """
+        processed = self._processed
+        if processed is not None and self._processed_version == self._data_version:
+            return processed
+        version = self._data_version
+        raw_version = self._raw_version
+        
         try:
             print("[처리] 전체 데이터 처리 시작...")
             
@@ -277,160 +750,20 @@ class DataProcessor:
             else:
                 print("[확인] 등급컷 데이터 확인 완료")
             
-            # 학생별 데이터 통합
-            print("[통합] 학생별 데이터 통합 시작...")
-            student_data = {}
-            processed_students = 0
-            skipped_students = 0
-            
-            for subject, df in self.subject_data.items():
-                print(f"[처리] {subject} 데이터 처리 중...")
-                
-                for idx, row in df.iterrows():
-                    try:
-                        # 수험번호로 학생 이름 찾기
-                        try:
-                            exam_number = str(row['수험번호']).strip()
-                            
-                            # 빈 수험번호 처리
-                            if not exam_number or exam_number == 'nan' or exam_number == 'None':
-                                print(f"[경고] 행 {idx}: 빈 수험번호 건너뜀 (과목: {subject})")
-                                skipped_students += 1
-                                continue
-                            
-                            # 학생명 파일에서 이름 찾기
-                            if exam_number not in self.student_names:
-                                print(f"[경고] 행 {idx}: 수험번호 '{exam_number}'에 해당하는 학생명을 찾을 수 없습니다 (과목: {subject})")
-                                skipped_students += 1
-                                continue
-                            
-                            student_name = self.student_names[exam_number]
-                            
-                            # 빈 이름, NaN, None 처리
-                            if not student_name or student_name == 'nan' or student_name == 'None':
-                                print(f"[경고] 행 {idx}: 빈 이름 건너뜀 (수험번호: {exam_number}, 과목: {subject})")
-                                skipped_students += 1
-                                continue
-                            
-                            # 특수문자나 이상한 문자 처리
-                            if len(student_name) > 20 or any(char in student_name for char in ['<', '>', '|', '?', '*']):
-                                print(f"[경고] 행 {idx}: 이상한 이름 형식 '{student_name}' 건너뜀 (과목: {subject})")
-                                skipped_students += 1
-                                continue
-                                
-                        except Exception as e:
-                            print(f"[경고] 행 {idx}: 수험번호/이름 처리 오류 (과목: {subject}): {str(e)}")
-                            import traceback
-                            traceback.print_exc()
-                            skipped_students += 1
-                            continue
-                        
-                        # 학생 ID 생성 (수험번호 사용)
-                        student_id = exam_number
-                        
-                        # 학생 데이터 초기화
-                        if student_id not in student_data:
-                            student_data[student_id] = {
-                                'name': student_name,
-                                'student_id': student_id,
-                                'subjects': {}
-                            }
-                        
-                        # 과목 정보 저장 (결시 처리 포함)
-                        try:
-                            # 총점 처리 (결시 및 오류 상황 대응)
-                            total_score = row['총점']
-                            try:
-                                if pd.isna(total_score) or total_score == '' or str(total_score).strip().lower() in ['결시', 'absent', '미응시', '불참', 'nan', 'none']:
-                                    total_score = 0
-                                    print(f"[결시] {student_name}: {subject} 결시 처리 (0점)")
-                                else:
-                                    total_score = float(total_score)
-                                    # 음수나 비정상적인 점수 처리
-                                    if total_score < 0:
-                                        total_score = 0
-                                        print(f"[경고] {student_name}: {subject} 음수 점수 0으로 처리")
-                                    elif total_score > 100:
-                                        print(f"[경고] {student_name}: {subject} 100점 초과 점수 {total_score}")
-                            except (ValueError, TypeError) as e:
-                                print(f"[경고] {student_name}: {subject} 총점 변환 오류 '{total_score}' -> 0점 처리")
-                                total_score = 0
-                            
-                            # 정답수 처리 (결시 및 오류 상황 대응)
-                            correct_count = row['정답수']
-                            try:
-                                if pd.isna(correct_count) or correct_count == '' or str(correct_count).strip().lower() in ['결시', 'absent', '미응시', '불참', 'nan', 'none']:
-                                    correct_count = 0
-                                else:
-                                    correct_count = float(correct_count)
-                                    # 음수나 비정상적인 정답수 처리
-                                    if correct_count < 0:
-                                        correct_count = 0
-                                    elif correct_count > 50:  # 일반적인 최대 문제 수
-                                        print(f"[경고] {student_name}: {subject} 비정상적인 정답수 {correct_count}")
-                            except (ValueError, TypeError) as e:
-                                print(f"[경고] {student_name}: {subject} 정답수 변환 오류 '{correct_count}' -> 0개 처리")
-                                correct_count = 0
-                            
-                            subject_info = {
-                                'subject_name': str(row['선택과목']).strip() if pd.notna(row['선택과목']) else '',
-                                'subject_code': str(row['선택과목코드']).strip() if pd.notna(row['선택과목코드']) else '',
-                                'total_score': total_score,
-                                'correct_count': correct_count,
-                                'wrong_answers': self._parse_wrong_answers(row['오답번호'])
-                            }
-                        except Exception as e:
-                            print(f"[경고] 과목 정보 저장 오류 (학생: {student_name}, 과목: {subject}): {str(e)}")
-                            # 기본값으로 설정
-                            subject_info = {
-                                'subject_name': '',
-                                'subject_code': '',
-                                'total_score': 0,
-                                'correct_count': 0,
-                                'wrong_answers': []
-                            }
-                        
-                        student_data[student_id]['subjects'][subject] = subject_info
-                        processed_students += 1
-                        
-                    except Exception as e:
-                        print(f"[오류] 행 {idx} 처리 오류 (학생: {student_name if 'student_name' in locals() else 'Unknown'}, 과목: {subject}): {str(e)}")
-                        print(f"[오류] 오류 타입: {type(e).__name__}")
-                        print(f"[오류] 오류 상세: {str(e)}")
-                        import traceback
-                        print(f"[오류] 스택 트레이스:")
-                        traceback.print_exc()
-                        skipped_students += 1
-                        continue
-            
-            print(f"[통합] 데이터 통합 완료: {processed_students}개 처리, {skipped_students}개 건너뜀")
-            
-            if not student_data:
-                raise Exception("[오류] 처리된 학생 데이터가 없습니다. 모든 데이터가 유효하지 않거나 오류가 발생했습니다.")
-            
-            # 등급 및 표점 계산
-            print("[계산] 등급 및 표점 계산 시작...")
-            calculation_errors = 0
-            
-            for student_id, student_info in student_data.items():
-                for subject, subject_info in student_info['subjects'].items():
-                    try:
-                        grade_info = self._calculate_grade_and_score(subject_info)
-                        subject_info.update(grade_info)
-                    except Exception as e:
-                        print(f"[오류] 등급 계산 오류 (학생: {student_info['name']}, 과목: {subject}): {str(e)}")
-                        calculation_errors += 1
-                        # 기본값 설정
-                        subject_info.update({
-                            'grade': 9,
-                            'standard_score': 0,
-                            'percentile': 0
-                        })
-            
-            if calculation_errors > 0:
-                print(f"[경고] {calculation_errors}개의 등급 계산에서 오류가 발생했습니다. 기본값으로 설정되었습니다.")
+            # 통합 표가 그대로면 (등급컷/표점만 바뀐 경우) 바뀐 과목코드의 등급만 다시 계산
+            previous = self._table_result
+            if previous is not None and self._table is not None and self._table_version == raw_version:
+                student_data = self._regrade(self._table, previous)
+            else:
+                student_data = self._process_full(raw_version)
             
             print(f"[완료] 전체 데이터 처리 완료: {len(student_data)}명의 학생")
+            
+            # 계산 중에 입력이 바뀌었으면 캐시하지 않음
+            if version == self._data_version:
+                self._processed = student_data
+                self._processed_version = version
+                self._ids_by_name = None
             return student_data
             
         except Exception as e:
@@ -438,11 +771,559 @@ class DataProcessor:
             error_details = traceback.format_exc()
             raise Exception(f"[오류] 데이터 처리 중 오류 발생:\n{str(e)}\n\n상세 오류:\n{error_details}")
     
+    def _process_full(self, raw_version: int) -> Dict[str, Any]:
+        """통합 표 생성부터 등급 계산, 학생별 묶음까지 전체 처리"""
+        # 학생별 데이터 통합 (과목별 표를 한 번에 합친 뒤 학생별로 묶음)
+        print("[통합] 학생별 데이터 통합 시작...")
+        with span('merge') as merge_span:
+            table, skipped_students = self._build_student_table()
+            merge_span.items = len(table)
+        processed_students = len(table)
+        
+        print(f"[통합] 데이터 통합 완료: {processed_students}개 처리, {skipped_students}개 건너뜀")
+        
+        if table.empty:
+            raise Exception("[오류] 처리된 학생 데이터가 없습니다. 모든 데이터가 유효하지 않거나 오류가 발생했습니다.")
+        
+        # 등급 및 표점 계산 (과목코드별로 묶어 한 번에)
+        print("[계산] 등급 및 표점 계산 시작...")
+        with span('grade') as grade_span:
+            fingerprints = self._grade_fingerprints_for(table)
+            grades, standard_scores, percentiles = self.calculate_grades_batch(
+                table['subject_code'].to_numpy(dtype=object),
+                np.asarray(table['total_score'].tolist(), dtype=float)
+            )
+            table['grade'] = self._grade_values(grades)
+            table['standard_score'] = self._grade_values(standard_scores)
+            table['percentile'] = self._grade_values(percentiles)
+            
+            student_data = self._assemble_student_data(table)
+            grade_span.items = len(table)
+        
+        # 같은 학생의 같은 과목이 여러 행이면 결과에 쓰인 마지막 행만 다시 계산 대상
+        table['is_last'] = ~table.duplicated(['student_id', 'subject'], keep='last').to_numpy()
+        self._table = table
+        self._table_result = student_data
+        self._table_version = raw_version
+        self._grade_fingerprints = fingerprints
+        self.changed_student_ids = None
+        self._pending_changed_ids = []
+        return student_data
+    
+    def _grade_fingerprint(self, subject_code) -> str:
+        """과목코드 1개의 등급 계산에 쓰이는 입력(매칭 과목, 등급컷, 만점 표점, 등급별 표점)의 지문"""
+        subject = self._match_subject_code(subject_code)
+        if subject is None:
+            return ''
+        
+        def canonical(value):
+            # dict는 키 순서와 관계없이 같은 지문이 되도록 정렬
+            if isinstance(value, Mapping):
+                return sorted((repr(key), canonical(item)) for key, item in value.items())
+            return repr(value)
+        
+        grade_standard_scores = getattr(self, 'grade_standard_scores', None)
+        parts = (
+            subject,
+            canonical(self.grade_cutoff_data.get(subject)),
+            canonical(self.standard_scores.get(subject, 100)),
+            None if grade_standard_scores is None else canonical(grade_standard_scores.get(subject)),
+        )
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    
+    def _grade_fingerprints_for(self, table: pd.DataFrame) -> Dict[Any, str]:
+        return {code: self._grade_fingerprint(code) for code in pd.unique(table['subject_code'])}
+    
+    def _regrade(self, table: pd.DataFrame, previous: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        등급컷/표점이 바뀐 과목코드의 행만 등급/표점/백분위를 다시 계산하고,
+        값이 바뀐 학생만 새 dict로 바꾼 결과 반환 (나머지 학생은 이전 결과와 공유)
+        
+        결과가 바뀐 학생 수험번호는 changed_student_ids에 저장
+        """
+        fingerprints = self._grade_fingerprints_for(table)
+        stale = [code for code, fingerprint in fingerprints.items()
+                 if self._grade_fingerprints.get(code) != fingerprint]
+        if not stale:
+            print("[재계산] 등급 계산에 쓰이는 값이 바뀐 과목이 없습니다.")
+            self._grade_fingerprints = fingerprints
+            self.changed_student_ids = self._take_pending_changes([])
+            return previous
+        
+        with span('grade') as grade_span:
+            codes = table['subject_code'].to_numpy(dtype=object)
+            rows = np.flatnonzero(table['subject_code'].isin(stale).to_numpy())
+            grades, standard_scores, percentiles = self.calculate_grades_batch(
+                codes[rows], np.asarray(table['total_score'].iloc[rows].tolist(), dtype=float)
+            )
+            updates = {
+                'grade': self._grade_values(grades),
+                'standard_score': self._grade_values(standard_scores),
+                'percentile': self._grade_values(percentiles),
+            }
+            moved = np.zeros(len(rows), dtype=bool)
+            for column, values in updates.items():
+                moved |= table[column].to_numpy(dtype=object)[rows] != values
+            moved &= table['is_last'].to_numpy()[rows]
+            
+            # 값이 바뀐 학생만 복사해서 수정 (이전 결과를 받은 쪽에는 영향 없음)
+            student_data = dict(previous)
+            changed_ids = []
+            for position in np.flatnonzero(moved):
+                row = rows[position]
+                student_id = table['student_id'].iat[row]
+                student = student_data[student_id]
+                if student is previous[student_id]:
+                    student = student_data[student_id] = dict(student, subjects=dict(student['subjects']))
+                    changed_ids.append(student_id)
+                subject = table['subject'].iat[row]
+                student['subjects'][subject] = dict(
+                    student['subjects'][subject],
+                    grade=updates['grade'][position],
+                    standard_score=updates['standard_score'][position],
+                    percentile=updates['percentile'][position],
+                )
+            
+            for column, values in updates.items():
+                column_values = table[column].to_numpy(dtype=object).copy()
+                column_values[rows] = values
+                table[column] = column_values
+            self._table_result = student_data
+            self._grade_fingerprints = fingerprints
+            grade_span.items = len(rows)
+        
+        print(f"[재계산] 과목코드 {', '.join(map(str, stale))}: {len(rows)}개 행 다시 계산, "
+              f"결과가 바뀐 학생 {len(changed_ids)}명")
+        self.changed_student_ids = self._take_pending_changes(changed_ids)
+        return student_data
+    
+    def _take_pending_changes(self, changed_ids: List[str]) -> List[str]:
+        """update_subject_rows()로 쌓인 학생과 합친 목록 (쌓인 목록은 비움)"""
+        merged = list(dict.fromkeys(self._pending_changed_ids + changed_ids))
+        self._pending_changed_ids = []
+        return merged
+    
+    def get_student(self, student_id) -> Optional[Dict[str, Any]]:
+        """수험번호로 처리된 학생 데이터 조회 (없으면 None)"""
+        return self.process_all_data().get(str(student_id).strip())
+    
+    def find_students_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """이름으로 처리된 학생 데이터 조회 (동명이인은 모두, 수험번호 순)"""
+        student_data = self.process_all_data()
+        ids_by_name = self._ids_by_name
+        if ids_by_name is None or self._processed is not student_data:
+            ids_by_name = {}
+            for student_id, student in student_data.items():
+                ids_by_name.setdefault(student['name'], []).append(student_id)
+            if self._processed is student_data:
+                self._ids_by_name = ids_by_name
+        return [student_data[student_id] for student_id in ids_by_name.get(str(name).strip(), [])]
+    
+    def _is_valid_name(self, name) -> bool:
+        """성적표에 쓸 수 있는 학생 이름인지 확인"""
+        if not isinstance(name, str) or not name or name in ('nan', 'None'):
+            return False
+        return len(name) <= 20 and not any(char in name for char in self.INVALID_NAME_CHARS)
+    
+    def _coerce_score(self, value):
+        """점수 값 1개 변환 → (상태 코드, 점수)"""
+        if pd.isna(value) or value == '' or str(value).strip().lower() in self.ABSENT_TOKENS:
+            return self._SCORE_ABSENT, 0.0
+        try:
+            score = float(value)
+        except (ValueError, TypeError):
+            return self._SCORE_INVALID, 0.0
+        if score < 0:
+            return self._SCORE_NEGATIVE, 0.0
+        return self._SCORE_OK, score
+    
+    def _score_column(self, column: pd.Series):
+        """
+        총점/정답수 컬럼을 한 번에 변환
+        
+        Returns:
+            (상태 코드 배열, 점수 배열): 결시/변환 오류/음수는 점수 0
+        """
+        if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+            return self._score_array(column.to_numpy(dtype=float, na_value=np.nan))
+        
+        # 문자열이 섞인 컬럼: 서로 다른 값마다 한 번씩만 변환 (숫자 값은 배열로 한 번에)
+        codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        uniques = np.asarray(uniques, dtype=object)
+        is_number = np.array([isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+                              for value in uniques], dtype=bool)
+        unique_status = np.empty(len(uniques), dtype=np.int8)
+        unique_values = np.empty(len(uniques), dtype=float)
+        unique_status[is_number], unique_values[is_number] = self._score_array(uniques[is_number].astype(float))
+        others = np.flatnonzero(~is_number)
+        for i in others:
+            unique_status[i], unique_values[i] = self._coerce_score(uniques[i])
+        return unique_status[codes], unique_values[codes]
+    
+    def _score_array(self, values: np.ndarray):
+        """숫자 배열 변환: NaN은 결시, 음수는 0점"""
+        status = np.full(len(values), self._SCORE_OK, dtype=np.int8)
+        status[np.isnan(values)] = self._SCORE_ABSENT
+        status[values < 0] = self._SCORE_NEGATIVE
+        return status, np.where(status == self._SCORE_OK, values, 0.0)
+    
+    @staticmethod
+    def _text_column(column: pd.Series) -> List[str]:
+        """문자열 컬럼 정리 (빈 값은 '')"""
+        codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        missing = pd.isna(uniques)
+        cleaned = np.array(['' if is_na else str(value).strip() for value, is_na in zip(uniques, missing)], dtype=object)
+        return cleaned[codes].tolist()
+    
+    def _wrong_answers_column(self, column: pd.Series) -> List[List[int]]:
+        """
+        오답번호 컬럼 파싱 ("3, 7,12" → [3, 7, 12], 결시·빈 값은 [])
+        
+        모든 행을 쉼표로 이어 붙인 바이트 배열에서 번호(앞뒤 공백만 허용되는 숫자 조각)를 한 번에 찾고,
+        ASCII가 아닌 행(결시 등)만 _parse_wrong_answers로 한 줄씩 파싱
+        """
+        result = [[] for _ in range(len(column))]
+        rows = np.flatnonzero(column.notna().to_numpy())
+        texts = [str(value) for value in column.to_numpy(dtype=object)[rows]]
+        for i, text in enumerate(texts):
+            if not text.isascii():
+                result[rows[i]] = self._parse_wrong_answers(text)
+                texts[i] = ''
+        
+        buffer = np.frombuffer(','.join(texts).encode('ascii'), dtype=np.uint8)
+        if not len(buffer):
+            return result
+        
+        is_comma = buffer == ord(',')
+        is_digit = (buffer >= ord('0')) & (buffer <= ord('9'))
+        is_other = ~(is_comma | is_digit | np.isin(buffer, self._ASCII_WHITESPACE))
+        commas_before = np.concatenate(([0], np.cumsum(is_comma)))
+        piece = commas_before[:-1]  # 문자가 속한 조각 번호
+        n_pieces = int(commas_before[-1]) + 1
+        
+        # 조각별 숫자 위치: 숫자가 있고, 숫자가 연속이고(중간 공백 없음), 다른 문자가 없어야 번호
+        digit_pos = np.flatnonzero(is_digit)
+        if not len(digit_pos):
+            return result
+        pieces, first = np.unique(piece[digit_pos], return_index=True)
+        end = np.append(first[1:], len(digit_pos))
+        count = end - first
+        last_pos = digit_pos[end - 1]
+        valid = ((last_pos - digit_pos[first] + 1 == count)
+                 & (np.bincount(piece[is_other], minlength=n_pieces)[pieces] == 0))
+        if (count[valid] > 18).any():
+            # int64 범위를 넘는 번호는 한 줄씩 파싱
+            return [self._parse_wrong_answers(value) for value in column.tolist()]
+        
+        place = 10 ** (np.repeat(last_pos, count) - digit_pos)
+        numbers = np.add.reduceat((buffer[digit_pos] - ord('0')).astype(np.int64) * place, first)
+        
+        # 조각 → 행 (행 시작 위치 앞의 쉼표 수 = 그 행 첫 조각 번호)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        row_start = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        owner = np.searchsorted(commas_before[row_start], pieces[valid], side='right') - 1
+        
+        flat = numbers[valid].tolist()
+        start = 0
+        for row, stop in zip(rows.tolist(), np.cumsum(np.bincount(owner, minlength=len(rows))).tolist()):
+            if stop > start:
+                result[row] = flat[start:stop]
+            start = stop
+        return result
+    
+    def _merge_subject(self, subject: str, df: pd.DataFrame, valid_names: pd.Series):
+        """
+        과목 1개의 표를 학생명과 합쳐 과목 정보 컬럼으로 변환
+        
+        Returns:
+            (DataFrame, 건너뛴 행 수): 컬럼은 student_id, name, subject + 과목 정보
+        """
+        if '수험번호' not in df.columns:
+            print(f"[경고] {subject}: 수험번호 컬럼이 없어 {len(df)}개 행을 건너뜁니다.")
+            return None, len(df)
+        
+        exam_numbers = pd.Series(self._text_column(df['수험번호']), dtype=object)
+        empty = exam_numbers.isin(['', 'nan', 'None'])
+        known = exam_numbers.isin(list(self.student_names.keys()))
+        names = exam_numbers.map(valid_names)
+        valid = (~empty & names.notna()).to_numpy()
+        
+        skipped = len(df) - int(valid.sum())
+        if skipped:
+            unknown = int((~empty & ~known).sum())
+            invalid_name = skipped - int(empty.sum()) - unknown
+            print(f"[경고] {subject}: {skipped}개 행 건너뜀 "
+                  f"(빈 수험번호 {int(empty.sum())}, 학생명 없음 {unknown}, 잘못된 이름 {invalid_name})")
+        
+        rows = df[valid]
+        merged = pd.DataFrame({
+            'student_id': exam_numbers[valid].to_numpy(dtype=object),
+            'name': names[valid].to_numpy(dtype=object),
+        })
+        merged['subject'] = subject
+        
+        missing = [col for col in self.SUBJECT_INFO_COLUMNS if col not in rows.columns]
+        if missing:
+            print(f"[경고] {subject}: 컬럼 {missing}이(가) 없어 과목 정보를 기본값으로 설정합니다.")
+            merged['subject_name'] = ''
+            merged['subject_code'] = ''
+            merged['total_score'] = 0
+            merged['correct_count'] = 0
+            merged['wrong_answers'] = [[] for _ in range(len(merged))]
+            return merged, skipped
+        
+        # 총점/정답수: 결시·빈 값·변환 오류·음수는 0점 (정수 0), 나머지는 실수
+        score_status, scores = self._score_column(rows['총점'])
+        count_status, counts = self._score_column(rows['정답수'])
+        
+        absent = int((score_status == self._SCORE_ABSENT).sum())
+        if absent:
+            print(f"[결시] {subject}: {absent}명 결시 처리 (0점)")
+        invalid = int((score_status == self._SCORE_INVALID).sum())
+        if invalid:
+            print(f"[경고] {subject}: 총점 변환 오류 {invalid}건 -> 0점 처리")
+        negative = int((score_status == self._SCORE_NEGATIVE).sum())
+        if negative:
+            print(f"[경고] {subject}: 음수 점수 {negative}건 0으로 처리")
+        over = int((scores > 100).sum())
+        if over:
+            print(f"[경고] {subject}: 100점 초과 점수 {over}건")
+        invalid = int((count_status == self._SCORE_INVALID).sum())
+        if invalid:
+            print(f"[경고] {subject}: 정답수 변환 오류 {invalid}건 -> 0개 처리")
+        over = int((counts > 50).sum())
+        if over:
+            print(f"[경고] {subject}: 비정상적인 정답수 {over}건")
+        
+        merged['subject_name'] = self._text_column(rows['선택과목'])
+        merged['subject_code'] = self._text_column(rows['선택과목코드'])
+        merged['total_score'] = self._scores_to_objects(score_status, scores)
+        merged['correct_count'] = self._scores_to_objects(count_status, counts)
+        merged['wrong_answers'] = self._wrong_answers_column(rows['오답번호'])
+        return merged, skipped
+    
+    def _scores_to_objects(self, status: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """점수 배열 → 파이썬 값 (정상 점수는 float, 0점 처리된 값은 int 0)"""
+        objects = np.array(values.tolist(), dtype=object)
+        objects[status != self._SCORE_OK] = 0
+        return objects
+    
+    def _build_student_table(self):
+        """
+        모든 과목 데이터를 학생명과 합친 하나의 표 생성
+        
+        Returns:
+            (DataFrame, 건너뛴 행 수): 과목 순서 → 원래 행 순서로 정렬된 학생-과목 행
+        """
+        valid_names = self._valid_names()
+        
+        frames = []
+        skipped = 0
+        for subject, df in self.subject_data.items():
+            print(f"[처리] {subject} 데이터 처리 중...")
+            merged, subject_skipped = self._merge_subject(subject, df, valid_names)
+            skipped += subject_skipped
+            if merged is not None and len(merged):
+                frames.append(merged)
+        
+        if not frames:
+            return pd.DataFrame(columns=['student_id', 'name', 'subject', 'subject_name', 'subject_code',
+                                         'total_score', 'correct_count', 'wrong_answers']), skipped
+        return pd.concat(frames, ignore_index=True), skipped
+    
+    def _valid_names(self) -> pd.Series:
+        """수험번호 → 이름 (이름이 유효한 학생만)"""
+        return pd.Series(
+            {exam_number: name for exam_number, name in self.student_names.items() if self._is_valid_name(name)},
+            dtype=object,
+        )
+    
+    @staticmethod
+    def _assemble_student_data(table: pd.DataFrame) -> Dict[str, Any]:
+        """학생-과목 표 → {수험번호: {'name', 'student_id', 'subjects': {과목: 과목 정보}}}"""
+        student_data = {}
+        columns = zip(
+            table['student_id'].tolist(), table['name'].tolist(), table['subject'].tolist(),
+            table['subject_name'].tolist(), table['subject_code'].tolist(),
+            table['total_score'].tolist(), table['correct_count'].tolist(), table['wrong_answers'].tolist(),
+            table['grade'].tolist(), table['standard_score'].tolist(), table['percentile'].tolist(),
+        )
+        for (student_id, name, subject, subject_name, subject_code, total_score, correct_count, wrong_answers,
+             grade, standard_score, percentile) in columns:
+            student = student_data.get(student_id)
+            if student is None:
+                student = student_data[student_id] = {
+                    'name': name,
+                    'student_id': student_id,
+                    'subjects': {}
+                }
+            # 같은 학생의 같은 과목이 여러 행이면 마지막 행 사용
+            student['subjects'][subject] = {
+                'subject_name': subject_name,
+                'subject_code': subject_code,
+                'total_score': total_score,
+                'correct_count': correct_count,
+                'wrong_answers': wrong_answers,
+                'grade': grade,
+                'standard_score': standard_score,
+                'percentile': percentile
+            }
+        return student_data
+    
+    # ------------------------------------------------------------------
+    # 등급 / 표점 / 백분위 일괄 계산
+    # ------------------------------------------------------------------
+    PERCENTILE_BY_GRADE = {1: 95, 2: 85, 3: 75, 4: 65, 5: 55, 6: 45, 7: 35, 8: 25, 9: 15}
+    
+    def calculate_grades_batch(self, subject_codes, scores):
+        """
+        여러 학생-과목의 등급, 표준점수, 백분위를 한 번에 계산
+        
+        과목코드별로 묶어 등급컷 9개에 대해 np.searchsorted로 등급을 찾고,
+        등급별 표점 보간도 배열 연산으로 처리 (_calculate_grade_and_score와 같은 결과)
+        
+        Args:
+            subject_codes: 과목코드 배열 (선택과목코드 값)
+            scores: 원점수 배열
+            
+        Returns:
+            (grades, standard_scores, percentiles): float 배열, 값이 없으면(None) NaN
+        """
+        scores = np.asarray(scores, dtype=float)
+        codes = np.asarray(subject_codes, dtype=object)
+        grades = np.full(len(scores), np.nan)
+        standard_scores = np.full(len(scores), np.nan)
+        percentiles = np.full(len(scores), np.nan)
+        
+        # 0점(결시)은 과목과 관계없이 9등급, 표점/백분위 0
+        zero = scores == 0
+        grades[zero] = 9
+        standard_scores[zero] = 0
+        percentiles[zero] = 0
+        
+        rows = np.flatnonzero(~zero)
+        if not len(rows):
+            return grades, standard_scores, percentiles
+        
+        group_ids, unique_codes = pd.factorize(pd.Series(codes[rows], dtype=object), use_na_sentinel=False)
+        order = np.argsort(group_ids, kind='stable')
+        bounds = np.searchsorted(group_ids[order], np.arange(len(unique_codes) + 1))
+        
+        for group, subject_code in enumerate(unique_codes):
+            idx = rows[order[bounds[group]:bounds[group + 1]]]
+            matched_subject = self._match_subject_code(subject_code)
+            if matched_subject is None:
+                continue
+            try:
+                result = self._grade_arrays(matched_subject, scores[idx])
+            except Exception:
+                result = None
+            if result is None:
+                # 등급컷/표점에 숫자가 아닌 값이 있으면 기존 방식으로 한 건씩 계산
+                result = self._grade_scalar(subject_code, scores[idx])
+            grades[idx], standard_scores[idx], percentiles[idx] = result
+        
+        return grades, standard_scores, percentiles
+    
+    def _match_subject_code(self, subject_code):
+        """과목코드 → 등급컷이 있는 과목명 (없으면 None)"""
+        try:
+            if not (subject_code and self.grade_cutoff_data):
+                return None
+            return self.subject_code_index.get(self._normalize_subject_code(subject_code))
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _is_number(value) -> bool:
+        return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+    
+    def _grade_arrays(self, subject: str, scores: np.ndarray):
+        """
+        과목 1개의 등급/표점/백분위 배열 계산
+        
+        Returns:
+            (grades, standard_scores, percentiles) 또는 배열로 계산할 수 없는 값이 있으면 None
+        """
+        grade_cutoffs = self.grade_cutoff_data[subject]
+        cutoffs = [grade_cutoffs.get(grade, 0) for grade in range(1, 10)]
+        if not all(self._is_number(c) for c in cutoffs) or not np.isfinite(scores).all():
+            return None
+        cutoffs = np.asarray(cutoffs, dtype=float)
+        
+        # 등급: score >= 컷을 만족하는 첫 등급 (없으면 9등급)
+        if np.all(np.diff(cutoffs) <= 0):
+            # 컷이 내림차순이면 '컷 > 점수'인 등급 수 + 1
+            above = 9 - np.searchsorted(cutoffs[::-1], scores, side='right')
+            grades = np.minimum(above + 1, 9).astype(float)
+        else:
+            passed = scores[:, None] >= cutoffs[None, :]
+            grades = np.where(passed.any(axis=1), passed.argmax(axis=1) + 1, 9).astype(float)
+        
+        nan = np.full(len(scores), np.nan)
+        max_standard_score = self.standard_scores.get(subject, 100)
+        # 한국사와 영어는 표점과 백분위 없음
+        if self._is_number(max_standard_score) and max_standard_score == 0:
+            return grades, nan, nan.copy()
+        if not hasattr(self, 'grade_standard_scores'):
+            print(f"표준점수 계산 오류: 등급별 표점 데이터가 없습니다. ({subject})")
+            return grades, nan, nan.copy()
+        
+        grade_std_scores = self.grade_standard_scores[subject] if subject in self.grade_standard_scores else None
+        standard = np.empty(len(scores))
+        for grade in range(1, 10):
+            mask = grades == grade
+            if not mask.any():
+                continue
+            if grade_std_scores is None or grade not in grade_std_scores:
+                # 기본 계산 (등급별 표점이 없는 경우)
+                if not self._is_number(max_standard_score):
+                    return None
+                standard[mask] = max_standard_score * (1 - (grade - 1) * 0.1)
+                continue
+            
+            base = grade_std_scores[grade]
+            if not self._is_number(base):
+                return None
+            lower_cutoff, upper_cutoff = (cutoffs[grade - 2], cutoffs[grade - 1]) if grade > 1 else (0, 0)
+            if grade > 1 and (grade - 1) in grade_std_scores and upper_cutoff > lower_cutoff:
+                # 등급 내에서 선형 보간
+                lower_std_score = grade_std_scores[grade - 1]
+                if not self._is_number(lower_std_score):
+                    return None
+                ratio = np.clip((scores[mask] - upper_cutoff) / (lower_cutoff - upper_cutoff), 0, 1)
+                standard[mask] = base + (lower_std_score - base) * ratio
+            else:
+                standard[mask] = base
+        
+        standard = np.trunc(standard)
+        percentiles = np.array([self.PERCENTILE_BY_GRADE[g] for g in range(1, 10)], dtype=float)[grades.astype(int) - 1]
+        # 표점이 NaN/무한대면 기존 계산과 같이 표점·백분위 모두 없음
+        invalid = ~np.isfinite(standard)
+        standard[invalid] = np.nan
+        percentiles[invalid] = np.nan
+        return grades, standard, percentiles
+    
+    def _grade_scalar(self, subject_code, scores: np.ndarray):
+        """한 건씩 계산 (_calculate_grade_and_score 사용)"""
+        results = [self._calculate_grade_and_score({'total_score': float(score), 'subject_code': subject_code})
+                   for score in scores]
+        return tuple(
+            np.array([np.nan if r[key] is None else r[key] for r in results], dtype=float)
+            for key in ('grade', 'standard_score', 'percentile')
+        )
+    
+    @staticmethod
+    def _grade_values(values: np.ndarray) -> np.ndarray:
+        """계산 결과 배열 → 파이썬 값 배열 (정수, 없으면 None)"""
+        return np.array([None if value != value else int(value) for value in values.tolist()], dtype=object)
+    
     def _set_default_grade_cutoffs(self):
         """기본 등급컷 설정"""
         self.grade_cutoff_data = {}
         self.standard_scores = {}
         self.grade_standard_scores = {}
+        self.invalidate_subject_code_index()
         
         # 모든 과목에 대한 기본 등급컷 설정 (기본 과목 + 선택과목)
         all_subjects = [
@@ -545,25 +1426,7 @@ class DataProcessor:
                 }
             
             # 과목코드로만 매칭 (과목명은 무시)
-            matched_subject = None
-            
-            if subject_code and self.grade_cutoff_data:
-                for key, code in self.subject_codes.items():
-                    # 숫자와 문자열 모두 지원
-                    subject_code_str = str(subject_code).strip()
-                    code_str = str(code).strip()
-                    
-                    # 소수점 제거 (5.0 -> 5)
-                    if '.' in subject_code_str:
-                        subject_code_str = subject_code_str.split('.')[0]
-                    
-                    # 한 자리 숫자를 두 자리로 변환 (7 -> 07)
-                    if len(subject_code_str) == 1:
-                        subject_code_str = f"0{subject_code_str}"
-                    
-                    if subject_code_str == code_str and key in self.grade_cutoff_data:
-                        matched_subject = key
-                        break
+            matched_subject = self._match_subject_code(subject_code)
             
             # 등급컷 데이터가 있으면 계산
             if matched_subject and self.grade_cutoff_data:
@@ -0,0 +1,120 @@
+"""
+업로드 데이터 캐시
+원본 파일(CSV/XLSX) 내용의 해시를 키로 정리된 DataFrame을 열 단위 파일로 보관하고,
+같은 파일을 다시 읽을 때는 파싱 대신 메모리 맵으로 바로 읽음
+"""
+
+import os
+import hashlib
+import pathlib
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from disk_cache import DiskCache, SharedCache
+from frame_store import FRAME_EXTS, read_frame, write_frame
+
+
+BASE_DIR = pathlib.Path(__file__).parent
+DEFAULT_CACHE_DIR = BASE_DIR / "cache" / "datasets"
+DEFAULT_MAX_BYTES = int(float(os.environ.get('DATASET_CACHE_MAX_MB', '1024')) * 1024 * 1024)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class DatasetCache(DiskCache):
+    """
+    해시 키 → 정리된 DataFrame (.arrow, pyarrow가 없으면 .pkl)
+
+    - 키는 (원본 파일 내용의 SHA-256 + 데이터 종류 + 정리 규칙 버전)의 SHA-256
+    - 적중/저장할 때 파일 수정 시각을 갱신하고, 용량을 넘으면 오래 안 쓴 것부터 삭제 (LRU, DiskCache)
+    """
+
+    EXTS = FRAME_EXTS
+    LOG_TAG = "데이터캐시"
+
+    def __init__(self, cache_dir: pathlib.Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+    # ------------------------------------------------------------------
+    # 키 계산
+    # ------------------------------------------------------------------
+    @staticmethod
+    def make_key(file_path: str, kind: str, version="") -> str:
+        """원본 파일 내용 + 데이터 종류(과목/학생명 등) + 정리 규칙 버전의 SHA-256"""
+        return DatasetCache.derive_key(DatasetCache.content_hash(file_path), kind, version)
+
+    @staticmethod
+    def content_hash(file_path: str) -> str:
+        """원본 파일 내용만의 SHA-256 (업로드 저장소의 파일 이름과 같은 값)"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            while True:
+                data = f.read(HASH_CHUNK_SIZE)
+                if not data:
+                    break
+                digest.update(data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def derive_key(content_hash: str, kind: str, version="") -> str:
+        """이미 계산한 내용 해시로 캐시 키 계산 (파일을 다시 읽지 않음)"""
+        return hashlib.sha256(f"{kind}\0{version}\0{content_hash}".encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------------
+    def _find(self, key: str) -> Optional[pathlib.Path]:
+        base = self._path_base(key)
+        for ext in FRAME_EXTS:
+            path = base.with_name(base.name + ext)
+            if path.exists():
+                return path
+        return None
+
+    def contains(self, key: str) -> bool:
+        """캐시에 있는지만 확인 (읽지 않음)"""
+        return self._find(key) is not None
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """캐시에 있으면 DataFrame 반환 (없거나 읽을 수 없으면 None)"""
+        path = self._find(key)
+        if path is None:
+            self.misses += 1
+            return None
+        try:
+            df = read_frame(str(path))
+            self._touch(path)
+        except FileNotFoundError:
+            # 다른 프로세스가 방금 삭제한 경우
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"[데이터캐시] 캐시 파일 읽기 실패, 삭제합니다: {str(e)}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame):
+        """정리된 DataFrame 저장 (임시 파일에 쓴 뒤 교체 → 다른 프로세스는 완성된 파일만 봄)"""
+        existing = self._find(key)
+        if existing is not None:
+            self._touch(existing)
+            return
+        base = self._path_base(key)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        tmp_base = str(base.parent / f"{key}.{os.getpid()}-{threading.get_ident()}.tmp")
+        tmp_path = write_frame(df, tmp_base, memory_map=True)
+        path = base.with_name(base.name + os.path.splitext(tmp_path)[1])
+        self._install(tmp_path, path)
+
+
+_shared = SharedCache('DATASET_CACHE_ENABLED',
+                      lambda: DatasetCache(pathlib.Path(os.environ.get('DATASET_CACHE_DIR', DEFAULT_CACHE_DIR))))
+
+
+def get_dataset_cache() -> Optional[DatasetCache]:
+    """프로세스 공유 데이터 캐시 (DATASET_CACHE_ENABLED=0이면 None)"""
+    return _shared.get()
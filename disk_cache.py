@@ -0,0 +1,139 @@
+"""
+디스크 캐시 공통 부분
+해시 키 → 파일 1개 (cache_dir/ab/<키><확장자>) 형태의 캐시가 함께 쓰는
+용량 계산, LRU 정리, 전체 삭제, 프로세스 공유 인스턴스
+"""
+
+import os
+import shutil
+import pathlib
+import threading
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+
+class DiskCache:
+    """
+    해시 키 → 파일 캐시의 기본 클래스 (PDFCache, DatasetCache)
+
+    - 하위 클래스는 EXTS(캐시 파일 확장자)와 LOG_TAG(로그 태그)를 정하고
+      조회/저장에서 _touch()/_install()을 사용
+    - 적중/저장할 때 파일 수정 시각을 갱신하고, 용량을 넘으면 오래 안 쓴 것부터 삭제 (LRU)
+    """
+
+    EXTS: Tuple[str, ...] = ()
+    LOG_TAG = "캐시"
+
+    def __init__(self, cache_dir: pathlib.Path, max_bytes: int):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path_base(self, key: str) -> pathlib.Path:
+        """키의 파일 경로 (확장자 제외, 키 앞 2글자로 폴더 분산)"""
+        return self.cache_dir / key[:2] / key
+
+    @staticmethod
+    def _touch(path: pathlib.Path):
+        """사용 시각 갱신 (LRU 정리 순서)"""
+        os.utime(path)
+
+    def _install(self, tmp_path: str, path: pathlib.Path):
+        """
+        다 쓴 임시 파일을 캐시 파일로 교체 (다른 프로세스는 완성된 파일만 봄)
+
+        교체에 실패하면 임시 파일을 지우고 예외를 그대로 던지고,
+        성공하면 용량을 더해 한도를 넘었을 때 정리
+        """
+        try:
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        size = path.stat().st_size
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            over = self._total_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    # ------------------------------------------------------------------
+    # 용량 관리
+    # ------------------------------------------------------------------
+    def _entries(self) -> List[Tuple[float, int, pathlib.Path]]:
+        """캐시 파일 목록 (수정 시각, 크기, 경로)"""
+        if not self.cache_dir.exists():
+            return []
+        entries = []
+        for path in self.cache_dir.glob("*/*"):
+            if path.suffix not in self.EXTS:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target_ratio: float = 0.9):
+        """용량 초과 시 오래 사용하지 않은 파일부터 삭제 (max_bytes × target_ratio까지)"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * target_ratio)
+            removed = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                    removed += 1
+                except FileNotFoundError:
+                    total -= size
+            self._total_bytes = total
+        if removed:
+            print(f"[{self.LOG_TAG}] {removed}개 파일 정리 (현재 {total / 1024 / 1024:.1f}MB)")
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self._total_bytes = 0
+
+
+CacheT = TypeVar('CacheT', bound=DiskCache)
+
+
+class SharedCache(Generic[CacheT]):
+    """프로세스 공유 캐시 인스턴스 (처음 쓸 때 생성, 환경 변수로 끌 수 있음)"""
+
+    def __init__(self, enabled_env: str, factory: Callable[[], CacheT]):
+        """
+        Args:
+            enabled_env: 0/false/no이면 캐시를 쓰지 않는 환경 변수 이름
+            factory: 캐시 생성 함수 (환경 변수에서 폴더 등을 읽음)
+        """
+        self.enabled_env = enabled_env
+        self.factory = factory
+        self._cache: Optional[CacheT] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[CacheT]:
+        if os.environ.get(self.enabled_env, '1').lower() in ('0', 'false', 'no'):
+            return None
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    self._cache = self.factory()
+        return self._cache
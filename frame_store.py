@@ -0,0 +1,71 @@
+"""
+DataFrame 디스크 저장
+pyarrow가 있으면 열 단위 Parquet(압축) 또는 Arrow IPC(무압축, 메모리 맵 읽기)로,
+없거나 저장할 수 없는 컬럼이 있으면 pickle로 저장
+"""
+
+import os
+import pandas as pd
+
+
+PARQUET_EXT = ".parquet"
+ARROW_EXT = ".arrow"
+PICKLE_EXT = ".pkl"
+FRAME_EXTS = (ARROW_EXT, PARQUET_EXT, PICKLE_EXT)
+
+
+def columnar_available() -> bool:
+    """Parquet 저장 가능 여부 (pyarrow 설치 여부)"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def write_frame(df: pd.DataFrame, path_base: str, memory_map: bool = False) -> str:
+    """
+    DataFrame 저장
+
+    Args:
+        df: 저장할 DataFrame
+        path_base: 확장자 없는 저장 경로
+        memory_map: True면 압축 없는 Arrow IPC로 저장 (읽을 때 메모리 맵, 파일은 더 큼)
+
+    Returns:
+        str: 실제 저장된 파일 경로 (.parquet, .arrow 또는 .pkl)
+    """
+    if columnar_available():
+        path = path_base + (ARROW_EXT if memory_map else PARQUET_EXT)
+        try:
+            if memory_map:
+                import pyarrow as pa
+                import pyarrow.feather as feather
+                feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path,
+                                      compression='uncompressed')
+            else:
+                df.to_parquet(path, compression='zstd')
+            return path
+        except Exception as e:
+            # 숫자/문자가 섞인 object 컬럼 등 열 단위로 표현할 수 없는 경우
+            print(f"[저장] {os.path.splitext(path)[1]} 저장 실패, pickle로 저장합니다: {str(e)}")
+            if os.path.exists(path):
+                os.remove(path)
+    path = path_base + PICKLE_EXT
+    df.to_pickle(path)
+    return path
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """write_frame()으로 저장한 DataFrame 읽기"""
+    if path.endswith(ARROW_EXT):
+        import pyarrow.feather as feather
+        return feather.read_table(path, memory_map=True).to_pandas()
+    if path.endswith(PARQUET_EXT):
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """DataFrame 메모리 사용량 (문자열 포함)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
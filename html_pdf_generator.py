@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Callable
 import webbrowser
 import tempfile
 import html
@@ -9,7 +9,14 @@ from playwright.sync_api import sync_playwright
 
 class HTMLPDFGenerator:
     def __init__(self):
-        pass
+        self._jinja_generator = None
+    
+    def _get_jinja_generator(self):
+        """Jinja2 기반 PDF 생성기 (한 번 만들어 재사용)"""
+        if self._jinja_generator is None:
+            from jinja_pdf_generator import JinjaPDFGenerator
+            self._jinja_generator = JinjaPDFGenerator()
+        return self._jinja_generator
         
     def _sanitize_filename(self, filename: str) -> str:
         """파일명에서 특수문자 제거 및 안전하게 처리"""
@@ -31,9 +38,8 @@ class HTMLPDFGenerator:
     def generate_html_based_pdf(self, student_data: Dict[str, Any], output_dir: str, pdf_title: str = "학생 성적표", save_html: bool = False):
         """Jinja2 템플릿 + Playwright 헤드리스 PDF 생성"""
         try:
-            # 새로운 Jinja2 기반 PDF 생성기 사용
-            from jinja_pdf_generator import JinjaPDFGenerator
-            jinja_generator = JinjaPDFGenerator()
+            # Jinja2 기반 PDF 생성기 사용
+            jinja_generator = self._get_jinja_generator()
             jinja_generator.generate_pdf(student_data, output_dir, pdf_title, save_html)
             
         except Exception as e:
@@ -41,6 +47,36 @@ class HTMLPDFGenerator:
             print("기존 HTML 방식으로 폴백합니다.")
             self._create_html_fallback(student_data, output_dir, pdf_title, save_html)
             
+    def generate_html_based_pdfs(self, students: List[Dict[str, Any]], output_dir: str, pdf_title: str = "학생 성적표",
+                                 save_html: bool = False, concurrency: int = None,
+                                 on_result: Callable[[Dict[str, Any]], None] = None,
+                                 should_cancel: Callable[[], bool] = None,
+                                 wait_if_paused: Callable[[], None] = None) -> List[Dict[str, Any]]:
+        """여러 학생 PDF 동시 생성 (실패한 학생은 HTML 파일로 폴백)"""
+        jinja_generator = self._get_jinja_generator()
+        students_by_id = {student['student_id']: student for student in students}
+        
+        def _handle(result):
+            if not result['success']:
+                print(f"Jinja2 PDF 생성 실패: {result['error']}")
+                print("기존 HTML 방식으로 폴백합니다.")
+                self._create_html_fallback(students_by_id[result['key']], output_dir, pdf_title, save_html)
+            if on_result is not None:
+                on_result(result)
+        
+        return jinja_generator.generate_pdfs(students, output_dir, pdf_title, save_html,
+                                             concurrency=concurrency, on_result=_handle,
+                                             should_cancel=should_cancel, wait_if_paused=wait_if_paused)
+    
+    def generate_merged_pdf(self, students: List[Dict[str, Any]], output_dir: str, pdf_title: str = "학생 성적표",
+                            chunk_size: int = None, on_output: Callable[[Dict[str, Any]], None] = None,
+                            should_cancel: Callable[[], bool] = None,
+                            wait_if_paused: Callable[[], None] = None) -> List[Dict[str, Any]]:
+        """여러 학생 성적표를 하나의 PDF로 생성 (JinjaPDFGenerator.generate_merged_pdf 참고)"""
+        return self._get_jinja_generator().generate_merged_pdf(students, output_dir, pdf_title, chunk_size=chunk_size,
+                                                               on_output=on_output, should_cancel=should_cancel,
+                                                               wait_if_paused=wait_if_paused)
+    
     def _create_html_fallback(self, student_data: Dict[str, Any], output_dir: str, pdf_title: str, save_html: bool = False):
         """PDF 생성 실패 시 HTML 파일로 폴백"""
         try:
@@ -0,0 +1,303 @@
+"""
+과목 채점결과 파일 읽기 (대용량 파일용)
+- 파일 앞부분 몇 KB로 인코딩을 한 번만 판별
+- 필요한 컬럼만(usecols) 정해진 타입으로 청크 단위 읽기
+- 청크마다 바로 정리/검증 → 최대 메모리는 청크 몇 개 수준
+- 업로드 중인 스트림도 읽을 수 있음 (read_subject_stream, 받은 만큼씩 청크 단위로)
+"""
+
+import codecs
+import io
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+# 정리 규칙이 바뀌면 올림 (읽은 결과 캐시의 키에 포함)
+FORMAT_VERSION = 1
+# 인코딩 판별에 쓰는 앞부분 크기
+SNIFF_BYTES = 64 * 1024
+# 청크 1개의 행 수
+CHUNK_ROWS = 50_000
+# 판별 순서 (앞에서부터 시도, latin-1은 항상 성공)
+ENCODINGS = ('utf-8-sig', 'cp949', 'latin-1')
+
+# 필수 컬럼과 있으면 함께 읽는 컬럼
+REQUIRED_COLUMNS = ('수험번호', '과목코드', '총점', '만점', '정답수', '오답번호')
+OPTIONAL_COLUMNS = ('선택과목', '선택과목코드')
+# 숫자로 변환하는 컬럼 (변환 안 되는 값은 NaN)
+NUMERIC_COLUMNS = ('총점', '만점')
+# 읽을 때 바로 정하는 타입 (나머지 수험번호/총점/만점/정답수는 파서가 숫자로 읽고 청크마다 정리)
+READ_DTYPES = {'과목코드': 'category', '오답번호': str, '선택과목': str, '선택과목코드': str}
+
+
+class IngestStats:
+    """읽는 동안 모은 검증 결과 (청크별 합계)"""
+
+    def __init__(self):
+        self.rows = 0
+        self.dropped = 0
+        self.invalid: Dict[str, int] = {column: 0 for column in NUMERIC_COLUMNS}
+        self.chunks = 0
+
+
+def sniff_encoding(file_path: str, sample_size: int = SNIFF_BYTES) -> str:
+    """
+    파일 앞부분으로 인코딩 판별 (BOM → UTF-8 → CP949 → latin-1)
+
+    Args:
+        file_path: 파일 경로
+        sample_size: 읽을 앞부분 크기 (bytes)
+
+    Returns:
+        str: pandas/open에 넘길 인코딩 이름
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    return sniff_bytes(sample)
+
+
+def sniff_bytes(sample: bytes) -> str:
+    """앞부분 바이트로 인코딩 판별 (sniff_encoding과 같은 규칙)"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for encoding in ENCODINGS[:-1]:
+        # 잘린 마지막 글자는 무시 (final=False)
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+def _check_header(header: Sequence[str]):
+    """본문을 읽기 전에 헤더만으로 필수 컬럼 확인"""
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"필수 컬럼이 누락되었습니다.\n누락된 컬럼: {missing}\n사용 가능한 컬럼: {list(header)}")
+
+
+def _usecols(header: Sequence[str]) -> List[str]:
+    return [column for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if column in header]
+
+
+def _exam_numbers(column: pd.Series) -> pd.Series:
+    """수험번호: 모두 정수면 int64 (251008.0 → 251008), 아니면 문자열 그대로"""
+    if not pd.api.types.is_numeric_dtype(column.dtype):
+        column = column.astype(str).str.strip()
+    numbers = pd.to_numeric(column, errors='coerce')
+    values = numbers.to_numpy(dtype=float, na_value=np.nan)
+    if np.isnan(values).any() or (values != np.floor(values)).any() or (np.abs(values) >= 2 ** 63).any():
+        return column.astype(object)
+    return pd.Series(values.astype(np.int64), index=column.index)
+
+
+def _count_column(column: pd.Series) -> pd.Series:
+    """정답수: 모두 숫자면 float, 결시 등 문자가 섞이면 원래 값 (처리 단계에서 변환)"""
+    numbers = pd.to_numeric(column, errors='coerce')
+    if numbers.isna().sum() == column.isna().sum():
+        return numbers.astype(float)
+    return column.astype(object)
+
+
+def clean_chunk(chunk: pd.DataFrame, stats: IngestStats) -> pd.DataFrame:
+    """
+    청크 1개 정리/검증 (빈 행 제거, 숫자/코드 변환)
+
+    Args:
+        chunk: 읽은 청크 (숫자 컬럼은 파서가 판단한 타입, 문자 컬럼은 문자열)
+        stats: 검증 결과를 더할 통계
+
+    Returns:
+        pd.DataFrame: 정리된 청크
+    """
+    stats.chunks += 1
+    stats.rows += len(chunk)
+    kept = chunk.dropna(subset=['수험번호', '총점'])
+    stats.dropped += len(chunk) - len(kept)
+
+    columns = {}
+    for column in kept.columns:
+        values = kept[column]
+        if column == '수험번호':
+            values = _exam_numbers(values)
+        elif column in NUMERIC_COLUMNS:
+            values = pd.to_numeric(values, errors='coerce').astype(float)
+            stats.invalid[column] += int(values.isna().sum())
+        elif column == '정답수':
+            values = _count_column(values)
+        elif column == '과목코드' and values.dtype != 'category':
+            values = values.astype(str).astype('category')
+        columns[column] = values
+    return pd.DataFrame(columns, index=kept.index)
+
+
+def _iter_csv(file_path: str, encoding: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    header = pd.read_csv(file_path, encoding=encoding, nrows=0).columns.tolist()
+    yield from _read_csv_chunks(file_path, header, encoding, chunk_rows)
+
+
+def _read_csv_chunks(source, header: Sequence[str], encoding: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    _check_header(header)
+    usecols = _usecols(header)
+    dtype = {column: READ_DTYPES[column] for column in usecols if column in READ_DTYPES}
+    yield from pd.read_csv(source, encoding=encoding, usecols=usecols, dtype=dtype, chunksize=chunk_rows)
+
+
+class _PrefixedStream(io.RawIOBase):
+    """인코딩 판별에 쓴 앞부분을 먼저 돌려주고 나머지는 원래 스트림에서 읽음 (다시 읽지 않도록)"""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        self.prefix = memoryview(prefix)
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _iter_xlsx(file_path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else '' for value in next(rows, ())]
+        _check_header(header)
+        positions = [(header.index(column), column) for column in _usecols(header)]
+
+        def to_frame(batch):
+            # 문자 컬럼은 문자열로, 숫자 컬럼은 셀 값 그대로 (CSV와 같은 타입이 되도록)
+            columns = {}
+            for i, column in positions:
+                values = [row[i] for row in batch]
+                if column in READ_DTYPES:
+                    values = [None if value is None or value == '' else str(value) for value in values]
+                columns[column] = pd.Series(values, dtype=object if column in READ_DTYPES else None)
+            return pd.DataFrame(columns)
+
+        batch = []
+        for row in rows:
+            if len(row) < len(header):
+                row = tuple(row) + (None,) * (len(header) - len(row))
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield to_frame(batch)
+                batch = []
+        if batch:
+            yield to_frame(batch)
+    finally:
+        workbook.close()
+
+
+def read_subject_file(file_path: str, chunk_rows: Optional[int] = None,
+                      on_chunk: Optional[Callable[[pd.DataFrame], None]] = None):
+    """
+    채점결과 파일(.csv/.xlsx)을 청크 단위로 읽어 정리된 DataFrame 1개로 반환
+
+    Args:
+        file_path: 파일 경로
+        chunk_rows: 청크 1개의 행 수 (기본 CHUNK_ROWS)
+        on_chunk: 정리된 청크마다 호출 (추가 검증용, 예외를 던지면 중단)
+
+    Returns:
+        (pd.DataFrame, IngestStats): 과목코드는 category, 수험번호는 정수(가능하면), 총점/만점은 float
+    """
+    if file_path.endswith('.csv'):
+        encoding = sniff_encoding(file_path)
+        print(f"[읽기] 인코딩: {encoding}")
+    elif file_path.endswith('.xlsx'):
+        encoding = None
+    else:
+        raise ValueError(f"지원하지 않는 파일 형식입니다. 지원 형식: .csv, .xlsx, 현재: {file_path.split('.')[-1]}")
+
+    chunk_rows = chunk_rows or CHUNK_ROWS
+
+    def chunks_source(enc):
+        if enc is None:
+            return _iter_xlsx(file_path, chunk_rows)
+        return _iter_csv(file_path, enc, chunk_rows)
+
+    while True:
+        try:
+            chunks, stats = _collect_chunks(chunks_source(encoding), on_chunk)
+            break
+        except UnicodeDecodeError:
+            # 앞부분 이후에 다른 인코딩의 글자가 나온 경우에만 다음 인코딩으로 다시 읽음
+            if encoding is None or encoding == ENCODINGS[-1]:
+                raise
+            encoding = ENCODINGS[ENCODINGS.index(encoding) + 1]
+            print(f"[경고] 인코딩 판별 실패, {encoding}(으)로 다시 읽습니다.")
+    return _combine_chunks(chunks), stats
+
+
+def read_subject_stream(stream: BinaryIO, chunk_rows: Optional[int] = None,
+                        on_chunk: Optional[Callable[[pd.DataFrame], None]] = None):
+    """
+    받는 중인 CSV 스트림을 받은 만큼씩 청크 단위로 읽어 정리 (업로드와 동시에 읽기용)
+
+    스트림은 다시 읽을 수 없으므로 앞부분으로 판별한 인코딩이 중간에 틀리면
+    UnicodeDecodeError를 그대로 던짐 (호출하는 쪽에서 저장된 파일로 read_subject_file)
+
+    Args:
+        stream: read(n)이 n바이트가 모이거나 끝날 때까지 기다리는 바이너리 스트림
+        chunk_rows: 청크 1개의 행 수 (기본 CHUNK_ROWS)
+        on_chunk: 정리된 청크마다 호출 (추가 검증용, 예외를 던지면 중단)
+
+    Returns:
+        (pd.DataFrame, IngestStats): read_subject_file과 같은 형식
+    """
+    sample = stream.read(SNIFF_BYTES)
+    if not sample:
+        raise ValueError("파일이 비어있습니다.")
+    encoding = sniff_bytes(sample)
+    print(f"[읽기] 인코딩: {encoding}")
+    # 앞부분 끝에서 잘린 글자를 디코딩하지 않도록 완성된 줄까지만으로 헤더 확인
+    # (줄바꿈 바이트는 UTF-8/CP949 글자 중간에 나오지 않음)
+    lines = sample[:sample.rfind(b'\n') + 1] or sample
+    header = pd.read_csv(io.BytesIO(lines), encoding=encoding, nrows=0).columns.tolist()
+    source = io.BufferedReader(_PrefixedStream(sample, stream))
+    chunks, stats = _collect_chunks(_read_csv_chunks(source, header, encoding, chunk_rows or CHUNK_ROWS), on_chunk)
+    return _combine_chunks(chunks), stats
+
+
+def _collect_chunks(source: Iterable[pd.DataFrame], on_chunk: Optional[Callable[[pd.DataFrame], None]]):
+    """읽은 청크를 하나씩 정리/검증해 모음"""
+    stats = IngestStats()
+    chunks: List[pd.DataFrame] = []
+    for chunk in source:
+        cleaned = clean_chunk(chunk, stats)
+        if on_chunk is not None:
+            on_chunk(cleaned)
+        chunks.append(cleaned)
+    return chunks, stats
+
+
+def _combine_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """정리된 청크들을 DataFrame 1개로 연결"""
+    if not chunks:
+        return pd.DataFrame(columns=list(REQUIRED_COLUMNS))
+
+    # 청크마다 범주가 다르므로 합친 범주로 맞춘 뒤 연결
+    codes = union_categoricals([chunk['과목코드'] for chunk in chunks], ignore_order=True).categories
+    for chunk in chunks:
+        chunk['과목코드'] = chunk['과목코드'].cat.set_categories(codes)
+    df = pd.concat(chunks, ignore_index=True)
+    chunks.clear()
+    # 숫자 청크와 문자 청크가 섞인 컬럼은 모두 문자열로 통일 (열 단위 저장이 가능하도록)
+    for column in ('수험번호', '정답수'):
+        if column in df.columns and df[column].dtype == object:
+            df[column] = df[column].map(lambda value: value if isinstance(value, str) or pd.isna(value) else str(value))
+    return df
@@ -0,0 +1,383 @@
+"""
+문항 분석 통계
+학생별 오답번호 목록(DataProcessor 결과) 또는 OMR 응답 행렬로부터
+문항별 오답률, 선택지 분포, 변별도, 점수 분포를 계산하고
+오답분포 CSV / 문항분석 CSV / 통계리포트 이미지를 한 번에 저장
+"""
+
+import os
+import datetime
+import itertools
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+
+# 변별도 계산 시 상위/하위 집단 비율 (Kelley 27%)
+DISCRIMINATION_GROUP_RATIO = 0.27
+# 선택지 분포에서 객관식으로 보는 최대 선택지 번호
+MAX_OPTION = 5
+
+
+class ItemAnalysis:
+    """
+    (학생 수 × 문항 수) 오답 행렬 기반 문항 통계
+
+    - 모든 집계는 열 단위 합계 / bincount로 계산 (학생별 Python 반복 없음)
+    - 응답 행렬이 있으면 선택지 분포도 계산
+    """
+
+    def __init__(self, wrong: np.ndarray, scores: np.ndarray, item_numbers: np.ndarray,
+                 responses: Optional[np.ndarray] = None, max_score: Optional[float] = None,
+                 student_ids: Optional[np.ndarray] = None, subject: str = ''):
+        """
+        Args:
+            wrong: 오답 여부 행렬 (학생 수 × 문항 수, bool)
+            scores: 학생별 점수
+            item_numbers: 열별 문항 번호
+            responses: 응답 행렬 (빈 응답 NaN), 선택지 분포 계산용
+            max_score: 만점 (점수 분포 구간 계산용, 없으면 최고 점수 기준)
+            student_ids: 수험번호 (최고/최저 점수 표시용)
+            subject: 과목 이름 (리포트 제목용)
+        """
+        self.wrong = np.asarray(wrong, dtype=bool)
+        self.scores = np.asarray(scores, dtype=float)
+        self.item_numbers = np.asarray(item_numbers, dtype=np.int64)
+        self.responses = responses
+        self.max_score = max_score
+        self.student_ids = student_ids
+        self.subject = subject
+
+    # ------------------------------------------------------------------
+    # 생성
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_wrong_answers(cls, wrong_answers: Sequence[Iterable[int]], scores: Sequence[float] = None,
+                           n_items: Optional[int] = None, **kwargs) -> 'ItemAnalysis':
+        """
+        학생별 오답번호 목록으로 생성
+
+        Args:
+            wrong_answers: 학생별 오답 문항 번호 목록 (예: [[4, 12], [], ...])
+            scores: 학생별 점수 (없으면 정답 수)
+            n_items: 문항 수 (없으면 오답 번호 최댓값)
+        """
+        n = len(wrong_answers)
+        lengths = np.fromiter(map(len, wrong_answers), dtype=np.int64, count=n)
+        flat = np.fromiter(itertools.chain.from_iterable(wrong_answers), dtype=np.int64, count=int(lengths.sum()))
+        rows = np.repeat(np.arange(n), lengths)
+
+        if n_items is None:
+            n_items = int(flat.max()) if len(flat) else 0
+        in_range = (flat >= 1) & (flat <= n_items)
+        wrong = np.zeros((n, n_items), dtype=bool)
+        wrong[rows[in_range], flat[in_range] - 1] = True
+
+        if scores is None:
+            scores = n_items - wrong.sum(axis=1)
+        return cls(wrong, np.asarray(scores, dtype=float), np.arange(1, n_items + 1), **kwargs)
+
+    @classmethod
+    def from_student_data(cls, student_data: Dict[str, Any], subject: str,
+                          subject_code: Optional[str] = None, n_items: Optional[int] = None) -> 'ItemAnalysis':
+        """
+        DataProcessor.process_all_data() 결과에서 과목 하나의 통계 생성
+
+        Args:
+            student_data: process_all_data() 결과
+            subject: 과목 이름 (예: '국어')
+            subject_code: 지정하면 해당 선택과목코드 학생만 (선택과목별 문항이 다른 경우)
+            n_items: 문항 수
+        """
+        infos = [
+            (student_id, student['subjects'][subject])
+            for student_id, student in student_data.items()
+            if subject in student.get('subjects', {})
+        ]
+        if subject_code is not None:
+            infos = [(sid, info) for sid, info in infos if str(info.get('subject_code')) == str(subject_code)]
+
+        scores = np.array([info.get('total_score') or 0 for _, info in infos], dtype=float)
+        wrong_answers = [info.get('wrong_answers') or [] for _, info in infos]
+        student_ids = np.array([sid for sid, _ in infos], dtype=object)
+        return cls.from_wrong_answers(wrong_answers, scores, n_items, student_ids=student_ids, subject=subject)
+
+    @classmethod
+    def from_responses(cls, responses: np.ndarray, answers: np.ndarray, item_numbers: np.ndarray,
+                       points: Optional[np.ndarray] = None, correct: Optional[np.ndarray] = None,
+                       **kwargs) -> 'ItemAnalysis':
+        """
+        OMR 응답 행렬로 생성
+
+        Args:
+            responses: 응답 행렬 (학생 수 × 문항 수, 빈 응답 NaN)
+            answers: 정답 (문항 수) 또는 학생별 정답 행렬 (학생 수 × 문항 수), 정답이 NaN인 문항은 채점 제외
+            item_numbers: 열별 문항 번호
+            points: 배점 (문항 수 또는 학생 수 × 문항 수, 없으면 정답 수를 점수로 사용)
+            correct: 정답 여부 행렬 (복수정답을 반영한 경우 등, 없으면 응답 == 정답)
+        """
+        responses = np.asarray(responses, dtype=float)
+        if correct is None:
+            correct = responses == answers
+        wrong = ~correct & ~np.isnan(answers)
+        scores = (correct * points).sum(axis=1) if points is not None else correct.sum(axis=1)
+        return cls(wrong, scores, item_numbers, responses=responses, **kwargs)
+
+    @classmethod
+    def from_omr(cls, answer_key, df: pd.DataFrame, subject: str = '', subject_code: Optional[str] = None,
+                 elective: Optional[int] = None) -> 'ItemAnalysis':
+        """
+        OMR 응답표(DataFrame)와 정답표(omr_scorer.AnswerKey)로 생성
+
+        Args:
+            subject_code: 지정하면 해당 과목코드 학생만
+            elective: 탐구 2과목 응답표에서 분석할 과목 (1 또는 2)
+        """
+        from omr_scorer import OMRScorer
+
+        student_ids, codes, responses, item_numbers = OMRScorer(answer_key).response_arrays(df, elective)
+        if subject_code is not None:
+            selected = codes == str(subject_code)
+            student_ids, codes, responses = student_ids[selected], codes[selected], responses[selected]
+        scored = np.isin(codes, answer_key.codes)
+        student_ids, codes, responses = student_ids[scored], codes[scored], responses[scored]
+
+        answers, points = answer_key.answer_matrix(codes, item_numbers)
+        # 복수정답 문항은 인정 정답 중 하나면 정답 (OMRScorer 채점과 같게)
+        responses = np.asarray(responses, dtype=float)
+        correct = responses == answers
+        code_series = pd.Series(codes, dtype=object)
+        for code, rows in code_series.groupby(code_series, sort=False).indices.items():
+            for column, accepted in answer_key.aligned_alternatives(code, item_numbers).items():
+                correct[rows, column] = np.isin(responses[rows, column], accepted)
+        max_score = max((answer_key.max_score(code) for code in set(codes)), default=None)
+        return cls.from_responses(responses, answers, item_numbers, points, correct=correct,
+                                  max_score=max_score, student_ids=student_ids, subject=subject)
+
+    # ------------------------------------------------------------------
+    # 통계
+    # ------------------------------------------------------------------
+    @property
+    def n_students(self) -> int:
+        return len(self.scores)
+
+    def wrong_counts(self) -> np.ndarray:
+        """문항별 오답 인원"""
+        return self.wrong.sum(axis=0)
+
+    def wrong_rates(self) -> np.ndarray:
+        """문항별 오답률 (0~1)"""
+        if self.n_students == 0:
+            return np.zeros(len(self.item_numbers))
+        return self.wrong_counts() / self.n_students
+
+    def option_distribution(self, max_option: int = MAX_OPTION) -> pd.DataFrame:
+        """
+        문항별 선택지 분포 (응답 행렬이 있을 때만)
+
+        Returns:
+            DataFrame: 행=문항 번호, 열=무응답, 1..max_option, 기타(주관식 등)
+        """
+        if self.responses is None:
+            raise ValueError("선택지 분포는 OMR 응답 행렬이 있어야 계산할 수 있습니다.")
+
+        responses = self.responses
+        n_items = responses.shape[1]
+        is_option = (responses >= 1) & (responses <= max_option) & (responses == np.floor(responses))
+        # 0=무응답, 1..max_option=선택지, max_option+1=기타
+        categories = np.where(np.isnan(responses), 0,
+                              np.where(is_option, np.nan_to_num(responses), max_option + 1)).astype(np.int64)
+        width = max_option + 2
+        flat = (np.arange(n_items) * width + categories).ravel()
+        counts = np.bincount(flat, minlength=n_items * width).reshape(n_items, width)
+
+        columns = ['무응답'] + [str(option) for option in range(1, max_option + 1)] + ['기타']
+        return pd.DataFrame(counts, index=pd.Index(self.item_numbers, name='문항 번호'), columns=columns)
+
+    def discrimination_index(self, ratio: float = DISCRIMINATION_GROUP_RATIO) -> np.ndarray:
+        """
+        문항별 변별도 (상위 집단 정답률 - 하위 집단 정답률)
+
+        점수 순으로 상위/하위 ratio 비율 학생을 나눠 계산 (학생이 2명 미만이면 NaN)
+        """
+        n = self.n_students
+        if n < 2:
+            return np.full(len(self.item_numbers), np.nan)
+        group_size = max(1, int(round(n * ratio)))
+        order = np.argsort(self.scores, kind='stable')
+        correct = ~self.wrong
+        lower = correct[order[:group_size]].mean(axis=0)
+        upper = correct[order[-group_size:]].mean(axis=0)
+        return upper - lower
+
+    def score_histogram(self, bin_width: float = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        점수 분포 (bin_width 단위 구간, 만점은 마지막 구간에 포함)
+
+        Returns:
+            (구간 시작 점수 배열, 구간별 학생 수)
+        """
+        top = self.max_score if self.max_score else (self.scores.max() if self.n_students else 0)
+        n_bins = max(1, int(np.ceil(top / bin_width)))
+        bins = np.clip((self.scores // bin_width).astype(np.int64), 0, n_bins - 1)
+        return np.arange(n_bins) * bin_width, np.bincount(bins, minlength=n_bins)
+
+    def summary(self) -> Dict[str, Any]:
+        """기본 통계 (인원, 평균, 표준편차, 최고/최저 점수와 수험번호)"""
+        if self.n_students == 0:
+            return {'인원': 0}
+        top, bottom = int(np.argmax(self.scores)), int(np.argmin(self.scores))
+        ids = self.student_ids
+        return {
+            '인원': self.n_students,
+            '평균': float(self.scores.mean()),
+            '표준편차': float(self.scores.std()),
+            '최고점': float(self.scores[top]),
+            '최고점 수험번호': ids[top] if ids is not None else None,
+            '최저점': float(self.scores[bottom]),
+            '최저점 수험번호': ids[bottom] if ids is not None else None,
+        }
+
+    # ------------------------------------------------------------------
+    # 표 / 내보내기
+    # ------------------------------------------------------------------
+    def wrong_distribution_frame(self) -> pd.DataFrame:
+        """오답분포 표 (문항 번호, 오답 인원, 오답률) - 오답 인원 많은 순"""
+        counts = self.wrong_counts()
+        order = np.lexsort((self.item_numbers, -counts))
+        return pd.DataFrame({
+            '문항 번호': self.item_numbers[order],
+            '오답 인원': counts[order],
+            '오답률': [f"{rate * 100:.1f}%" for rate in self.wrong_rates()[order]],
+        })
+
+    def item_table(self) -> pd.DataFrame:
+        """문항별 통계 표 (오답 인원, 오답률, 정답률, 변별도, 선택지 분포)"""
+        rates = self.wrong_rates()
+        table = pd.DataFrame({
+            '문항 번호': self.item_numbers,
+            '오답 인원': self.wrong_counts(),
+            '오답률': np.round(rates, 4),
+            '정답률': np.round(1 - rates, 4),
+            '변별도': np.round(self.discrimination_index(), 4),
+        })
+        if self.responses is not None:
+            options = self.option_distribution()
+            options.columns = [f"선택_{column}" for column in options.columns]
+            table = pd.concat([table, options.reset_index(drop=True)], axis=1)
+        return table
+
+    def export(self, output_dir: str = '.', prefix: str = '', chart: bool = True) -> Dict[str, str]:
+        """
+        오답분포 CSV, 문항분석 CSV, 통계리포트 이미지를 한 번에 저장
+
+        Args:
+            output_dir: 저장 폴더
+            prefix: 파일 이름 앞에 붙일 문자열 (예: '영어_')
+            chart: 통계리포트 이미지 저장 여부 (matplotlib 필요, 없으면 ImportError)
+
+        Returns:
+            Dict[str, str]: 종류 → 저장 경로
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        paths = {}
+
+        paths['wrong_distribution'] = os.path.join(output_dir, f"{prefix}오답분포_{timestamp}.csv")
+        self.wrong_distribution_frame().to_csv(paths['wrong_distribution'], index=False, encoding='utf-8-sig')
+
+        paths['item_table'] = os.path.join(output_dir, f"{prefix}문항분석_{timestamp}.csv")
+        self.item_table().to_csv(paths['item_table'], index=False, encoding='utf-8-sig')
+
+        if chart:
+            chart_path = os.path.join(output_dir, f"{prefix}통계리포트_{timestamp}.png")
+            paths['chart'] = self.save_chart(chart_path)
+
+        for kind, path in paths.items():
+            print(f"[문항분석] {kind}: {path}")
+        return paths
+
+    def save_chart(self, output_path: str, top_n: int = 10) -> str:
+        """
+        통계리포트 이미지 저장 (기본 통계, 점수 분포, 오답 상위 문항, 변별도) - matplotlib 필요
+
+        요청한 이미지가 조용히 빠지지 않도록 matplotlib이 없으면 ImportError
+        """
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+            from matplotlib import font_manager
+        except ImportError as e:
+            raise ImportError("통계리포트 이미지에는 matplotlib이 필요합니다. (pip install -r requirements.txt)") from e
+
+        available_fonts = {font.name for font in font_manager.fontManager.ttflist}
+        for font_name in ('Malgun Gothic', 'AppleGothic', 'NanumGothic', 'Noto Sans CJK KR'):
+            if font_name in available_fonts:
+                plt.rcParams['font.family'] = font_name
+                break
+        plt.rcParams['axes.unicode_minus'] = False
+
+        fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+        title = f"채점 통계 리포트 ({self.subject})" if self.subject else "채점 통계 리포트"
+        fig.suptitle(title, fontsize=18)
+
+        # 기본 통계
+        ax = axes[0][0]
+        ax.axis('off')
+        ax.set_title("기본 통계", fontsize=14)
+        summary = self.summary()
+        rows = [['인원', f"{summary['인원']}명"]]
+        if summary['인원']:
+            top_id = f" (수험번호: {summary['최고점 수험번호']})" if summary['최고점 수험번호'] is not None else ''
+            bottom_id = f" (수험번호: {summary['최저점 수험번호']})" if summary['최저점 수험번호'] is not None else ''
+            rows += [
+                ['평균 점수', f"{summary['평균']:.1f}점"],
+                ['표준편차', f"{summary['표준편차']:.2f}"],
+                ['최고 점수', f"{summary['최고점']:g}점{top_id}"],
+                ['최저 점수', f"{summary['최저점']:g}점{bottom_id}"],
+            ]
+        table = ax.table(cellText=rows, colWidths=[0.3, 0.7], loc='center', cellLoc='left')
+        table.scale(1, 3)
+        for row in range(len(rows)):
+            table[row, 0].set_facecolor('#e8f4f8')
+
+        # 점수 분포
+        ax = axes[0][1]
+        starts, counts = self.score_histogram()
+        width = starts[1] - starts[0] if len(starts) > 1 else 10
+        labels = [f"{start:g}-{start + width - 1:g}" for start in starts]
+        bars = ax.bar(range(len(counts)), counts, color='skyblue', edgecolor='black', alpha=0.7)
+        ax.bar_label(bars, labels=[str(count) if count else '' for count in counts])
+        ax.set_xticks(range(len(counts)))
+        ax.set_xticklabels(labels, rotation=45, ha='right')
+        ax.set_title("점수 분포", fontsize=14)
+        ax.set_xlabel("점수 구간")
+        ax.set_ylabel("학생 수")
+        ax.grid(axis='y', alpha=0.3)
+
+        # 오답 상위 문항
+        ax = axes[1][0]
+        top_items = self.wrong_distribution_frame().head(top_n).iloc[::-1]
+        bars = ax.barh([f"{item}번" for item in top_items['문항 번호']], top_items['오답 인원'],
+                       color='coral', edgecolor='black')
+        ax.bar_label(bars, labels=[f"{count}명" for count in top_items['오답 인원']], padding=3)
+        ax.set_title(f"오답이 많은 문항 TOP {top_n}", fontsize=14)
+        ax.set_xlabel("오답 인원")
+        ax.grid(axis='x', alpha=0.3)
+
+        # 변별도
+        ax = axes[1][1]
+        discrimination = np.nan_to_num(self.discrimination_index())
+        colors = ['lightgreen' if value >= 0.3 else ('khaki' if value >= 0.1 else 'salmon') for value in discrimination]
+        ax.bar(self.item_numbers, discrimination, color=colors, edgecolor='black', alpha=0.8)
+        ax.axhline(0.3, color='gray', linestyle='--', linewidth=1)
+        ax.set_title("문항별 변별도 (상위 27% - 하위 27% 정답률)", fontsize=14)
+        ax.set_xlabel("문항 번호")
+        ax.set_ylabel("변별도")
+        ax.grid(axis='y', alpha=0.3)
+
+        fig.tight_layout()
+        fig.savefig(output_path, dpi=120)
+        plt.close(fig)
+        return output_path
@@ -1,24 +1,94 @@
 import os
+import time
 import pathlib
 import datetime
 import re
-from typing import Dict, Any, List
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+import json
+from typing import Dict, Any, List, Callable, Iterable, Iterator
 from playwright.sync_api import sync_playwright
-from playwright_pdf_converter import html_string_to_pdf_sync
+from playwright_pdf_converter import (
+    PlaywrightPDFConverter, html_string_to_pdf_sync, batch_to_pdf_sync, count_pdf_pages
+)
+from browser_pool import get_browser_pool
+from pdf_cache import get_pdf_cache
+from template_registry import get_template_registry
+from metrics import count, record, span, verbose
+
+def build_report_context(student_data: Dict[str, Any], pdf_title: str = "학생 성적표",
+                         issued_at: str = None) -> Dict[str, Any]:
+    """학생 데이터를 report.html 템플릿 컨텍스트로 변환"""
+    student = {
+        "name": student_data['name'],
+        "sid": student_data['student_id']
+    }
+    
+    # 성적 데이터 변환
+    scores = []
+    wrongs = {}
+    
+    for subject, info in student_data['subjects'].items():
+        # 성적표 데이터
+        scores.append({
+            "subject": info.get('subject_name', subject),
+            "raw": str(int(info.get('total_score', 0))),
+            "std": str(info.get('standard_score', '—')) if info.get('standard_score') is not None else '—',
+            "pr": str(info.get('percentile', '—')) if info.get('percentile') is not None else '—'
+        })
+        
+        # 오답번호 데이터
+        wrong_answers = info.get('wrong_answers', [])
+        if isinstance(wrong_answers, list):
+            wrongs[subject] = [str(x) for x in wrong_answers]
+        else:
+            wrongs[subject] = []
+    
+    # 리포트 컨텍스트
+    return {
+        "student": student,
+        "scores": scores,
+        "wrongs": wrongs,
+        "report": {
+            "exam_name": pdf_title,
+            "issued_at": issued_at or datetime.date.today().isoformat(),
+        },
+    }
+
+
+def build_bundle_context(students: List[Dict[str, Any]], pdf_title: str = "학생 성적표",
+                         issued_at: str = None) -> Dict[str, Any]:
+    """여러 학생 데이터를 report_bundle.html 템플릿 컨텍스트로 변환"""
+    issued_at = issued_at or datetime.date.today().isoformat()
+    return {
+        "reports": [build_report_context(student_data, pdf_title, issued_at) for student_data in students],
+        "report": {
+            "exam_name": pdf_title,
+            "issued_at": issued_at,
+        },
+    }
+
+
+get_template_registry().register("report.html", build_report_context)
+get_template_registry().register("report_bundle.html", build_bundle_context)
+
 
 class JinjaPDFGenerator:
+    # PDF 여백 (report.html의 @page 여백과 동일)
+    PDF_MARGIN = {
+        "top": "12mm",
+        "right": "12mm",
+        "bottom": "12mm",
+        "left": "12mm"
+    }
+    
     def __init__(self):
         self.base_dir = pathlib.Path(__file__).parent
         self.templates_dir = self.base_dir / "templates"
         self.out_dir = self.base_dir / "output"
         self.out_dir.mkdir(exist_ok=True)
         
-        # Jinja2 환경 설정
-        self.env = Environment(
-            loader=FileSystemLoader(self.templates_dir),
-            autoescape=select_autoescape(["html"])
-        )
+        # 공유 템플릿 레지스트리 (컴파일된 템플릿 + 바이트코드 캐시)
+        self.registry = get_template_registry()
+        self.env = self.registry.env
     
     def _sanitize_filename(self, filename: str) -> str:
         """파일명에서 특수문자 제거 및 안전하게 처리"""
@@ -36,73 +106,239 @@ class JinjaPDFGenerator:
             filename = filename[:200]
         return filename
     
+    def render_html(self, student_data: Dict[str, Any], pdf_title: str = "학생 성적표") -> str:
+        """학생 한 명의 성적표 HTML 렌더링 (PDF 변환 없음)"""
+        return self.registry.render("report.html", student_data, pdf_title=pdf_title)
+    
+    def render_html_many(self, students: Iterable[Dict[str, Any]], pdf_title: str = "학생 성적표") -> Iterator[str]:
+        """여러 학생 성적표 HTML을 차례로 렌더링 (미리보기/일괄 내보내기용, PDF 변환 없음)"""
+        issued_at = datetime.date.today().isoformat()
+        return self.registry.render_many("report.html", students, pdf_title=pdf_title, issued_at=issued_at)
+    
+    def _save_html(self, html_content: str, output_dir: str, student_name: str, student_id: str):
+        """HTML 파일 저장"""
+        safe_name = self._sanitize_filename(student_name)
+        safe_sid = self._sanitize_filename(student_id)
+        html_filename = f"{safe_name}_{safe_sid}.html"
+        html_filepath = os.path.join(output_dir, html_filename)
+        with open(html_filepath, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        if verbose():
+            print(f"HTML 파일 저장: {html_filename}")
+    
+    def _pdf_filename(self, student_name: str, student_id: str) -> str:
+        """학생 PDF 파일명"""
+        safe_name = self._sanitize_filename(student_name)
+        safe_id = self._sanitize_filename(student_id)
+        return f"{safe_name}_{safe_id}.pdf"
+    
     def generate_pdf(self, student_data: Dict[str, Any], output_dir: str, pdf_title: str = "학생 성적표", save_html: bool = False):
         """Jinja2 템플릿 + Playwright로 PDF 생성"""
         try:
-            # 데이터 변환
-            student = {
-                "name": student_data['name'],
-                "sid": student_data['student_id']
-            }
-            
-            # 성적 데이터 변환
-            scores = []
-            wrongs = {}
-            
-            for subject, info in student_data['subjects'].items():
-                # 성적표 데이터
-                scores.append({
-                    "subject": info.get('subject_name', subject),
-                    "raw": str(int(info.get('total_score', 0))),
-                    "std": str(info.get('standard_score', '—')) if info.get('standard_score') is not None else '—',
-                    "pr": str(info.get('percentile', '—')) if info.get('percentile') is not None else '—'
-                })
-                
-                # 오답번호 데이터
-                wrong_answers = info.get('wrong_answers', [])
-                if isinstance(wrong_answers, list):
-                    wrongs[subject] = [str(x) for x in wrong_answers]
-                else:
-                    wrongs[subject] = []
-            
-            # 리포트 컨텍스트
-            report_ctx = {
-                "student": student,
-                "scores": scores,
-                "wrongs": wrongs,
-                "report": {
-                    "exam_name": pdf_title,
-                    "issued_at": datetime.date.today().isoformat(),
-                },
-            }
-            
             # HTML 렌더링
-            template = self.env.get_template("report.html")
-            html_content = template.render(**report_ctx)
+            with span('render') as render_span:
+                html_content = self.render_html(student_data, pdf_title)
+                render_span.items = 1
             
             # HTML 파일 저장 (옵션)
             if save_html:
-                safe_name = self._sanitize_filename(student['name'])
-                safe_sid = self._sanitize_filename(student['sid'])
-                html_filename = f"{safe_name}_{safe_sid}.html"
-                html_filepath = os.path.join(output_dir, html_filename)
-                with open(html_filepath, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                print(f"HTML 파일 저장: {html_filename}")
+                self._save_html(html_content, output_dir, student_data['name'], student_data['student_id'])
             
             # PDF 생성
-            self._html_to_pdf(html_content, output_dir, student['name'], student['sid'])
+            with span('print') as print_span:
+                self._html_to_pdf(html_content, output_dir, student_data['name'], student_data['student_id'])
+                print_span.items = 1
+            count('scorereport_reports_total', result='success')
             
         except Exception as e:
+            count('scorereport_reports_total', result='failed')
             print(f"PDF 생성 오류: {str(e)}")
             raise
     
+    def generate_pdfs(self, students: List[Dict[str, Any]], output_dir: str, pdf_title: str = "학생 성적표",
+                      save_html: bool = False, concurrency: int = None, timeout: float = None,
+                      on_result: Callable[[Dict[str, Any]], None] = None,
+                      filename_fn: Callable[[Dict[str, Any]], str] = None,
+                      should_cancel: Callable[[], bool] = None,
+                      wait_if_paused: Callable[[], None] = None) -> List[Dict[str, Any]]:
+        """
+        여러 학생의 PDF를 동시에 생성
+        
+        Args:
+            students: process_all_data() 결과의 학생 데이터 목록
+            output_dir: 출력 폴더
+            pdf_title: 성적표 제목
+            save_html: HTML 파일도 함께 저장할지 여부
+            concurrency: 동시에 출력할 페이지 수 (기본: 브라우저 풀 용량)
+            timeout: 학생당 제한 시간(초)
+            on_result: 학생 한 명이 끝날 때마다 호출 (호출한 스레드에서, 완료 순서)
+            filename_fn: 학생 데이터 → PDF 파일명 (기본: 이름_수험번호.pdf)
+            should_cancel: True를 반환하면 남은 학생은 시작하지 않음 (기다리지 않고 바로 반환)
+            wait_if_paused: 일시정지 중이면 재개될 때까지 대기 (진행 중인 학생은 계속 출력)
+            
+        Returns:
+            List[dict]: 입력 순서와 같은 순서의 결과 (key=수험번호, success, cached, error, output_pdf ...)
+        """
+        if filename_fn is None:
+            filename_fn = lambda data: self._pdf_filename(data['name'], data['student_id'])
+        # 템플릿 버전이 캐시 키에 포함되므로 템플릿을 고치면 이전 PDF는 재사용되지 않음
+        version = self.registry.version("report.html")
+        # 렌더링은 출력과 번갈아 실행되므로 시간을 따로 모아 끝난 뒤 기록
+        render_time = [0.0, 0]
+        
+        def _items():
+            # 브라우저가 출력하는 동안 다음 학생 HTML을 렌더링하도록 지연 생성
+            # (render_batch가 이벤트 루프 밖 스레드에서 꺼내 감)
+            for student_data in students:
+                try:
+                    output_pdf = os.path.join(output_dir, filename_fn(student_data))
+                    started = time.perf_counter()
+                    html_content = self.render_html(student_data, pdf_title)
+                    render_time[0] += time.perf_counter() - started
+                    render_time[1] += 1
+                    if save_html:
+                        self._save_html(html_content, output_dir, student_data['name'], student_data['student_id'])
+                except Exception as e:
+                    # 렌더링 실패는 해당 학생만 실패로 기록
+                    yield {
+                        "key": student_data.get('student_id'),
+                        "output_pdf": None,
+                        "error": f"HTML 렌더링 오류: {str(e)}",
+                    }
+                    continue
+                yield {
+                    "key": student_data['student_id'],
+                    "html": html_content,
+                    "output_pdf": output_pdf,
+                    "format": "A4",
+                    "margin": self.PDF_MARGIN,
+                    "version": version,
+                }
+        
+        kwargs = {"concurrency": concurrency, "on_result": on_result, "should_cancel": should_cancel,
+                  "cache": get_pdf_cache(), "wait_if_paused": wait_if_paused}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        started = time.perf_counter()
+        results = batch_to_pdf_sync(_items(), **kwargs)
+        elapsed = time.perf_counter() - started
+        # 전체 시간 중 렌더링 시간은 render로만 기록 (print에 중복 포함하지 않음)
+        record('render', render_time[0], render_time[1])
+        record('print', max(0.0, elapsed - render_time[0]), len(results))
+        self._count_results(results)
+        return results
+    
+    @staticmethod
+    def _count_results(results: List[Dict[str, Any]]):
+        """출력 결과 카운터 (성공/캐시/실패)"""
+        for result in results:
+            if not result.get('success'):
+                count('scorereport_reports_total', result='failed')
+            elif result.get('cached'):
+                count('scorereport_reports_total', result='cached')
+            else:
+                count('scorereport_reports_total', result='success')
+    
+    def generate_merged_pdf(self, students: List[Dict[str, Any]], output_dir: str, pdf_title: str = "학생 성적표",
+                            filename: str = "성적표_모음.pdf", chunk_size: int = None,
+                            on_output: Callable[[Dict[str, Any]], None] = None,
+                            should_cancel: Callable[[], bool] = None,
+                            wait_if_paused: Callable[[], None] = None) -> List[Dict[str, Any]]:
+        """
+        여러 학생 성적표를 하나의 PDF로 생성 (학생마다 새 페이지)
+        
+        학생 전체(또는 chunk_size명씩)를 한 HTML 문서로 렌더링해 page.pdf() 한 번으로 출력하고,
+        PDF 옆에 학생별 페이지 범위 파일(<PDF 이름>.pages.json)을 저장
+        
+        Args:
+            students: process_all_data() 결과의 학생 데이터 목록
+            output_dir: 출력 폴더
+            pdf_title: 성적표 제목
+            filename: 출력 PDF 파일명 (나눠서 만들 때는 _001, _002 ... 번호가 붙음)
+            chunk_size: 한 PDF에 넣을 최대 학생 수 (없으면 전체를 하나로)
+            on_output: PDF 하나가 끝날 때마다 호출 (결과 dict)
+            should_cancel: True를 반환하면 남은 묶음은 만들지 않음
+            wait_if_paused: 일시정지 중이면 다음 묶음을 시작하기 전에 재개될 때까지 대기
+            
+        Returns:
+            List[dict]: PDF별 결과 (output_pdf, index_file, page_count, students)
+        """
+        if not students:
+            return []
+        
+        if chunk_size and chunk_size > 0:
+            chunks = [students[i:i + chunk_size] for i in range(0, len(students), chunk_size)]
+        else:
+            chunks = [students]
+        
+        base, ext = os.path.splitext(self._sanitize_filename(filename))
+        ext = ext or ".pdf"
+        outputs = []
+        
+        for chunk_no, chunk in enumerate(chunks, 1):
+            if wait_if_paused is not None:
+                wait_if_paused()
+            if should_cancel is not None and should_cancel():
+                print(f"[취소] 통합 PDF {len(chunks) - chunk_no + 1}개 묶음 생성 취소")
+                break
+            pdf_filename = f"{base}_{chunk_no:03d}{ext}" if len(chunks) > 1 else f"{base}{ext}"
+            pdf_path = os.path.join(output_dir, pdf_filename)
+            
+            with span('render') as render_span:
+                html_content = self.registry.render("report_bundle.html", chunk, pdf_title=pdf_title)
+                render_span.items = len(chunk)
+            
+            with span('print') as print_span:
+                page_counts = get_browser_pool().run(
+                    lambda page: PlaywrightPDFConverter.print_sections(
+                        page, html_content, pdf_path, ".student-report", "A4", self.PDF_MARGIN
+                    )
+                )
+                print_span.items = len(chunk)
+            count('scorereport_reports_total', len(chunk), result='success')
+            
+            # 학생별 페이지 범위
+            index = []
+            next_page = 1
+            for student_data, pages in zip(chunk, page_counts):
+                index.append({
+                    "student_id": student_data['student_id'],
+                    "name": student_data['name'],
+                    "start_page": next_page,
+                    "end_page": next_page + pages - 1,
+                })
+                next_page += pages
+            
+            page_count = count_pdf_pages(pdf_path)
+            if page_count != next_page - 1:
+                print(f"[경고] {pdf_filename}: 계산한 페이지 수({next_page - 1})와 실제 페이지 수({page_count})가 다릅니다.")
+            
+            index_path = pdf_path + ".pages.json"
+            with open(index_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "pdf": pdf_filename,
+                    "page_count": page_count,
+                    "verified": page_count == next_page - 1,
+                    "students": index,
+                }, f, ensure_ascii=False, indent=2)
+            
+            print(f"PDF 생성 완료: {pdf_filename} ({len(chunk)}명, {page_count}페이지)")
+            output = {
+                "output_pdf": pdf_path,
+                "index_file": index_path,
+                "page_count": page_count,
+                "students": index,
+            }
+            outputs.append(output)
+            if on_output is not None:
+                on_output(output)
+        
+        return outputs
+    
     def _html_to_pdf(self, html_content: str, output_dir: str, student_name: str, student_id: str):
         """HTML을 PDF로 변환 (Playwright 변환기 사용)"""
         try:
-            safe_name = self._sanitize_filename(student_name)
-            safe_id = self._sanitize_filename(student_id)
-            pdf_filename = f"{safe_name}_{safe_id}.pdf"
+            pdf_filename = self._pdf_filename(student_name, student_id)
             pdf_path = os.path.join(output_dir, pdf_filename)
             
             # Playwright 변환기 사용
@@ -110,16 +346,14 @@ class JinjaPDFGenerator:
                 html_content, 
                 pdf_path,
                 format="A4",
-                margin={
-                    "top": "12mm", 
-                    "right": "12mm", 
-                    "bottom": "12mm", 
-                    "left": "12mm"
-                }
+                margin=self.PDF_MARGIN,
+                cache=get_pdf_cache(),
+                version=self.registry.version("report.html")
             )
             
             if success:
-                print(f"PDF 생성 완료: {pdf_filename}")
+                if verbose():
+                    print(f"PDF 생성 완료: {pdf_filename}")
             else:
                 raise Exception("PDF 변환 실패")
                 
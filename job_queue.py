@@ -0,0 +1,460 @@
+"""
+백그라운드 작업 큐
+SQLite 파일 하나에 작업 상태를 저장하고, 작업마다 별도 프로세스(spawn)에서 실행
+외부 브로커 없이 한 서버의 여러 gunicorn 워커가 같은 큐를 공유
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import pathlib
+import importlib
+import threading
+import traceback
+import multiprocessing
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import collect_timings, count, get_metrics
+from profiling import profile_run
+
+
+BASE_DIR = pathlib.Path(__file__).parent
+DEFAULT_JOB_DIR = BASE_DIR / "jobs"
+
+# 작업 상태
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    handler TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    pid INTEGER,
+    pid_start TEXT,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """
+    프로세스 식별값 (부팅 ID + /proc/<pid>/stat의 시작 시각)
+
+    재시작 후 같은 pid가 다른 프로세스(gunicorn 워커 등)에 다시 쓰였는지 구분하는 데 사용,
+    /proc이 없는 환경(Windows, macOS)이면 None
+    """
+    try:
+        with open(f"/proc/{pid}/stat", 'rb') as f:
+            stat = f.read()
+        with open("/proc/sys/kernel/random/boot_id", encoding='ascii') as f:
+            boot_id = f.read().strip()
+    except OSError:
+        return None
+    # 두 번째 필드(실행 파일 이름)에 공백/괄호가 있을 수 있으므로 마지막 ')' 뒤부터 셈 (starttime은 22번째 필드)
+    fields = stat[stat.rindex(b')') + 2:].split()
+    return f"{boot_id}:{fields[19].decode('ascii')}"
+
+
+def _job_process_alive(pid: Optional[int], pid_start: Optional[str]) -> bool:
+    """작업을 시작한 그 프로세스가 아직 살아 있는지 (식별값이 기록돼 있으면 pid 재사용도 확인)"""
+    if not _pid_alive(pid):
+        return False
+    return pid_start is None or _process_start(pid) == pid_start
+
+
+class JobContext:
+    """작업 프로세스에서 처리 함수에 넘기는 진행 상황 보고 / 취소 확인 객체"""
+
+    CANCEL_CHECK_INTERVAL = 0.5
+
+    def __init__(self, queue: 'JobQueue', job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self._cancelled = False
+        self._checked_at = 0.0
+
+    def set_total(self, total: int):
+        self.queue._execute("UPDATE jobs SET total = ? WHERE id = ?", (total, self.job_id))
+
+    def progress(self, done: int = 0, failed: int = 0, files: List[str] = ()):
+        """완료/실패 건수를 더하고, 완성된 파일을 부분 결과로 추가"""
+        with self.queue._transaction() as conn:
+            conn.execute("UPDATE jobs SET done = done + ?, failed = failed + ? WHERE id = ?",
+                         (done, failed, self.job_id))
+            if files:
+                start = conn.execute("SELECT COUNT(*) FROM job_files WHERE job_id = ?", (self.job_id,)).fetchone()[0]
+                conn.executemany("INSERT INTO job_files (job_id, seq, name) VALUES (?, ?, ?)",
+                                 [(self.job_id, start + i, name) for i, name in enumerate(files)])
+
+    def cancelled(self) -> bool:
+        """취소 요청 여부 (DB 조회는 CANCEL_CHECK_INTERVAL초에 한 번)"""
+        if not self._cancelled and time.monotonic() - self._checked_at >= self.CANCEL_CHECK_INTERVAL:
+            self._checked_at = time.monotonic()
+            row = self.queue._query_one("SELECT cancel_requested FROM jobs WHERE id = ?", (self.job_id,))
+            self._cancelled = bool(row and row['cancel_requested'])
+        return self._cancelled
+
+
+class JobQueue:
+    """
+    SQLite 기반 작업 큐
+
+    - submit(): 작업 등록 (입력 데이터는 jobs/<id>.json 파일로 저장) 후 작업 ID 즉시 반환
+    - 디스패처 스레드가 동시 실행 수(max_workers)를 넘지 않게 대기 작업을 가져가 프로세스를 시작
+      (여러 워커 프로세스가 같은 DB를 보므로 BEGIN IMMEDIATE로 한 작업은 한 번만 시작)
+    - 처리 함수는 "모듈:함수" 경로로 등록해 새 프로세스에서 import
+    """
+
+    def __init__(self, job_dir: pathlib.Path = DEFAULT_JOB_DIR, max_workers: int = 1,
+                 poll_interval: float = 0.5):
+        self.job_dir = pathlib.Path(job_dir)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(self.job_dir / "jobs.db")
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._dispatcher: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+        with self._transaction() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # 이전 버전에서 만든 DB에는 pid_start 컬럼이 없음
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if 'pid_start' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN pid_start TEXT")
+
+    # ------------------------------------------------------------------
+    # DB
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """연결 하나로 묶어 실행하고 커밋 후 닫기"""
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _execute(self, sql: str, params=()) -> int:
+        with self._transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def _query_one(self, sql: str, params=()) -> Optional[sqlite3.Row]:
+        with self._transaction() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _payload_path(self, job_id: str) -> pathlib.Path:
+        return self.job_dir / f"{job_id}.json"
+
+    # ------------------------------------------------------------------
+    # 웹 프로세스 쪽
+    # ------------------------------------------------------------------
+    def submit(self, handler: str, payload: Dict[str, Any], total: int = 0) -> str:
+        """
+        작업 등록
+
+        Args:
+            handler: 처리 함수 경로 ("모듈:함수", 함수는 (JobContext, payload) → 결과 dict)
+            payload: 처리 함수에 넘길 입력 (JSON 직렬화 가능해야 함)
+            total: 전체 건수 (진행률 표시용)
+
+        Returns:
+            str: 작업 ID
+        """
+        job_id = uuid.uuid4().hex
+        with open(self._payload_path(job_id), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        self._execute(
+            "INSERT INTO jobs (id, handler, status, total, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, handler, QUEUED, total, time.time()),
+        )
+        print(f"[작업] 등록: {job_id} ({handler}, {total}건)")
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태와 지금까지 완성된 파일 목록"""
+        row = self._query_one("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if row is None:
+            return None
+        with self._transaction() as conn:
+            files = [r['name'] for r in conn.execute(
+                "SELECT name FROM job_files WHERE job_id = ? ORDER BY seq", (job_id,))]
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['files'] = files
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        for key in ('created_at', 'started_at', 'finished_at'):
+            if job[key]:
+                job[key] = datetime.fromtimestamp(job[key]).isoformat(timespec='seconds')
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        작업 취소 요청 (대기 중이면 바로 취소, 실행 중이면 처리 함수가 확인 후 중단)
+
+        Returns:
+            bool: 취소 요청이 반영되었는지 (이미 끝난 작업이면 False)
+        """
+        with self._transaction() as conn:
+            if conn.execute("UPDATE jobs SET status = ?, cancel_requested = 1, finished_at = ? "
+                            "WHERE id = ? AND status = ?",
+                            (CANCELLED, time.time(), job_id, QUEUED)).rowcount:
+                self._remove_payload(job_id)
+                return True
+            return conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                                (job_id, RUNNING)).rowcount > 0
+
+    def start(self):
+        """
+        디스패처 스레드 시작 (프로세스당 한 번)
+
+        웹 앱은 시작할 때 호출 (재시작 전에 등록된 대기 작업, 비정상 종료된 실행 중 작업을
+        새 작업 등록을 기다리지 않고 바로 처리)
+        """
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        while True:
+            try:
+                self._reap()
+                while self._start_next():
+                    pass
+            except Exception as e:
+                print(f"[작업] 디스패처 오류: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim_next(self) -> Optional[str]:
+        """실행 수가 max_workers 미만이면 가장 오래된 대기 작업을 실행 상태로 바꾸고 ID 반환"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            running = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (RUNNING,)).fetchone()[0]
+            if running >= self.max_workers:
+                conn.rollback()
+                return None
+            row = conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                               (QUEUED,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                         (RUNNING, time.time(), row['id']))
+            conn.commit()
+            return row['id']
+        finally:
+            conn.close()
+
+    def _start_next(self) -> bool:
+        job_id = self._claim_next()
+        if job_id is None:
+            return False
+        try:
+            process = multiprocessing.get_context('spawn').Process(
+                target=_run_job, args=(str(self.job_dir), job_id), name=f"job-{job_id[:8]}"
+            )
+            process.start()
+        except Exception as e:
+            self._finish(job_id, FAILED, error=f"작업 프로세스를 시작할 수 없습니다: {str(e)}")
+            return True
+        self._execute("UPDATE jobs SET pid = ?, pid_start = ? WHERE id = ?",
+                      (process.pid, _process_start(process.pid), job_id))
+        self._processes[job_id] = process
+        print(f"[작업] 시작: {job_id} (pid {process.pid})")
+        return True
+
+    def _reap(self):
+        """끝난 프로세스 정리, 결과를 남기지 못하고 죽은 작업은 실패 처리"""
+        for job_id, process in list(self._processes.items()):
+            if not process.is_alive():
+                process.join()
+                del self._processes[job_id]
+
+        with self._transaction() as conn:
+            running = conn.execute("SELECT id, pid, pid_start, started_at FROM jobs WHERE status = ?",
+                                   (RUNNING,)).fetchall()
+        for row in running:
+            if row['id'] in self._processes:
+                continue
+            # pid 기록 전(방금 시작)은 건너뜀
+            if row['pid'] is None and time.time() - (row['started_at'] or 0) < 30:
+                continue
+            # 재시작 후 같은 pid를 다른 프로세스가 쓰고 있으면 시작 시각이 달라 실패 처리
+            if not _job_process_alive(row['pid'], row['pid_start']):
+                self._finish(row['id'], FAILED, error="작업 프로세스가 비정상 종료되었습니다.")
+
+    # ------------------------------------------------------------------
+    # 작업 프로세스 쪽
+    # ------------------------------------------------------------------
+    def _finish(self, job_id: str, status: str, result: Dict[str, Any] = None, error: str = None):
+        updated = self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error,
+             time.time(), job_id, RUNNING),
+        )
+        if updated:
+            count('scorereport_jobs_total', status=status)
+        self._remove_payload(job_id)
+
+    def _remove_payload(self, job_id: str):
+        try:
+            os.remove(self._payload_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def run(self, job_id: str):
+        """작업 하나 실행 (spawn된 프로세스에서 호출)"""
+        row = self._query_one("SELECT handler FROM jobs WHERE id = ?", (job_id,))
+        if row is None:
+            return
+        context = JobContext(self, job_id)
+        try:
+            with open(self._payload_path(job_id), encoding='utf-8') as f:
+                payload = json.load(f)
+            module_name, _, func_name = row['handler'].partition(':')
+            handler: Callable[[JobContext, Dict[str, Any]], Dict[str, Any]] = getattr(
+                importlib.import_module(module_name), func_name)
+            with collect_timings() as timings:
+                result = handler(context, payload)
+            if isinstance(result, dict):
+                result['timings'] = timings.as_dict()
+            print(f"[작업] 단계별 시간: {timings.format()}")
+        except Exception as e:
+            print(f"[작업] 실패: {job_id}\n{traceback.format_exc()}")
+            self._finish(job_id, FAILED, error=str(e))
+            return
+        job = self._query_one("SELECT total, done, failed FROM jobs WHERE id = ?", (job_id,))
+        stopped_early = job['done'] + job['failed'] < job['total']
+        status = CANCELLED if context.cancelled() and stopped_early else DONE
+        self._finish(job_id, status, result=result)
+        print(f"[작업] {'취소' if status == CANCELLED else '완료'}: {job_id}")
+
+
+def _run_job(job_dir: str, job_id: str):
+    """spawn 프로세스 진입점"""
+    try:
+        JobQueue(pathlib.Path(job_dir)).run(job_id)
+    finally:
+        # spawn 프로세스는 atexit을 거치지 않으므로 측정값을 직접 저장
+        get_metrics().flush()
+
+
+def run_report_job(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    성적표 생성 작업
+
+    payload: students(process_all_data() 결과 목록), output_dir, pdf_title, filenames(학생별 PDF 파일명),
+             merge_pdf, chunk_size, profile(출력 폴더 profile/에 프로파일 저장)
+    """
+    with profile_run(payload['output_dir'], 'report', enabled=bool(payload.get('profile'))):
+        return _run_report(context, payload)
+
+
+def _run_report(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    from jinja_pdf_generator import JinjaPDFGenerator
+    from browser_pool import close_browser_pool
+
+    students = payload['students']
+    output_dir = payload['output_dir']
+    pdf_title = payload.get('pdf_title', '학생 성적표')
+    os.makedirs(output_dir, exist_ok=True)
+    context.set_total(len(students))
+    generator = JinjaPDFGenerator()
+
+    try:
+        if payload.get('merge_pdf'):
+            def on_output(output):
+                context.progress(done=len(output['students']), files=[
+                    os.path.basename(output['output_pdf']), os.path.basename(output['index_file'])])
+
+            outputs = generator.generate_merged_pdf(
+                students, output_dir, pdf_title, filename='merged_reports.pdf',
+                chunk_size=payload.get('chunk_size'), on_output=on_output, should_cancel=context.cancelled,
+            )
+            return {'pdf_count': len(outputs)}
+
+        filenames = payload.get('filenames') or {}
+
+        def on_result(result):
+            if result['success']:
+                context.progress(done=1, files=[os.path.basename(result['output_pdf'])])
+            else:
+                print(f"[ERROR] 학생 {result['key']} PDF 생성 오류: {result['error']}")
+                context.progress(failed=1)
+
+        results = generator.generate_pdfs(
+            students, output_dir, pdf_title, on_result=on_result, should_cancel=context.cancelled,
+            filename_fn=(lambda data: filenames[str(data['student_id'])]) if filenames else None,
+        )
+        return {
+            'success_count': sum(1 for result in results if result['success']),
+            'failed_count': sum(1 for result in results if not result['success']),
+        }
+    finally:
+        close_browser_pool()
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """프로세스 공유 작업 큐 (JOB_DIR, JOB_WORKERS 환경 변수로 조정)"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(
+                    pathlib.Path(os.environ.get('JOB_DIR', DEFAULT_JOB_DIR)),
+                    max_workers=int(os.environ.get('JOB_WORKERS', '1')),
+                )
+    return _queue
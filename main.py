@@ -2,9 +2,17 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import pandas as pd
 import os
+import multiprocessing
 from data_processor import DataProcessor
 from pdf_generator import PDFGenerator
-from html_pdf_generator import HTMLPDFGenerator
+from metrics import collect_timings, current_timings, verbose
+from profiling import profile_run
+from render_farm import RenderFarm, RESULT, OUTPUT, ERROR
+
+# PDF와 프로파일링 결과를 저장하는 폴더
+OUTPUT_DIR = "output"
+# PDF 출력 진행 상황 확인 간격 (ms)
+RENDER_POLL_MS = 100
 
 class ScoringSystemGUI:
     def __init__(self, root):
@@ -22,8 +30,20 @@ class ScoringSystemGUI:
         self.saved_standard_scores = None
         self.saved_grade_standard_scores = None
         
+        # 진행 중인 PDF 출력 (워커 프로세스)
+        self.render_farm = None
+        self.render_run = None
+        
+        # 과목 파일이 그대로면 재사용하는 처리기 (등급컷/표점만 바뀌면 바뀐 과목만 다시 계산)
+        self.processor = None
+        self.processor_files = None
+        # 다시 만들어야 하는 학생 PDF (None이면 전체), 마지막 PDF 생성 옵션
+        self.pdf_pending = None
+        self.pdf_run_options = None
+        
         # GUI 구성
         self.setup_gui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def setup_gui(self):
         # 메인 프레임 (스크롤 가능)
@@ -62,6 +82,18 @@ class ScoringSystemGUI:
                                        variable=self.save_html_var)
         html_checkbox.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
         
+        # 통합 PDF 옵션 (학생 전체를 PDF 하나로)
+        self.merge_pdf_var = tk.BooleanVar()
+        merge_checkbox = ttk.Checkbutton(pdf_title_frame, text="전체 학생을 PDF 하나로 합치기",
+                                        variable=self.merge_pdf_var)
+        merge_checkbox.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        # 프로파일링 옵션 (느릴 때 원인 분석, 결과는 output/profile/)
+        self.profile_var = tk.BooleanVar()
+        profile_checkbox = ttk.Checkbutton(pdf_title_frame, text="처리 과정 프로파일링 (느릴 때 원인 분석용)",
+                                          variable=self.profile_var)
+        profile_checkbox.grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
         pdf_title_frame.grid_columnconfigure(1, weight=1)
         
         # 과목별 파일 업로드 섹션
@@ -417,6 +449,14 @@ class ScoringSystemGUI:
                                    command=self.generate_pdfs, state="disabled")
         self.pdf_button.pack(side=tk.LEFT)
         
+        self.pause_button = ttk.Button(button_frame, text="일시정지",
+                                     command=self.toggle_pause, state="disabled")
+        self.pause_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.cancel_button = ttk.Button(button_frame, text="취소",
+                                      command=self.cancel_pdfs, state="disabled")
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+        
     def setup_progress_section(self, parent):
         # 진행상황 표시 프레임
         progress_frame = ttk.LabelFrame(parent, text="진행상황", padding="10")
@@ -492,6 +532,11 @@ class ScoringSystemGUI:
             self.process_button.config(state="disabled")
             
     def process_data(self):
+        """데이터 처리 (끝나면 단계별 시간을 로그에 요약)"""
+        with collect_timings(), profile_run(OUTPUT_DIR, 'process', enabled=self.profile_var.get()):
+            self._process_data()
+    
+    def _process_data(self):
         """데이터 처리"""
         try:
             self.progress_var.set("데이터 처리 중...")
@@ -500,19 +545,45 @@ class ScoringSystemGUI:
             
             self.log_result("[시작] 데이터 처리 시작...")
             
-            # 데이터 처리기 초기화
-            processor = DataProcessor()
-            
-            # 과목별 데이터 로드
-            self.log_result(f"[파일] 총 {len(self.subject_files)}개 과목 파일 처리 시작...")
-            for subject, file_path in self.subject_files.items():
-                try:
-                    self.log_result(f"[로드] {subject} 데이터 로딩 중: {file_path}")
-                    processor.load_subject_data(subject, file_path)
-                    self.log_result(f"[완료] {subject} 로드 완료")
-                except Exception as e:
-                    self.log_result(f"[오류] {subject} 로드 실패: {str(e)}")
-                    raise Exception(f"{subject} 파일 처리 중 오류가 발생했습니다:\n{str(e)}")
+            # 과목 파일이 이전과 같으면(경로, 수정 시각) 이전 처리기 재사용
+            file_state = {subject: (file_path, os.path.getmtime(file_path))
+                          for subject, file_path in self.subject_files.items()}
+            if self.processor is not None and file_state == self.processor_files:
+                processor = self.processor
+                self.log_result("[재사용] 과목 파일이 그대로여서 이전에 읽은 데이터를 사용합니다.")
+            elif self.processor is not None and list(file_state) == list(self.processor_files):
+                # 과목 구성이 같으면 바뀐 파일만 다시 로드 (내용이 같으면 건너뛰고, 그 과목만 다시 통합)
+                processor = self.processor
+                for subject, file_path in self.subject_files.items():
+                    if file_state[subject] == self.processor_files[subject]:
+                        continue
+                    try:
+                        self.log_result(f"[로드] {subject} 파일이 바뀌어 다시 로딩 중: {file_path}")
+                        if processor.reload_subject_data(subject, file_path):
+                            self.log_result(f"[완료] {subject} 교체 완료")
+                        else:
+                            self.log_result(f"[유지] {subject} 파일 내용이 같아 그대로 사용합니다.")
+                    except Exception as e:
+                        self.log_result(f"[오류] {subject} 로드 실패: {str(e)}")
+                        self.processor = None
+                        raise Exception(f"{subject} 파일 처리 중 오류가 발생했습니다:\n{str(e)}")
+                    self.processor_files[subject] = file_state[subject]
+            else:
+                # 데이터 처리기 초기화
+                processor = DataProcessor()
+                
+                # 과목별 데이터 로드
+                self.log_result(f"[파일] 총 {len(self.subject_files)}개 과목 파일 처리 시작...")
+                for subject, file_path in self.subject_files.items():
+                    try:
+                        self.log_result(f"[로드] {subject} 데이터 로딩 중: {file_path}")
+                        processor.load_subject_data(subject, file_path)
+                        self.log_result(f"[완료] {subject} 로드 완료")
+                    except Exception as e:
+                        self.log_result(f"[오류] {subject} 로드 실패: {str(e)}")
+                        raise Exception(f"{subject} 파일 처리 중 오류가 발생했습니다:\n{str(e)}")
+                self.processor = processor
+                self.processor_files = file_state
             
             # 저장된 등급컷과 표점 데이터 사용
             self.log_result("등급컷 및 표점 데이터 설정 중...")
@@ -579,6 +650,14 @@ class ScoringSystemGUI:
             self.processed_data = processor.process_all_data()
             
             self.log_result(f"처리 완료! 총 {len(self.processed_data)}명의 학생 데이터가 처리되었습니다.")
+            changed = processor.changed_student_ids
+            if changed is None:
+                self.pdf_pending = None
+            else:
+                self.log_result(f"[재계산] 이전 처리 이후 결과가 바뀐 학생: {len(changed)}명")
+                if self.pdf_pending is not None:
+                    self.pdf_pending |= set(changed)
+            self.log_timings()
             
             self.pdf_button.config(state="normal")
             self.progress_var.set("데이터 처리 완료")
@@ -671,23 +750,12 @@ class ScoringSystemGUI:
             messagebox.showerror("오류", f"등급컷 CSV 업로드 중 오류가 발생했습니다:\n{str(e)}")
             
     def generate_pdfs(self):
-        """PDF 생성"""
+        """PDF 생성 시작 (워커 프로세스에서 출력하고, 진행 상황은 _poll_render_farm에서 표시)"""
         try:
-            self.progress_var.set("PDF 생성 중...")
-            self.progress_bar.start()
-            self.pdf_button.config(state="disabled")
-            
             self.log_result("[시작] PDF 생성 시작...")
             
-            # HTML 기반 PDF 생성기 초기화
-            try:
-                pdf_generator = HTMLPDFGenerator()
-                self.log_result("[완료] PDF 생성기 초기화 완료")
-            except Exception as e:
-                raise Exception(f"PDF 생성기 초기화 실패: {str(e)}")
-            
             # 출력 폴더 생성
-            output_dir = "output"
+            output_dir = OUTPUT_DIR
             try:
                 if not os.path.exists(output_dir):
                     os.makedirs(output_dir)
@@ -709,65 +777,192 @@ class ScoringSystemGUI:
             total_students = len(self.processed_data)
             self.log_result(f"[학생] 총 {total_students}명의 학생 PDF 생성 시작...")
             
-            success_count = 0
             error_count = 0
             
-            for i, (student_id, student_data) in enumerate(self.processed_data.items()):
-                try:
-                    self.log_result(f"[생성] PDF 생성 중... ({i+1}/{total_students}) - {student_data['name']}")
-                    
-                    # 학생 데이터 검증
-                    if not student_data.get('name'):
-                        self.log_result(f"[경고] {student_id}: 학생 이름이 없습니다.")
-                        error_count += 1
-                        continue
-                    
-                    if not student_data.get('subjects'):
-                        self.log_result(f"[경고] {student_data['name']}: 과목 데이터가 없습니다.")
-                        error_count += 1
-                        continue
-                    
-                    # PDF 생성 (HTML 저장 옵션 포함)
-                    save_html = self.save_html_var.get()
-                    pdf_generator.generate_html_based_pdf(student_data, output_dir, pdf_title, save_html)
-                    success_count += 1
-                    self.log_result(f"[완료] {student_data['name']} PDF 생성 완료")
-                    
-                except Exception as e:
+            # 학생 데이터 검증
+            students = []
+            for student_id, student_data in self.processed_data.items():
+                if not student_data.get('name'):
+                    self.log_result(f"[경고] {student_id}: 학생 이름이 없습니다.")
                     error_count += 1
-                    self.log_result(f"[오류] {student_data.get('name', 'Unknown')} PDF 생성 실패: {str(e)}")
                     continue
+                
+                if not student_data.get('subjects'):
+                    self.log_result(f"[경고] {student_data['name']}: 과목 데이터가 없습니다.")
+                    error_count += 1
+                    continue
+                
+                students.append(student_data)
             
-            # 결과 요약
-            self.log_result(f"[결과] PDF 생성 완료!")
-            self.log_result(f"  [성공] 성공: {success_count}개")
-            if error_count > 0:
-                self.log_result(f"  [실패] 실패: {error_count}개")
-            self.log_result(f"[위치] 저장 위치: {output_dir}")
-            
-            self.progress_var.set("PDF 생성 완료")
+            if not students:
+                messagebox.showerror("오류", "PDF를 생성할 학생이 없습니다. 로그를 확인해주세요.")
+                return
             
-            # 성공 메시지
-            if success_count > 0:
-                messagebox.showinfo("완료", f"PDF 생성이 완료되었습니다!\n\n성공: {success_count}개\n실패: {error_count}개\n\n저장 위치: {output_dir}")
-            else:
-                messagebox.showerror("오류", "PDF 생성에 실패했습니다. 로그를 확인해주세요.")
+            # 등급컷/표점만 고친 뒤에는 결과가 바뀐 학생 PDF만 다시 생성 (나머지는 이전 PDF 그대로)
+            merge = self.merge_pdf_var.get()
+            options = (output_dir, pdf_title, self.save_html_var.get())
+            if self.pdf_pending is not None and not merge and options == self.pdf_run_options:
+                students = [student for student in students if student['student_id'] in self.pdf_pending]
+                if not students:
+                    messagebox.showinfo("PDF 생성", "이전 처리 이후 결과가 바뀐 학생이 없어 다시 만들 PDF가 없습니다.")
+                    return
+                self.log_result(f"[재계산] 결과가 바뀐 {len(students)}명만 다시 생성합니다.")
             
+            # 워커 프로세스마다 브라우저 1개 (CPU 코어 수만큼, RENDER_FARM_WORKERS로 조정)
+            farm = RenderFarm()
+            farm.start(students, output_dir, pdf_title, save_html=options[2],
+                       merge=merge, profile=self.profile_var.get())
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
             self.log_result(f"[오류] PDF 생성 중 치명적 오류: {str(e)}")
             self.log_result(f"상세 오류:\n{error_details}")
             messagebox.showerror("오류", f"PDF 생성 중 치명적 오류가 발생했습니다:\n{str(e)}")
-        finally:
-            self.progress_bar.stop()
-            self.pdf_button.config(state="normal")
+            return
+        
+        if merge:
+            self.log_result(f"[통합] {len(students)}명 성적표를 PDF 하나로 생성 중...")
+        self.render_farm = farm
+        self.render_run = {
+            'output_dir': output_dir,
+            'options': options,
+            'merge': merge,
+            'failed_ids': set(),
+            'error_count': error_count,
+            'names': {student['student_id']: student['name'] for student in students},
+            'completed': 0,
+            # 학생별 완료 로그는 LOG_LEVEL=DEBUG일 때만, 평소에는 5% 단위 진행 상황만 표시
+            'log_every': 1 if verbose() else max(1, len(students) // 20),
+        }
+        
+        self.progress_bar.config(mode='determinate', maximum=len(students), value=0)
+        self.progress_var.set(f"PDF 생성 중... (0/{len(students)})")
+        self.pdf_button.config(state="disabled")
+        self.process_button.config(state="disabled")
+        self.pause_button.config(state="normal", text="일시정지")
+        self.cancel_button.config(state="normal")
+        self.root.after(RENDER_POLL_MS, self._poll_render_farm)
+    
+    def _poll_render_farm(self):
+        """워커 진행 상황 반영 (root.after로 주기적으로 호출, 메인 스레드는 기다리지 않음)"""
+        farm = self.render_farm
+        run = self.render_run
+        if farm is None:
+            return
+        for kind, index, payload in farm.poll():
+            if kind == RESULT:
+                run['completed'] += 1
+                name = run['names'].get(payload['key'], 'Unknown')
+                if payload['success']:
+                    if run['completed'] % run['log_every'] == 0 or run['completed'] == farm.total:
+                        self.log_result(f"[완료] ({run['completed']}/{farm.total}) {name} PDF 생성 완료")
+                else:
+                    run['failed_ids'].add(payload['key'])
+                    self.log_result(f"[오류] ({run['completed']}/{farm.total}) {name} PDF 생성 실패: {payload['error']}")
+            elif kind == OUTPUT:
+                self.log_result(f"[완료] {os.path.basename(payload['output_pdf'])} ({payload['page_count']}페이지)")
+                self.log_result(f"[색인] 학생별 페이지: {os.path.basename(payload['index_file'])}")
+            elif kind == ERROR:
+                self.log_result(f"[오류] {payload}")
+        
+        processed = farm.done + farm.failed
+        self.progress_bar.config(value=processed)
+        status = "일시정지" if farm.paused else ("취소 중" if farm.cancelled else "PDF 생성 중")
+        self.progress_var.set(f"{status}... ({processed}/{farm.total})")
+        
+        if farm.finished:
+            self._finish_render_farm()
+        else:
+            self.root.after(RENDER_POLL_MS, self._poll_render_farm)
+    
+    def _finish_render_farm(self):
+        """출력이 끝난 뒤 결과 요약"""
+        farm = self.render_farm
+        run = self.render_run
+        cancelled = farm.cancelled
+        farm.close()
+        self.render_farm = None
+        
+        # 다음 재계산 때 바뀐 학생만 다시 만들 수 있도록 기록 (취소/통합 PDF는 다음에 전체 생성)
+        if cancelled or run['merge'] or farm.done + farm.failed < farm.total:
+            self.pdf_pending = None
+        else:
+            self.pdf_pending = set(run['failed_ids'])
+            self.pdf_run_options = run['options']
+        
+        success_count = farm.done
+        error_count = run['error_count'] + farm.failed
+        skipped = farm.total - farm.done - farm.failed
+        
+        # 결과 요약
+        self.log_result(f"[결과] PDF 생성 {'취소' if cancelled else '완료'}!")
+        self.log_result(f"  [성공] 성공: {success_count}개")
+        if error_count > 0:
+            self.log_result(f"  [실패] 실패: {error_count}개")
+        if skipped > 0:
+            self.log_result(f"  [취소] 출력하지 않음: {skipped}개")
+        self.log_result(f"[위치] 저장 위치: {run['output_dir']}")
+        if farm.timings.stages:
+            self.log_result(f"[시간] {farm.timings.format()}")
+        
+        self.progress_bar.config(mode='indeterminate', value=0)
+        self.progress_var.set("PDF 생성 취소" if cancelled else "PDF 생성 완료")
+        self.pdf_button.config(state="normal")
+        self.check_files_ready()
+        self.pause_button.config(state="disabled", text="일시정지")
+        self.cancel_button.config(state="disabled")
+        
+        # 결과 메시지
+        if cancelled:
+            messagebox.showinfo("취소", f"PDF 생성이 취소되었습니다.\n\n성공: {success_count}개\n출력하지 않음: {skipped}개\n\n저장 위치: {run['output_dir']}")
+        elif success_count > 0:
+            messagebox.showinfo("완료", f"PDF 생성이 완료되었습니다!\n\n성공: {success_count}개\n실패: {error_count}개\n\n저장 위치: {run['output_dir']}")
+        else:
+            messagebox.showerror("오류", "PDF 생성에 실패했습니다. 로그를 확인해주세요.")
+    
+    def toggle_pause(self):
+        """PDF 출력 일시정지/계속"""
+        farm = self.render_farm
+        if farm is None:
+            return
+        if farm.paused:
+            farm.resume()
+            self.pause_button.config(text="일시정지")
+            self.log_result("[계속] PDF 생성을 계속합니다.")
+        else:
+            farm.pause()
+            self.pause_button.config(text="계속")
+            self.log_result("[일시정지] 진행 중인 페이지가 끝나면 멈춥니다.")
+    
+    def cancel_pdfs(self):
+        """PDF 출력 취소 (진행 중인 페이지는 끝까지 출력)"""
+        if self.render_farm is None:
+            return
+        self.render_farm.cancel()
+        self.pause_button.config(state="disabled")
+        self.cancel_button.config(state="disabled")
+        self.log_result("[취소] 진행 중인 페이지가 끝나면 중단합니다.")
+    
+    def on_close(self):
+        """창 닫기 (출력 중이면 워커를 정리한 뒤 종료)"""
+        if self.render_farm is not None:
+            if not messagebox.askyesno("종료", "PDF 생성 중입니다. 중단하고 종료할까요?"):
+                return
+            self.render_farm.close()
+        self.root.destroy()
             
     def log_result(self, message):
         """결과 로그 출력"""
         self.result_text.insert(tk.END, f"{message}\n")
         self.result_text.see(tk.END)
-        self.root.update()
+        # 화면만 다시 그림 (update()는 이벤트 처리까지 해서 로그마다 느려지고 버튼이 다시 눌릴 수 있음)
+        self.root.update_idletasks()
+    
+    def log_timings(self):
+        """지금까지 기록된 단계별 시간 요약 출력 (collect_timings() 안에서 호출)"""
+        timings = current_timings()
+        if timings is not None and timings.stages:
+            self.log_result(f"[시간] {timings.format()}")
 
     def upload_standard_scores_csv(self):
         """표점 CSV 파일 업로드"""
@@ -853,6 +1048,8 @@ class ScoringSystemGUI:
             traceback.print_exc()
 
 def main():
+    # 실행 파일(PyInstaller)로 묶었을 때 PDF 워커 프로세스 시작용
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ScoringSystemGUI(root)
     root.mainloop()
@@ -0,0 +1,434 @@
+"""
+단계별 시간 측정 / 카운터
+- span(): 단계(읽기, 통합, 채점, 렌더링, 출력 ...) 실행 시간을 히스토그램으로 기록
+- count(): 카운터 증가
+- collect_timings(): 작업 하나의 단계별 시간 요약 (GUI 로그용)
+- render_prometheus(): 웹 /metrics 응답 (Prometheus text format)
+- verbose(): LOG_LEVEL=DEBUG일 때만 행/학생 단위 상세 로그 출력
+
+METRICS_DIR이 설정되면 프로세스(gunicorn 워커, 작업 프로세스)마다 누적값 스냅샷을 파일로 저장하고
+/metrics에서 모든 프로세스 값을 합산 (종료된 프로세스 파일은 archive.json으로 합침)
+"""
+
+import os
+import json
+import time
+import uuid
+import bisect
+import atexit
+import pathlib
+import threading
+import contextlib
+import contextvars
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows (GUI는 단일 프로세스라 파일 합산 불필요)
+    fcntl = None
+
+
+# 단계 실행 시간 히스토그램 구간 (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+# 스냅샷 파일 저장 최소 간격 (초)
+FLUSH_INTERVAL = 5.0
+ARCHIVE_FILE = "archive.json"
+
+STAGE_LABELS = {
+    'ingest': '파일 읽기',
+    'merge': '학생별 통합',
+    'grade': '등급 계산',
+    'scoring': 'OMR 채점',
+    'render': '렌더링',
+    'print': 'PDF 출력',
+    'zip': 'ZIP',
+}
+
+METRIC_HELP = {
+    'scorereport_stage_seconds': ('histogram', "단계별 실행 시간(초)"),
+    'scorereport_stage_items_total': ('counter', "단계별 처리 항목 수 (행/학생/파일)"),
+    'scorereport_stage_errors_total': ('counter', "오류로 끝난 단계 수"),
+    'scorereport_reports_total': ('counter', "성적표 PDF 출력 결과 수"),
+    'scorereport_zip_bytes_total': ('counter', "ZIP 스트리밍으로 보낸 bytes"),
+    'scorereport_jobs_total': ('counter', "끝난 백그라운드 작업 수"),
+    'scorereport_http_requests_total': ('counter', "HTTP 요청 수"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((str(key), str(value)) for key, value in labels.items()))
+
+
+# ----------------------------------------------------------------------
+# 상세 로그 수준
+# ----------------------------------------------------------------------
+_verbose: Optional[bool] = None
+
+
+def verbose() -> bool:
+    """행/학생 단위 상세 로그를 출력할지 여부 (LOG_LEVEL=DEBUG)"""
+    global _verbose
+    if _verbose is None:
+        _verbose = os.environ.get('LOG_LEVEL', 'INFO').upper() == 'DEBUG'
+    return _verbose
+
+
+def set_verbose(enabled: bool):
+    """상세 로그 출력 여부 변경 (LOG_LEVEL 환경 변수보다 우선)"""
+    global _verbose
+    _verbose = bool(enabled)
+
+
+# ----------------------------------------------------------------------
+# 작업별 단계 시간 요약
+# ----------------------------------------------------------------------
+class TimingSummary:
+    """collect_timings() 안에서 기록된 단계별 시간 합계"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}  # 단계 → [초, 횟수, 항목 수]
+
+    def add(self, stage: str, seconds: float, items: Optional[float]):
+        entry = self.stages.setdefault(stage, [0.0, 0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+        entry[2] += items or 0
+
+    def merge(self, timings: Dict[str, Any]):
+        """다른 프로세스에서 받은 as_dict() 결과를 더함"""
+        for stage, entry in timings.get('stages', {}).items():
+            total = self.stages.setdefault(stage, [0.0, 0, 0])
+            total[0] += entry['seconds']
+            total[1] += entry['calls']
+            total[2] += entry['items']
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total_seconds': round(self.total_seconds, 4),
+            'stages': {stage: {'seconds': round(seconds, 4), 'calls': calls, 'items': items}
+                       for stage, (seconds, calls, items) in self.stages.items()},
+        }
+
+    def format(self) -> str:
+        """예: 파일 읽기 1.23s (600,000건) · 학생별 통합 0.31s · 전체 1.80s"""
+        parts = []
+        for stage, (seconds, _, items) in self.stages.items():
+            text = f"{STAGE_LABELS.get(stage, stage)} {seconds:.2f}s"
+            if items:
+                text += f" ({int(items):,}건)"
+            parts.append(text)
+        parts.append(f"전체 {self.total_seconds:.2f}s")
+        return " · ".join(parts)
+
+
+_current_summary: contextvars.ContextVar = contextvars.ContextVar('timing_summary', default=None)
+
+
+def current_timings() -> Optional[TimingSummary]:
+    """진행 중인 collect_timings()의 요약 (없으면 None)"""
+    return _current_summary.get()
+
+
+@contextlib.contextmanager
+def collect_timings() -> Iterator[TimingSummary]:
+    """with 블록 안에서(같은 스레드/컨텍스트) 기록된 단계 시간을 모음"""
+    summary = TimingSummary()
+    token = _current_summary.set(summary)
+    try:
+        yield summary
+    finally:
+        _current_summary.reset(token)
+
+
+# ----------------------------------------------------------------------
+# 레지스트리
+# ----------------------------------------------------------------------
+class Metrics:
+    """프로세스 하나의 카운터/히스토그램 누적값"""
+
+    def __init__(self, metrics_dir: Optional[str] = None):
+        self.metrics_dir = pathlib.Path(metrics_dir) if metrics_dir else None
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        # (이름, 라벨) → [구간별 개수..., +Inf 개수, 합계]
+        self._histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        self._dirty = False
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+        # pid가 재사용돼도 이전 프로세스 파일을 덮어쓰지 않도록 실행마다 다른 이름
+        self._file_name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+
+    # -- 기록 --------------------------------------------------------------
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._dirty = True
+        self._maybe_flush()
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            buckets = self._histograms.get(key)
+            if buckets is None:
+                buckets = self._histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            buckets[bisect.bisect_left(BUCKETS, value)] += 1
+            buckets[-1] += value
+            self._dirty = True
+        self._maybe_flush()
+
+    # -- 스냅샷 ------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, dict(labels), list(buckets)] for (name, labels), buckets in self._histograms.items()],
+            }
+
+    def _maybe_flush(self):
+        if self.metrics_dir is not None and time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush(wait=False)
+
+    def flush(self, wait: bool = True):
+        """이 프로세스의 누적값을 스냅샷 파일로 저장 (METRICS_DIR이 있을 때만)"""
+        if self.metrics_dir is None or not self._dirty:
+            return
+        # 기록하는 쪽(wait=False)은 다른 스레드가 저장 중이면 기다리지 않음
+        if not self._flush_lock.acquire(blocking=wait):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            self._dirty = False
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+            path = self.metrics_dir / self._file_name
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[측정] 스냅샷 저장 실패: {str(e)}")
+        finally:
+            self._flush_lock.release()
+
+    # -- 합산 --------------------------------------------------------------
+    def collect(self) -> Dict[str, Any]:
+        """모든 프로세스의 누적값 합계 (METRICS_DIR이 없으면 이 프로세스 값만)"""
+        if self.metrics_dir is None:
+            return self.snapshot()
+        self._dirty = True
+        self.flush()
+        with self._dir_lock():
+            self._compact()
+            total = _empty_snapshot()
+            for path in self.metrics_dir.glob("*.json"):
+                snapshot = _read_snapshot(path)
+                if snapshot is not None:
+                    _merge_snapshot(total, snapshot)
+        return total
+
+    @contextlib.contextmanager
+    def _dir_lock(self):
+        if fcntl is None:
+            yield
+            return
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.metrics_dir / ".lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _compact(self):
+        """종료된 프로세스의 스냅샷을 archive.json에 합치고 삭제 (잠금 안에서 호출)"""
+        if fcntl is None:
+            return
+        archive_path = self.metrics_dir / ARCHIVE_FILE
+        dead = [path for path in self.metrics_dir.glob("*-*.json") if not _pid_alive(path.name.split('-', 1)[0])]
+        if not dead:
+            return
+        archive = _read_snapshot(archive_path) or _empty_snapshot()
+        for path in dead:
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                _merge_snapshot(archive, snapshot)
+        tmp_path = archive_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(archive, f, ensure_ascii=False)
+        os.replace(tmp_path, archive_path)
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _empty_snapshot() -> Dict[str, Any]:
+    return {'counters': [], 'histograms': []}
+
+
+def _read_snapshot(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge_snapshot(total: Dict[str, Any], snapshot: Dict[str, Any]):
+    """snapshot 값을 total에 더함"""
+    for section in ('counters', 'histograms'):
+        index = {(entry[0], _label_key(entry[1])): entry for entry in total[section]}
+        for name, labels, value in snapshot.get(section, []):
+            entry = index.get((name, _label_key(labels)))
+            if entry is None:
+                entry = index[(name, _label_key(labels))] = [name, labels, 0 if section == 'counters' else [0] * len(value)]
+                total[section].append(entry)
+            if section == 'counters':
+                entry[2] += value
+            else:
+                entry[2] = [a + b for a, b in zip(entry[2], value)]
+
+
+def _pid_alive(pid_text: str) -> bool:
+    try:
+        pid = int(pid_text)
+    except ValueError:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ----------------------------------------------------------------------
+# Prometheus text format
+# ----------------------------------------------------------------------
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, Any], extra: Tuple[str, str] = None) -> str:
+    items = sorted((str(key), str(value)) for key, value in labels.items())
+    if extra:
+        items.append(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(snapshot: Dict[str, Any] = None) -> str:
+    """누적값을 Prometheus text format(0.0.4)으로 변환"""
+    snapshot = snapshot if snapshot is not None else get_metrics().collect()
+    series: Dict[str, List[str]] = {}
+    for name, labels, value in sorted(snapshot['counters'], key=lambda entry: (entry[0], _label_key(entry[1]))):
+        series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for name, labels, buckets in sorted(snapshot['histograms'], key=lambda entry: (entry[0], _label_key(entry[1]))):
+        lines = series.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), buckets[:-1]):
+            cumulative += count
+            le = "+Inf" if bound == float('inf') else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {_format_value(cumulative)}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(buckets[-1])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+
+    output = []
+    for name in sorted(series):
+        kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(series[name])
+    return "\n".join(output) + "\n"
+
+
+# ----------------------------------------------------------------------
+# 단계 측정
+# ----------------------------------------------------------------------
+class Span:
+    """
+    단계 1회 실행 시간 측정
+
+    with span('ingest') as s:
+        ...
+        s.items = len(df)
+
+    with 블록 대신 s = span('ingest') → s.finish(items=...)로 직접 끝낼 수도 있음
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.items: Optional[float] = None
+        self.started = time.perf_counter()
+        self.seconds: Optional[float] = None
+
+    def finish(self, items: Optional[float] = None, error: bool = False) -> float:
+        if self.seconds is not None:
+            return self.seconds
+        if items is not None:
+            self.items = items
+        self.seconds = time.perf_counter() - self.started
+        if error:
+            get_metrics().inc('scorereport_stage_errors_total', stage=self.stage)
+        record(self.stage, self.seconds, self.items)
+        return self.seconds
+
+    def __enter__(self) -> 'Span':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=exc_type is not None)
+        return False
+
+
+def span(stage: str) -> Span:
+    """단계 시간 측정 시작 (with 문 또는 finish()로 종료)"""
+    return Span(stage)
+
+
+def record(stage: str, seconds: float, items: Optional[float] = None):
+    """이미 잰 단계 시간 기록 (여러 번 나눠 잰 시간의 합계 등)"""
+    metrics = get_metrics()
+    metrics.observe('scorereport_stage_seconds', seconds, stage=stage)
+    if items:
+        metrics.inc('scorereport_stage_items_total', items, stage=stage)
+    summary = _current_summary.get()
+    if summary is not None:
+        summary.add(stage, seconds, items)
+
+
+def count(name: str, value: float = 1, **labels):
+    """카운터 증가 (예: count('scorereport_reports_total', result='success'))"""
+    get_metrics().inc(name, value, **labels)
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """프로세스 공유 레지스트리 (METRICS_DIR 환경 변수가 있으면 프로세스 간 합산)"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics(os.environ.get('METRICS_DIR') or None)
+                atexit.register(_metrics.flush)
+    return _metrics
@@ -0,0 +1,575 @@
+"""
+OMR 답안 채점
+정답표(과목번호, 문항, 정답, 배점)와 학생 응답표를 NumPy 배열로 비교해
+총점/만점/정답수/오답번호를 계산하고, 결과를 CSV 없이 DataProcessor에 바로 넣음
+
+채점한 응답 행렬과 문항별 정오 행렬은 메모리에 남겨 두므로,
+정답 정정/복수정답 인정 시 해당 문항 열만 다시 비교해 바뀐 학생만 갱신
+"""
+
+import re
+import sys
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from metrics import span
+
+
+# 응답표 문항 컬럼: Q1, 주관식Q16 ...
+ITEM_COLUMN = re.compile(r'^(?:주관식)?\s*Q(\d+)$', re.IGNORECASE)
+# 탐구 2과목 응답표 문항 컬럼: 1-3, 2_15 (엑셀이 날짜로 바꾼 "1월 3일" 형태 포함)
+ELECTIVE_COLUMN = re.compile(r'^([12])\s*(?:-|_|월)\s*(\d+)\s*일?$')
+
+# 과목코드 컬럼 이름 (영어 응답표는 과목번호 사용)
+CODE_COLUMNS = ('과목코드', '과목번호')
+# 탐구 선택과목 컬럼
+ELECTIVE_CODE_COLUMNS = ('선택1', '선택2')
+# 오답이 없을 때 오답번호 표시 (기존 채점결과 파일과 동일)
+NO_WRONG_ANSWERS = '없음'
+# 정답표의 복수정답 구분자 (예: "3,5", "3/5")
+ANSWER_SEPARATOR = re.compile(r'[,/|]')
+
+
+def _read_table(file_path: str) -> pd.DataFrame:
+    """CSV/엑셀 파일 읽기 (CSV는 UTF-8 → CP949 순서로 시도)"""
+    if file_path.endswith('.csv'):
+        try:
+            return pd.read_csv(file_path, encoding='utf-8-sig')
+        except UnicodeDecodeError:
+            return pd.read_csv(file_path, encoding='cp949')
+    if file_path.endswith('.xlsx'):
+        return pd.read_excel(file_path)
+    raise ValueError("지원하지 않는 파일 형식입니다. (.csv 또는 .xlsx만 가능)")
+
+
+def normalize_code(value) -> Optional[str]:
+    """과목코드 정리 (1.0 → "1", 빈 값은 None)"""
+    if pd.isna(value):
+        return None
+    text = str(value).strip()
+    try:
+        number = float(text)
+        if number.is_integer():
+            return str(int(number))
+    except ValueError:
+        pass
+    return text or None
+
+
+class AnswerKey:
+    """
+    과목번호별 정답표
+
+    과목번호마다 문항 번호 / 정답 / 배점 배열을 보관하고,
+    응답표의 문항 순서에 맞춘 배열을 만들어 줌 (주관식 정답은 숫자로 비교)
+    복수정답 문항은 정답 배열에 첫 번째 정답, alternatives에 인정하는 정답 전체를 보관
+    """
+
+    def __init__(self, keys: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                 alternatives: Dict[str, Dict[int, np.ndarray]] = None):
+        self.keys = keys
+        self.alternatives = alternatives or {}  # 과목번호 → {문항: 인정 정답 배열}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'AnswerKey':
+        required_columns = ['과목번호', '문항', '정답', '배점']
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"정답표에 필수 컬럼이 누락되었습니다: {missing_columns}")
+
+        df = df.dropna(subset=['과목번호', '문항'])
+        codes = df['과목번호'].map(normalize_code)
+        items = pd.to_numeric(df['문항'], errors='coerce')
+        answers = pd.to_numeric(df['정답'], errors='coerce')
+        points = pd.to_numeric(df['배점'], errors='coerce').fillna(0)
+
+        # 숫자로 읽히지 않는 정답 중 "3,5" 같은 복수정답 (첫 번째 정답을 대표 정답으로)
+        multiple = {}
+        for row in np.flatnonzero((answers.isna() & df['정답'].notna()).to_numpy()):
+            accepted = cls.parse_answers(df['정답'].iat[row])
+            if len(accepted):
+                multiple[row] = accepted
+                answers.iat[row] = accepted[0]
+
+        keys = {}
+        alternatives = {}
+        for code, rows in df.groupby(codes, sort=False).indices.items():
+            order = np.argsort(items.to_numpy()[rows], kind='stable')
+            rows = rows[order]
+            keys[code] = (
+                items.to_numpy(dtype=np.int64)[rows],
+                answers.to_numpy(dtype=float)[rows],
+                points.to_numpy(dtype=float)[rows],
+            )
+            for row in rows:
+                if len(multiple.get(row, ())) > 1:
+                    alternatives.setdefault(code, {})[int(items.iat[row])] = multiple[row]
+        return cls(keys, alternatives)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'AnswerKey':
+        return cls.from_frame(_read_table(file_path))
+
+    @staticmethod
+    def parse_answers(value) -> np.ndarray:
+        """정답 값 → 인정 정답 배열 ("3,5" → [3., 5.], 숫자가 아닌 조각은 무시)"""
+        if isinstance(value, (list, tuple, set, np.ndarray)):
+            parts = list(value)
+        else:
+            parts = ANSWER_SEPARATOR.split(str(value))
+        numbers = pd.to_numeric(pd.Series(parts, dtype=object), errors='coerce').dropna()
+        return np.asarray(list(dict.fromkeys(numbers.tolist())), dtype=float)
+
+    @property
+    def codes(self) -> List[str]:
+        return list(self.keys)
+
+    def accepted(self, code: str, item: int) -> np.ndarray:
+        """문항 1개의 인정 정답 배열 (정답표에 없거나 정답이 비어 있으면 빈 배열)"""
+        if item in self.alternatives.get(code, {}):
+            return self.alternatives[code][item]
+        items, answers, _ = self.keys[code]
+        found = np.flatnonzero(items == item)
+        if not len(found) or np.isnan(answers[found[0]]):
+            return np.array([], dtype=float)
+        return answers[found[:1]]
+
+    def set_answer(self, code: str, item: int, answers, points: Optional[float] = None):
+        """
+        문항 1개의 정답 정정 / 복수정답 인정
+
+        Args:
+            code: 과목번호
+            item: 문항 번호 (정답표에 있는 문항)
+            answers: 새 정답 (숫자 1개, [3, 5] 같은 목록, "3,5" 같은 문자열)
+            points: 새 배점 (None이면 그대로)
+        """
+        if code not in self.keys:
+            raise ValueError(f"정답표에 없는 과목번호입니다: {code}")
+        items, key_answers, key_points = self.keys[code]
+        found = np.flatnonzero(items == item)
+        if not len(found):
+            raise ValueError(f"정답표에 없는 문항입니다: 과목번호 {code} {item}번")
+        accepted = self.parse_answers(answers)
+        if not len(accepted):
+            raise ValueError(f"정답을 숫자로 읽을 수 없습니다: {answers}")
+
+        # 배열은 다른 곳(채점 상태 등)과 공유될 수 있으므로 복사 후 교체
+        key_answers = key_answers.copy()
+        key_answers[found] = accepted[0]
+        if points is not None:
+            key_points = key_points.copy()
+            key_points[found] = float(points)
+        self.keys[code] = (items, key_answers, key_points)
+
+        code_alternatives = self.alternatives.setdefault(code, {})
+        if len(accepted) > 1:
+            code_alternatives[item] = accepted
+        else:
+            code_alternatives.pop(item, None)
+
+    def max_score(self, code: str) -> float:
+        """과목번호의 만점 (배점 합계)"""
+        return float(self.keys[code][2].sum())
+
+    def aligned(self, code: str, item_numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        응답표 문항 순서에 맞춘 (정답, 배점) 배열
+
+        정답표에 없는 문항은 정답 NaN(항상 오답 아님), 배점 0
+        """
+        items, answers, points = self.keys[code]
+        position = np.searchsorted(items, item_numbers)
+        position = np.minimum(position, len(items) - 1)
+        found = items[position] == item_numbers
+        return np.where(found, answers[position], np.nan), np.where(found, points[position], 0.0)
+
+    def aligned_alternatives(self, code: str, item_numbers: np.ndarray) -> Dict[int, np.ndarray]:
+        """응답표 열 번호 → 인정 정답 배열 (복수정답 문항만)"""
+        result = {}
+        for item, accepted in self.alternatives.get(code, {}).items():
+            for column in np.flatnonzero(item_numbers == item):
+                result[int(column)] = accepted
+        return result
+
+    def answer_matrix(self, codes: np.ndarray, item_numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """학생별 (정답, 배점) 행렬 (학생 수 × 문항 수, 정답표에 없는 과목코드/문항은 정답 NaN, 배점 0)"""
+        answers = np.full((len(codes), len(item_numbers)), np.nan)
+        points = np.zeros((len(codes), len(item_numbers)))
+        code_series = pd.Series(codes, dtype=object)
+        for code, rows in code_series.groupby(code_series, sort=False).indices.items():
+            if code in self.keys:
+                answers[rows], points[rows] = self.aligned(code, item_numbers)
+        return answers, points
+
+
+class OMRScorer:
+    """
+    학생 응답표 채점
+
+    - 과목코드별로 (학생 수 × 문항 수) 응답 행렬을 정답 배열과 한 번에 비교
+    - 빈 응답, 숫자가 아닌 응답(중복 마킹 등)은 오답
+    - 결과는 load_subject_data가 읽는 채점결과 형식
+      (수험번호, 과목코드, 총점, 만점, 정답수, 오답번호, 선택과목, 선택과목코드)
+    """
+
+    RESULT_COLUMNS = ['수험번호', '과목코드', '총점', '만점', '정답수', '오답번호', '선택과목', '선택과목코드']
+
+    def __init__(self, answer_key: AnswerKey, subject_names: Dict[str, str] = None):
+        """
+        Args:
+            answer_key: 정답표
+            subject_names: 과목코드 → 선택과목 이름 (없으면 과목 이름 사용)
+        """
+        self.answer_key = answer_key
+        self.subject_names = subject_names or {}
+        # 과목 → 마지막 채점 상태 (정답 정정 시 다시 채점하는 데 사용)
+        self.states: Dict[str, ScoredSubject] = {}
+
+    # ------------------------------------------------------------------
+    # 응답표 해석
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _item_columns(columns: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """단일 과목 응답표의 문항 컬럼과 문항 번호 (TOTAL 등 다른 컬럼은 무시)"""
+        names, numbers = [], []
+        for column in columns:
+            match = ITEM_COLUMN.match(str(column).strip())
+            if match:
+                names.append(column)
+                numbers.append(int(match.group(1)))
+        return names, np.asarray(numbers, dtype=np.int64)
+
+    @staticmethod
+    def _elective_columns(columns: Sequence[str], elective: int) -> Tuple[List[str], np.ndarray]:
+        """탐구 2과목 응답표에서 elective(1 또는 2)번째 과목의 문항 컬럼과 문항 번호"""
+        names, numbers = [], []
+        for column in columns:
+            match = ELECTIVE_COLUMN.match(str(column).strip())
+            if match and int(match.group(1)) == elective:
+                names.append(column)
+                numbers.append(int(match.group(2)))
+        return names, np.asarray(numbers, dtype=np.int64)
+
+    @staticmethod
+    def _response_matrix(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """응답 컬럼 → float 행렬 (빈 값/숫자가 아닌 값은 NaN)"""
+        return df[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+    # ------------------------------------------------------------------
+    # 채점
+    # ------------------------------------------------------------------
+    def score_matrix(self, student_ids: np.ndarray, codes: np.ndarray, responses: np.ndarray,
+                     item_numbers: np.ndarray, subject: str) -> pd.DataFrame:
+        """
+        응답 행렬 채점 (채점 상태는 states[subject]에 보관 → correct_answer()로 정답 정정 반영)
+
+        Args:
+            student_ids: 수험번호 배열 (학생 수)
+            codes: 과목코드 배열 (정리된 문자열, 없으면 None)
+            responses: 응답 행렬 (학생 수 × 문항 수)
+            item_numbers: 응답 행렬 열의 문항 번호
+            subject: 과목 이름 (선택과목 이름이 없을 때 사용)
+
+        Returns:
+            DataFrame: 채점결과 (입력 순서 유지, 정답표에 없는 과목코드 학생은 제외)
+        """
+        state = ScoredSubject(subject, student_ids, codes, responses, item_numbers, self.subject_names)
+        for code, rows in state.code_rows.items():
+            if code not in self.answer_key.keys:
+                print(f"[채점] {subject}: 정답표에 없는 과목코드 {code} ({len(rows)}명) 건너뜀")
+                continue
+            state.score_code(code, self.answer_key)
+        self.states[subject] = state
+        return state.frame()
+
+    def correct_answer(self, code: str, item: int, answers, points: Optional[float] = None
+                       ) -> Dict[str, pd.DataFrame]:
+        """
+        정답 정정 / 복수정답 인정 (응답표를 다시 읽지 않고 해당 문항 열만 다시 채점)
+
+        Args:
+            code: 과목번호
+            item: 문항 번호
+            answers: 새 정답 (숫자 1개, [3, 5] 같은 목록, "3,5" 같은 문자열)
+            points: 새 배점 (None이면 그대로)
+
+        Returns:
+            Dict[str, DataFrame]: 과목별로 채점결과가 바뀐 학생의 행 (RESULT_COLUMNS)
+        """
+        code = normalize_code(code)
+        changes = {}
+        with span('scoring') as scoring_span:
+            self.answer_key.set_answer(code, item, answers, points)
+            for subject, state in self.states.items():
+                rows = state.apply_key_change(code, item, self.answer_key)
+                if len(rows):
+                    changes[subject] = state.frame(rows)
+            scoring_span.items = sum(len(result) for result in changes.values())
+        accepted = ', '.join(f"{answer:g}" for answer in self.answer_key.accepted(code, item))
+        print(f"[정답정정] 과목번호 {code} {item}번 → 정답 {accepted}: "
+              f"{sum(len(result) for result in changes.values())}명 결과 변경")
+        return changes
+
+    def _student_ids(self, df: pd.DataFrame) -> np.ndarray:
+        if '수험번호' not in df.columns:
+            raise ValueError("응답표에 수험번호 컬럼이 없습니다.")
+        return np.array([normalize_code(value) for value in df['수험번호']], dtype=object)
+
+    def response_arrays(self, df: pd.DataFrame, elective: Optional[int] = None
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        응답표 → (수험번호, 과목코드, 응답 행렬, 문항 번호) 배열
+
+        Args:
+            df: 응답표 (수험번호가 없는 행은 제외)
+            elective: 탐구 2과목 응답표에서 꺼낼 과목 (1 또는 2), 단일 과목 응답표는 None
+        """
+        if elective is None:
+            code_column = next((col for col in CODE_COLUMNS if col in df.columns), None)
+            if code_column is None:
+                raise ValueError(f"응답표에 과목코드 컬럼이 없습니다: {list(CODE_COLUMNS)}")
+            columns, item_numbers = self._item_columns(df.columns)
+            if not columns:
+                raise ValueError("응답표에서 문항 컬럼(Q1, Q2 ...)을 찾을 수 없습니다.")
+        else:
+            code_column = ELECTIVE_CODE_COLUMNS[elective - 1]
+            columns, item_numbers = self._elective_columns(df.columns, elective)
+            if code_column not in df.columns or not columns:
+                raise ValueError(f"응답표에서 {code_column} 과목 컬럼을 찾을 수 없습니다.")
+
+        df = df[df['수험번호'].notna()] if '수험번호' in df.columns else df
+        codes = np.array([normalize_code(value) for value in df[code_column]], dtype=object)
+        return self._student_ids(df), codes, self._response_matrix(df, columns), item_numbers
+
+    def score_sheet(self, df: pd.DataFrame, subject: str) -> pd.DataFrame:
+        """단일 과목 응답표 채점 (과목코드/과목번호 + Q1.. 문항 컬럼)"""
+        return self.score_matrix(*self.response_arrays(df), subject)
+
+    def score_elective_sheet(self, df: pd.DataFrame,
+                             subjects: Tuple[str, str] = ('탐구1', '탐구2')) -> Dict[str, pd.DataFrame]:
+        """탐구 2과목 응답표 채점 (선택1/선택2 + 1-1.., 2-1.. 문항 컬럼) → {탐구1: 결과, 탐구2: 결과}"""
+        return {
+            subject: self.score_matrix(*self.response_arrays(df, elective), subject)
+            for elective, subject in enumerate(subjects, 1)
+        }
+
+    def score(self, df: pd.DataFrame, subject: str) -> Dict[str, pd.DataFrame]:
+        """응답표 형식을 확인해 채점 → {과목: 채점결과}"""
+        with span('scoring') as scoring_span:
+            scoring_span.items = len(df)
+            if all(col in df.columns for col in ELECTIVE_CODE_COLUMNS):
+                return self.score_elective_sheet(df, (f"{subject}1", f"{subject}2"))
+            return {subject: self.score_sheet(df, subject)}
+
+    def score_file(self, file_path: str, subject: str) -> Dict[str, pd.DataFrame]:
+        """응답표 파일 채점"""
+        return self.score(_read_table(file_path), subject)
+
+
+class ScoredSubject:
+    """
+    과목 1개의 채점 상태
+
+    응답 행렬과 문항별 정오 행렬(학생 수 × 문항 수)을 그대로 보관하고,
+    정답 정정 시 해당 문항 열만 다시 비교해 총점/정답수를 차이만큼 고치고
+    정오가 바뀐 학생의 오답번호만 다시 만듦
+    """
+
+    def __init__(self, subject: str, student_ids: np.ndarray, codes: np.ndarray, responses: np.ndarray,
+                 item_numbers: np.ndarray, subject_names: Dict[str, str] = None):
+        n = len(student_ids)
+        self.subject = subject
+        self.student_ids = np.array([str(student_id) for student_id in student_ids], dtype=object)
+        self.codes = codes
+        self.responses = responses
+        self.item_numbers = item_numbers
+        # 오답번호 문자열 조립용: "1, 2, 3, ..."의 바이트와 바이트별 문항 열 번호
+        segments = [f"{number}, ".encode('ascii') for number in item_numbers]
+        self._label_bytes = np.frombuffer(b''.join(segments), dtype=np.uint8)
+        self._label_owner = np.repeat(np.arange(len(segments)), [len(segment) for segment in segments])
+        self.names = np.array([(subject_names or {}).get(code, subject) if code else '' for code in codes],
+                              dtype=object)
+
+        code_series = pd.Series(codes, dtype=object)
+        self.code_rows: Dict[str, np.ndarray] = code_series.groupby(code_series, sort=False).indices
+        self.correct = np.zeros(responses.shape, dtype=bool)
+        # 과목번호 → 채점에 쓴 (정답표에 있는 문항 여부, 배점) 배열
+        self.in_key: Dict[str, np.ndarray] = {}
+        self.points: Dict[str, np.ndarray] = {}
+
+        self.total = np.zeros(n)
+        self.max_score = np.zeros(n)
+        self.correct_count = np.zeros(n, dtype=np.int64)
+        self.wrong_text = np.full(n, NO_WRONG_ANSWERS, dtype=object)
+        self.scored = np.zeros(n, dtype=bool)
+
+    def _accepted_column(self, rows: np.ndarray, column: int, accepted: np.ndarray) -> np.ndarray:
+        """응답 열 1개가 인정 정답 중 하나인지 (NaN 응답은 항상 오답)"""
+        return np.isin(self.responses[rows, column], accepted)
+
+    def _wrong_texts(self, wrong: np.ndarray) -> np.ndarray:
+        """
+        오답 행렬 → 행별 오답번호 문자열 ("3, 7, 12", 오답이 없으면 NO_WRONG_ANSWERS)
+
+        문항 번호 바이트를 오답 여부로 한 번에 골라낸 뒤 행 길이대로 잘라 씀 (행마다 join하지 않음)
+        """
+        texts = np.full(len(wrong), NO_WRONG_ANSWERS, dtype=object)
+        if not len(wrong):
+            return texts
+        selected = wrong[:, self._label_owner]
+        data = np.broadcast_to(self._label_bytes, selected.shape)[selected].tobytes().decode('ascii')
+        start = 0
+        for row, end in enumerate(np.cumsum(selected.sum(axis=1)).tolist()):
+            if end > start:
+                texts[row] = data[start:end - 2]  # 끝의 ", " 제외
+                start = end
+        return texts
+
+    def score_code(self, code: str, answer_key: AnswerKey):
+        """과목번호 1개의 학생 전체 채점"""
+        rows = self.code_rows[code]
+        answers, points = answer_key.aligned(code, self.item_numbers)
+        in_key = ~np.isnan(answers)
+
+        # 과목코드 하나에 대해 응답 행렬 전체를 한 번에 비교 (NaN 응답은 항상 오답)
+        correct = self.responses[rows] == answers
+        for column, accepted in answer_key.aligned_alternatives(code, self.item_numbers).items():
+            correct[:, column] = self._accepted_column(rows, column, accepted)
+        wrong = ~correct & in_key
+
+        self.correct[rows] = correct
+        self.in_key[code] = in_key
+        self.points[code] = points
+        self.total[rows] = correct @ points
+        self.max_score[rows] = answer_key.max_score(code)
+        self.correct_count[rows] = correct.sum(axis=1)
+        self.scored[rows] = True
+        self.wrong_text[rows] = self._wrong_texts(wrong)
+
+    def apply_key_change(self, code: str, item: int, answer_key: AnswerKey) -> np.ndarray:
+        """
+        정답표에서 바뀐 문항 1개를 반영
+
+        Returns:
+            np.ndarray: 채점결과(총점/만점/정답수/오답번호)가 바뀐 행 번호
+        """
+        rows = self.code_rows.get(code)
+        columns = np.flatnonzero(self.item_numbers == item)
+        if rows is None or code not in self.points or not len(columns):
+            return np.array([], dtype=np.int64)
+
+        answers, points = answer_key.aligned(code, self.item_numbers)
+        in_key = ~np.isnan(answers)
+        accepted = answer_key.accepted(code, item)
+        old_points = self.points[code]
+        changed = np.zeros(len(rows), dtype=bool)
+        flipped = np.zeros(len(rows), dtype=bool)
+        for column in columns:
+            old = self.correct[rows, column]
+            new = self._accepted_column(rows, column, accepted)
+            delta = new * points[column] - old * old_points[column]
+            self.total[rows] += delta
+            self.correct_count[rows] += new.astype(np.int64) - old
+            self.correct[rows, column] = new
+            flipped |= old != new
+            changed |= delta != 0
+        self.points[code] = points
+
+        if not np.array_equal(points, old_points):
+            # 배점이 바뀌면 만점도 바뀌므로 과목번호 학생 전체
+            self.max_score[rows] = answer_key.max_score(code)
+            changed[:] = True
+
+        # 정오가 바뀐 학생만 오답번호 다시 만들기
+        # (정답이 비어 있던 문항에 정답이 생기면 정오가 그대로인 오답 학생도 오답번호에 추가되므로 전체)
+        rewrite = flipped.copy()
+        if not np.array_equal(in_key, self.in_key[code]):
+            self.in_key[code] = in_key
+            rewrite[:] = True
+        rewrite_rows = rows[rewrite]
+        texts = self._wrong_texts(~self.correct[rewrite_rows] & in_key)
+        changed[rewrite] |= texts != self.wrong_text[rewrite_rows]
+        self.wrong_text[rewrite_rows] = texts
+        return rows[changed | flipped]
+
+    def frame(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """채점결과 DataFrame (rows를 주면 해당 행만, 채점하지 않은 학생은 제외)"""
+        if rows is None:
+            rows = np.arange(len(self.student_ids))
+        rows = rows[self.scored[rows]]
+        codes = np.asarray(self.codes, dtype=object)[rows]
+        return pd.DataFrame({
+            '수험번호': self.student_ids[rows],
+            '과목코드': codes,
+            '총점': self.total[rows],
+            '만점': self.max_score[rows],
+            '정답수': self.correct_count[rows],
+            '오답번호': self.wrong_text[rows],
+            '선택과목': self.names[rows],
+            '선택과목코드': codes,
+        }, columns=OMRScorer.RESULT_COLUMNS)
+
+
+def score_into_processor(processor, subject: str, responses_path: str, answer_key_path: str,
+                         subject_names: Dict[str, str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    응답표를 채점해 DataProcessor 과목 데이터로 바로 설정
+
+    탐구 2과목 응답표는 "<과목>1", "<과목>2" 두 과목으로 나뉨 (예: 탐구 → 탐구1, 탐구2)
+
+    Returns:
+        Dict[str, DataFrame]: 과목별 채점결과
+    """
+    scorer = OMRScorer(AnswerKey.from_file(answer_key_path), subject_names)
+    results = scorer.score_file(responses_path, subject)
+    for name, result in results.items():
+        processor.set_subject_data(name, result)
+    return results
+
+
+def apply_answer_correction(processor, scorer: OMRScorer, code: str, item: int, answers,
+                            points: Optional[float] = None) -> List[str]:
+    """
+    정답 정정 / 복수정답 인정을 채점 상태와 DataProcessor에 반영
+    (바뀐 학생만 과목 데이터를 고치고 등급을 다시 계산)
+
+    Args:
+        processor: scorer의 채점결과를 과목 데이터로 설정한 DataProcessor
+        scorer: 해당 과목을 채점한 OMRScorer
+        code, item, answers, points: OMRScorer.correct_answer() 참고
+
+    Returns:
+        List[str]: 결과가 바뀐 학생 수험번호
+    """
+    changed_ids = []
+    for subject, rows in scorer.correct_answer(code, item, answers, points).items():
+        if subject in processor.subject_data:
+            changed_ids += processor.update_subject_rows(subject, rows)
+    return list(dict.fromkeys(changed_ids))
+
+
+def main():
+    """명령행: 응답표를 채점해 <과목>_채점결과_<시각>.csv 저장"""
+    if len(sys.argv) < 4:
+        print("사용법:")
+        print("  python omr_scorer.py <정답표> <응답표> <과목>")
+        print()
+        print("예시:")
+        print("  python omr_scorer.py 11dupukorean.csv korean.csv 국어")
+        print("  python omr_scorer.py 11duputamgu.csv 11tamguresults.csv 탐구")
+        return
+
+    answer_key_path, responses_path, subject = sys.argv[1:4]
+    scorer = OMRScorer(AnswerKey.from_file(answer_key_path))
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    for name, result in scorer.score_file(responses_path, subject).items():
+        output_path = f"{name}_채점결과_{timestamp}.csv"
+        result.to_csv(output_path, index=False, encoding='utf-8-sig')
+        print(f"[채점] {name}: {len(result)}명 → {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+내용 기반 PDF 캐시
+렌더링된 HTML(+ 템플릿 버전, 출력 옵션)의 해시를 키로 완성된 PDF를 디스크에 보관하고,
+같은 내용을 다시 출력할 때는 Chromium 대신 캐시 파일을 링크/복사
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import pathlib
+import tempfile
+from typing import Any, Dict, Optional
+
+from disk_cache import DiskCache, SharedCache
+
+
+BASE_DIR = pathlib.Path(__file__).parent
+DEFAULT_CACHE_DIR = BASE_DIR / "cache" / "pdf"
+DEFAULT_MAX_BYTES = int(float(os.environ.get('PDF_CACHE_MAX_MB', '512')) * 1024 * 1024)
+
+
+class PDFCache(DiskCache):
+    """
+    해시 키 → PDF 파일
+
+    - 캐시 적중 시 출력 경로에 하드링크 (다른 파일 시스템이면 복사)
+    - 적중/저장할 때 파일 수정 시각을 갱신하고, 용량을 넘으면 오래 안 쓴 것부터 삭제 (LRU, DiskCache)
+    """
+
+    EXTS = (".pdf",)
+    LOG_TAG = "PDF캐시"
+
+    def __init__(self, cache_dir: pathlib.Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+    # ------------------------------------------------------------------
+    # 키 계산
+    # ------------------------------------------------------------------
+    @staticmethod
+    def make_key(content, version: str = "", options: Dict[str, Any] = None) -> str:
+        """HTML 내용 + 템플릿 버전 + 출력 옵션의 SHA-256"""
+        digest = hashlib.sha256()
+        digest.update(str(version).encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(json.dumps(options or {}, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(content.encode('utf-8') if isinstance(content, str) else content)
+        return digest.hexdigest()
+
+    def key_for_item(self, item: Dict[str, Any]) -> str:
+        """배치 변환 항목(html 또는 html_file)의 캐시 키"""
+        options = {"format": item.get("format", "A4"), "margin": item.get("margin")}
+        if "html" in item:
+            content = item["html"]
+        else:
+            # 파일 변환은 HTML 파일 내용 기준 (파일이 참조하는 외부 리소스 변경은 감지하지 않음)
+            with open(item["html_file"], 'rb') as f:
+                content = f.read()
+        return self.make_key(content, item.get("version", ""), options)
+
+    # ------------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------------
+    def _path(self, key: str) -> pathlib.Path:
+        base = self._path_base(key)
+        return base.with_name(base.name + ".pdf")
+
+    def get(self, key: str, dest: str) -> bool:
+        """캐시에 있으면 dest에 링크(또는 복사)하고 True 반환"""
+        path = self._path(key)
+        if not path.exists():
+            self.misses += 1
+            return False
+        try:
+            if os.path.lexists(dest):
+                os.remove(dest)
+            try:
+                os.link(path, dest)
+            except OSError:
+                shutil.copyfile(path, dest)
+            self._touch(path)
+        except FileNotFoundError:
+            # 다른 프로세스가 방금 삭제한 경우
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key: str, src: str):
+        """완성된 PDF를 캐시에 저장 (출력 파일과 별도 사본)"""
+        path = self._path(key)
+        if path.exists():
+            self._touch(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        self._install(tmp_path, path)
+
+    @staticmethod
+    def prepare_output(dest: str):
+        """새로 출력하기 전에 기존 파일 제거 (캐시 파일과 하드링크된 경우 캐시가 덮어써지지 않도록)"""
+        if os.path.lexists(dest):
+            os.remove(dest)
+
+
+_shared = SharedCache('PDF_CACHE_ENABLED',
+                      lambda: PDFCache(pathlib.Path(os.environ.get('PDF_CACHE_DIR', DEFAULT_CACHE_DIR))))
+
+
+def get_pdf_cache() -> Optional[PDFCache]:
+    """프로세스 공유 PDF 캐시 (PDF_CACHE_ENABLED=0이면 None)"""
+    return _shared.get()
@@ -3,11 +3,21 @@ Playwright를 사용한 HTML → PDF 변환기
 최신 CSS/폰트/레이아웃을 그대로 유지하면서 PDF 생성
 """
 
+import os
+import re
+import math
+import time
+import queue
 import asyncio
 import urllib.parse
 from pathlib import Path
 from playwright.async_api import async_playwright
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from browser_pool import get_browser_pool
+
+
+# 배치 변환 기본값
+DEFAULT_BATCH_TIMEOUT = float(os.environ.get('PDF_RENDER_TIMEOUT', '60'))
 
 
 class PlaywrightPDFConverter:
@@ -49,29 +59,7 @@ class PlaywrightPDFConverter:
             bool: 변환 성공 여부
         """
         try:
-            # 로컬 파일 경로를 file:// URI로 변환
-            html_path = Path(input_html).resolve().as_uri()
-            await self.page.goto(html_path)
-            
-            # PDF 생성 옵션
-            pdf_options = {
-                "path": output_pdf,
-                "format": format,
-                "print_background": True,
-                "prefer_css_page_size": True
-            }
-            
-            # 여백 설정
-            if margin is None:
-                margin = {
-                    "top": "12mm",
-                    "right": "12mm", 
-                    "bottom": "12mm",
-                    "left": "12mm"
-                }
-            pdf_options["margin"] = margin
-            
-            await self.page.pdf(**pdf_options)
+            await self.print_file(self.page, input_html, output_pdf, format, margin)
             return True
             
         except Exception as e:
@@ -93,55 +81,319 @@ class PlaywrightPDFConverter:
             bool: 변환 성공 여부
         """
         try:
-            # HTML 문자열을 data URL로 변환
-            data_url = "data:text/html;charset=utf-8," + urllib.parse.quote(html_string)
-            await self.page.goto(data_url)
-            
-            # PDF 생성 옵션
-            pdf_options = {
-                "path": output_pdf,
-                "format": format,
-                "print_background": True,
-                "prefer_css_page_size": True
-            }
-            
-            # 여백 설정
-            if margin is None:
-                margin = {
-                    "top": "12mm",
-                    "right": "12mm",
-                    "bottom": "12mm", 
-                    "left": "12mm"
-                }
-            pdf_options["margin"] = margin
-            
-            await self.page.pdf(**pdf_options)
+            await self.print_string(self.page, html_string, output_pdf, format, margin)
             return True
             
         except Exception as e:
             print(f"HTML 문자열 → PDF 변환 오류: {str(e)}")
             return False
+    
+    @staticmethod
+    def _pdf_options(output_pdf: str, format: str = "A4", margin: dict = None) -> dict:
+        """page.pdf() 옵션 구성"""
+        pdf_options = {
+            "path": output_pdf,
+            "format": format,
+            "print_background": True,
+            "prefer_css_page_size": True
+        }
+        
+        # 여백 설정
+        if margin is None:
+            margin = {
+                "top": "12mm",
+                "right": "12mm",
+                "bottom": "12mm",
+                "left": "12mm"
+            }
+        pdf_options["margin"] = margin
+        return pdf_options
+    
+    @classmethod
+    async def print_file(cls, page, input_html: str, output_pdf: str,
+                         format: str = "A4", margin: dict = None):
+        """주어진 페이지에서 HTML 파일을 열어 PDF로 출력"""
+        # 로컬 파일 경로를 file:// URI로 변환
+        html_path = Path(input_html).resolve().as_uri()
+        await page.goto(html_path)
+        await page.pdf(**cls._pdf_options(output_pdf, format, margin))
+    
+    @classmethod
+    async def print_string(cls, page, html_string: str, output_pdf: str,
+                           format: str = "A4", margin: dict = None):
+        """주어진 페이지에서 HTML 문자열을 열어 PDF로 출력"""
+        # HTML 문자열을 data URL로 변환
+        data_url = "data:text/html;charset=utf-8," + urllib.parse.quote(html_string)
+        await page.goto(data_url)
+        await page.pdf(**cls._pdf_options(output_pdf, format, margin))
+    
+    @classmethod
+    async def print_sections(cls, page, html_string: str, output_pdf: str, section_selector: str,
+                             format: str = "A4", margin: dict = None) -> List[int]:
+        """
+        여러 구역(예: 학생별 성적표)으로 된 HTML을 한 번의 page.pdf()로 출력
+        
+        각 구역은 CSS로 새 페이지에서 시작한다고 가정하고, 인쇄 레이아웃에서
+        구역 높이를 재서 구역별 페이지 수를 계산
+        
+        Returns:
+            List[int]: 문서 순서대로 구역별 페이지 수
+        """
+        content_width, content_height = cls._content_box_px(format, margin)
+        await page.set_viewport_size({"width": int(round(content_width)),
+                                      "height": int(round(content_height))})
+        await page.emulate_media(media="print")
+        # 큰 문서는 data URL 길이 제한에 걸리므로 set_content 사용
+        await page.set_content(html_string, wait_until="load")
+        heights = await page.evaluate(
+            "(selector) => Array.from(document.querySelectorAll(selector))"
+            ".map(el => el.getBoundingClientRect().height)",
+            section_selector
+        )
+        await page.pdf(**cls._pdf_options(output_pdf, format, margin))
+        return [max(1, math.ceil(height / content_height - 0.001)) for height in heights]
+    
+    @classmethod
+    def _content_box_px(cls, format: str = "A4", margin: dict = None) -> tuple:
+        """용지에서 여백을 뺀 인쇄 영역 크기 (CSS px)"""
+        width_mm, height_mm = PAGE_SIZES_MM.get(format, PAGE_SIZES_MM["A4"])
+        margin = cls._pdf_options("", format, margin)["margin"]
+        width = width_mm * PX_PER_MM - _length_to_px(margin.get("left")) - _length_to_px(margin.get("right"))
+        height = height_mm * PX_PER_MM - _length_to_px(margin.get("top")) - _length_to_px(margin.get("bottom"))
+        return width, height
+
+
+# 용지 크기 (mm)
+PAGE_SIZES_MM = {
+    "A3": (297, 420),
+    "A4": (210, 297),
+    "A5": (148, 210),
+    "Letter": (215.9, 279.4),
+    "Legal": (215.9, 355.6),
+}
+PX_PER_MM = 96 / 25.4
+
+
+def _length_to_px(value) -> float:
+    """CSS 길이("12mm", "1cm", "0.5in", "10px")를 px로 변환"""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    units = {"mm": PX_PER_MM, "cm": PX_PER_MM * 10, "in": 96.0, "px": 1.0}
+    for unit, factor in units.items():
+        if value.endswith(unit):
+            return float(value[:-len(unit)]) * factor
+    return float(value)
+
 
+def count_pdf_pages(pdf_path: str) -> int:
+    """PDF 파일의 페이지 수 (Chromium이 만든 PDF 기준의 간단한 계산)"""
+    with open(pdf_path, 'rb') as f:
+        data = f.read()
+    return len(re.findall(rb"/Type\s*/Page(?![a-zA-Z])", data))
 
-# 동기 래퍼 함수들
+
+# 동기 래퍼 함수들 (프로세스 공유 브라우저 풀 사용)
 def html_file_to_pdf_sync(input_html: str, output_pdf: str, 
                           format: str = "A4", margin: dict = None) -> bool:
     """HTML 파일을 PDF로 변환 (동기 버전)"""
-    async def _convert():
-        async with PlaywrightPDFConverter() as converter:
-            return await converter.html_file_to_pdf(input_html, output_pdf, format, margin)
-    
-    return asyncio.run(_convert())
+    try:
+        get_browser_pool().run(
+            lambda page: PlaywrightPDFConverter.print_file(page, input_html, output_pdf, format, margin)
+        )
+        return True
+    except Exception as e:
+        print(f"HTML 파일 → PDF 변환 오류: {str(e)}")
+        return False
 
 
 def html_string_to_pdf_sync(html_string: str, output_pdf: str,
-                            format: str = "A4", margin: dict = None) -> bool:
-    """HTML 문자열을 PDF로 변환 (동기 버전)"""
-    async def _convert():
-        async with PlaywrightPDFConverter() as converter:
-            return await converter.html_string_to_pdf(html_string, output_pdf, format, margin)
+                            format: str = "A4", margin: dict = None,
+                            cache=None, version: str = "") -> bool:
+    """HTML 문자열을 PDF로 변환 (동기 버전, cache가 있으면 같은 내용은 캐시에서 복사)"""
+    try:
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(html_string, version, {"format": format, "margin": margin})
+            if cache.get(cache_key, output_pdf):
+                return True
+            cache.prepare_output(output_pdf)
+        get_browser_pool().run(
+            lambda page: PlaywrightPDFConverter.print_string(page, html_string, output_pdf, format, margin)
+        )
+        if cache_key is not None:
+            cache.put(cache_key, output_pdf)
+        return True
+    except Exception as e:
+        print(f"HTML 문자열 → PDF 변환 오류: {str(e)}")
+        return False
+
+
+# 배치 변환 (여러 페이지 동시 출력)
+async def render_batch(items: Iterable[Dict[str, Any]], concurrency: int = None,
+                       timeout: float = DEFAULT_BATCH_TIMEOUT,
+                       on_result: Callable[[Dict[str, Any]], None] = None,
+                       should_cancel: Callable[[], bool] = None,
+                       cache=None, wait_if_paused: Callable[[], None] = None) -> List[Dict[str, Any]]:
+    """
+    여러 HTML을 브라우저 풀에서 동시에 PDF로 출력
+    
+    Args:
+        items: 변환 항목 목록. 각 항목은 dict:
+            - output_pdf: 출력 PDF 경로 (필수)
+            - html: HTML 문자열 또는 html_file: HTML 파일 경로 (둘 중 하나)
+            - key: 결과 식별용 값 (선택, 예: 수험번호)
+            - error: 이미 실패한 항목이면 오류 메시지 (변환하지 않고 실패로 기록)
+            - format, margin: 페이지 설정 (선택)
+            - version: 캐시 키에 포함할 템플릿 버전 (선택)
+        concurrency: 동시에 출력할 페이지 수 (기본: 풀 용량)
+        timeout: 항목당 제한 시간(초)
+        on_result: 항목이 끝날 때마다 결과 dict로 호출 (완료 순서)
+        should_cancel: True를 반환하면 남은 항목은 시작하지 않음 (기다리지 않고 바로 반환해야 함)
+        cache: PDFCache (있으면 같은 내용의 PDF는 다시 출력하지 않고 캐시에서 복사)
+        wait_if_paused: 일시정지 중이면 재개될 때까지 기다리는 함수 (이벤트 루프 밖 스레드에서 호출하므로
+            진행 중인 페이지는 계속 출력되고, 다음 항목만 시작하지 않음)
+        
+    Returns:
+        List[dict]: 입력 순서와 같은 순서의 결과
+            (index, key, output_pdf, success, cached, error, elapsed)
+    """
+    pool = get_browser_pool()
+    loop = asyncio.get_running_loop()
+    if concurrency is None:
+        concurrency = pool.capacity
+    concurrency = max(1, concurrency)
+    
+    # 항목은 작업자가 하나씩 꺼내 가므로 한 번에 concurrency개만 처리 중
+    source = enumerate(items)
+    results: Dict[int, Dict[str, Any]] = {}
+    # 항목 꺼내기(지연 생성 시 HTML 렌더링 포함)와 일시정지 대기는 한 번에 스레드 1개에서만
+    feed_lock = asyncio.Lock()
+    
+    async def _convert(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        result = {
+            "index": index,
+            "key": item.get("key"),
+            "output_pdf": item["output_pdf"],
+            "success": False,
+            "cached": False,
+            "error": None,
+            "elapsed": 0.0,
+        }
+        if item.get("error"):
+            # 변환 전 단계(HTML 준비)에서 이미 실패한 항목
+            result["error"] = item["error"]
+            return result
+        
+        start = time.perf_counter()
+        fmt = item.get("format", "A4")
+        margin = item.get("margin")
+        
+        # 캐시 확인 (파일 입출력은 이벤트 루프를 막지 않도록 스레드에서)
+        cache_key = None
+        if cache is not None:
+            try:
+                cache_key = await loop.run_in_executor(None, cache.key_for_item, item)
+                if await loop.run_in_executor(None, cache.get, cache_key, item["output_pdf"]):
+                    result["success"] = True
+                    result["cached"] = True
+                    result["elapsed"] = time.perf_counter() - start
+                    return result
+                await loop.run_in_executor(None, cache.prepare_output, item["output_pdf"])
+            except Exception as e:
+                print(f"[PDF캐시] 캐시 확인 오류, 새로 출력합니다: {str(e)}")
+                cache_key = None
+        
+        async def _print(page):
+            if "html" in item:
+                job = PlaywrightPDFConverter.print_string(page, item["html"], item["output_pdf"], fmt, margin)
+            else:
+                job = PlaywrightPDFConverter.print_file(page, item["html_file"], item["output_pdf"], fmt, margin)
+            # 제한 시간은 페이지를 받은 뒤부터 계산
+            await asyncio.wait_for(job, timeout)
+        
+        try:
+            await pool.render(_print)
+            result["success"] = True
+            if cache_key is not None:
+                try:
+                    await loop.run_in_executor(None, cache.put, cache_key, item["output_pdf"])
+                except Exception as e:
+                    print(f"[PDF캐시] 캐시 저장 오류: {str(e)}")
+        except asyncio.TimeoutError:
+            result["error"] = f"제한 시간 {timeout:g}초 초과"
+        except Exception as e:
+            result["error"] = str(e)
+        result["elapsed"] = time.perf_counter() - start
+        return result
+    
+    def _take():
+        """다음 항목 (일시정지면 재개까지 대기, 취소됐거나 항목이 없으면 None)"""
+        if wait_if_paused is not None:
+            wait_if_paused()
+        if should_cancel is not None and should_cancel():
+            return None
+        return next(source, None)
+    
+    async def _worker():
+        while True:
+            # 항목 생성/대기는 이벤트 루프를 막지 않도록 스레드에서
+            async with feed_lock:
+                entry = await loop.run_in_executor(None, _take)
+            if entry is None:
+                break
+            index, item = entry
+            result = await _convert(index, item)
+            results[index] = result
+            if on_result is not None:
+                on_result(result)
+    
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    return [results[i] for i in sorted(results)]
+
+
+def iter_batch_to_pdf_sync(items: Iterable[Dict[str, Any]], concurrency: int = None,
+                           timeout: float = DEFAULT_BATCH_TIMEOUT,
+                           should_cancel: Callable[[], bool] = None,
+                           cache=None, wait_if_paused: Callable[[], None] = None) -> Iterator[Dict[str, Any]]:
+    """배치 변환 결과를 완료되는 순서대로 호출한 스레드에서 반환 (동기 버전)"""
+    done = object()
+    results: queue.Queue = queue.Queue()
+    future = get_browser_pool().submit_async(
+        render_batch(items, concurrency, timeout, on_result=results.put,
+                     should_cancel=should_cancel, cache=cache, wait_if_paused=wait_if_paused)
+    )
+    future.add_done_callback(lambda _: results.put(done))
     
-    return asyncio.run(_convert())
+    while True:
+        result = results.get()
+        if result is done:
+            break
+        yield result
+    # 배치 자체가 실패한 경우 예외 전달
+    future.result()
+
+
+def batch_to_pdf_sync(items: Iterable[Dict[str, Any]], concurrency: int = None,
+                      timeout: float = DEFAULT_BATCH_TIMEOUT,
+                      on_result: Callable[[Dict[str, Any]], None] = None,
+                      should_cancel: Callable[[], bool] = None,
+                      cache=None, wait_if_paused: Callable[[], None] = None) -> List[Dict[str, Any]]:
+    """
+    배치 변환 (동기 버전)
+    
+    on_result는 호출한 스레드에서 완료 순서대로 호출되고,
+    반환값은 입력 순서대로 정렬된 결과 목록
+    """
+    results = []
+    for result in iter_batch_to_pdf_sync(items, concurrency, timeout, should_cancel, cache, wait_if_paused):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    results.sort(key=lambda r: r["index"])
+    return results
 
 
 # 사용 예시
@@ -0,0 +1,235 @@
+"""
+처리 과정 프로파일링 (느린 실행 원인 분석용)
+- 별도 스레드가 일정 간격으로 실행 중인 스레드의 호출 스택을 기록 (샘플링, 코드 수정 없음)
+- 결과는 출력 폴더의 profile/ 아래에 저장
+  - <이름>.collapsed: 접힌 스택 형식 (flamegraph.pl, speedscope 등에 바로 사용)
+  - <이름>_top.txt: 영역(pandas/Chromium/템플릿/앱 코드)별 비율과 시간이 많이 걸린 함수 상위 N개
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR_NAME = "profile"
+# 샘플링 간격 (초)
+DEFAULT_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', '5')) / 1000
+# 요약에 넣을 함수 수
+TOP_N = 30
+# 스택 최대 깊이 (너무 깊은 재귀는 잘라냄)
+MAX_DEPTH = 200
+
+# 호출 스택에서 가장 안쪽의 해당 파일이 속한 영역 (위에서부터 확인)
+AREAS = (
+    ('pandas/numpy', ('pandas', 'numpy', 'pyarrow')),
+    ('Chromium(Playwright)', ('playwright', 'greenlet', 'browser_pool.py', 'pdf_cache.py')),
+    ('Jinja2 템플릿', ('jinja2', 'markupsafe', 'template_registry.py')),
+)
+APP_AREA = '앱 코드'
+OTHER_AREA = '기타(표준 라이브러리 등)'
+
+Frame = Tuple[str, str, int]  # (파일 경로, 함수 이름, 함수 시작 줄)
+
+
+def _frame_label(frame: Frame) -> str:
+    """접힌 스택에 쓸 이름 (구분자 ';'와 공백은 쓰지 않음)"""
+    filename, name, lineno = frame
+    path = os.path.normcase(filename)
+    if path.startswith(os.path.normcase(BASE_DIR) + os.sep):
+        module = os.path.relpath(filename, BASE_DIR)
+    else:
+        # site-packages/pandas/core/frame.py → pandas/core/frame.py
+        parts = filename.replace('\\', '/').split('/')
+        for marker in ('site-packages', 'dist-packages'):
+            if marker in parts:
+                parts = parts[parts.index(marker) + 1:]
+                break
+        else:
+            parts = parts[-2:]
+        module = '/'.join(parts)
+    return f"{name}({module}:{lineno})".replace(';', ':').replace(' ', '_')
+
+
+def _frame_area(frame: Frame) -> Optional[str]:
+    filename = frame[0].replace('\\', '/')
+    for area, markers in AREAS:
+        for marker in markers:
+            if f"/{marker}/" in filename or filename.endswith('/' + marker):
+                return area
+    path = os.path.normcase(frame[0])
+    if path.startswith(os.path.normcase(BASE_DIR) + os.sep) and 'site-packages' not in path:
+        return APP_AREA
+    return None
+
+
+def _stack_area(stack: Tuple[Frame, ...]) -> str:
+    """가장 안쪽(잎)부터 거슬러 올라가며 처음 영역이 정해지는 프레임 기준 (대기 중인 스레드도 무엇을 기다리는지로 분류)"""
+    for frame in reversed(stack):
+        area = _frame_area(frame)
+        if area is not None:
+            return area
+    return OTHER_AREA
+
+
+class SamplingProfiler:
+    """
+    일정 간격으로 스레드 호출 스택을 모으는 샘플링 프로파일러
+
+    - 벽시계 기준: CPU 계산뿐 아니라 Chromium 응답·파일 I/O 대기도 포함
+    - thread_ids를 주면 해당 스레드만, 없으면 프로파일러 자신을 뺀 모든 스레드 기록
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_ids: Optional[Set[int]] = None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks: Counter = Counter()  # (스레드 이름, 스택) → 샘플 수
+        self.ticks = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own_id)
+
+    def _sample(self, own_id: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self.ticks += 1
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                continue
+            stack: List[Frame] = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+
+    # ------------------------------------------------------------------
+    # 결과
+    # ------------------------------------------------------------------
+    def seconds_per_sample(self) -> float:
+        """실제 샘플 1개가 나타내는 시간 (GIL 때문에 설정한 간격보다 길어질 수 있음)"""
+        return self.elapsed / self.ticks if self.ticks else self.interval
+
+    def collapsed(self) -> str:
+        """접힌 스택 형식 ('스레드;바깥함수;...;안쪽함수 샘플수' 한 줄씩)"""
+        labels: Dict[Frame, str] = {}
+        lines = Counter()
+        for (thread_name, stack), samples in self.stacks.items():
+            names = [thread_name.replace(';', ':').replace(' ', '_')]
+            for frame in stack:
+                if frame not in labels:
+                    labels[frame] = _frame_label(frame)
+                names.append(labels[frame])
+            lines[';'.join(names)] += samples
+        return ''.join(f"{line} {samples}\n" for line, samples in sorted(lines.items()))
+
+    def summary(self, title: str = "", top_n: int = TOP_N) -> str:
+        """영역별 비율 + 자기 시간(self)/누적 시간(total) 상위 함수 요약"""
+        total = sum(self.stacks.values())
+        per_sample = self.seconds_per_sample()
+        threads = Counter()
+        areas: Dict[str, Counter] = {}
+        own = Counter()
+        inclusive = Counter()
+        for (thread_name, stack), samples in self.stacks.items():
+            threads[thread_name] += samples
+            areas.setdefault(thread_name, Counter())[_stack_area(stack)] += samples
+            if stack:
+                own[stack[-1]] += samples
+            for frame in set(stack):
+                inclusive[frame] += samples
+
+        def share(samples: int, whole: int) -> str:
+            return f"{samples * per_sample:8.2f}초 {samples / whole * 100 if whole else 0:5.1f}%"
+
+        lines = [
+            f"# 프로파일 요약 {title}".rstrip(),
+            f"생성 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"실행 시간: {self.elapsed:.2f}초, 샘플 {self.ticks}회 (설정 간격 {self.interval * 1000:.0f}ms, "
+            f"실제 {per_sample * 1000:.1f}ms)",
+            "",
+            "## 스레드별 영역",
+        ]
+        for thread_name, samples in threads.most_common():
+            lines.append(f"[{thread_name}] {share(samples, total)}")
+            for area, area_samples in areas[thread_name].most_common():
+                lines.append(f"    {area:<24} {share(area_samples, samples)}")
+
+        for heading, counter in (("자기 시간 상위 (함수 안에서 직접 쓴 시간)", own),
+                                 ("누적 시간 상위 (호출한 함수 포함)", inclusive)):
+            lines += ["", f"## {heading}"]
+            for frame, samples in counter.most_common(top_n):
+                lines.append(f"{share(samples, total)}  {_frame_label(frame)}")
+        return '\n'.join(lines) + '\n'
+
+    def save(self, directory: str, name: str, title: str = "") -> Tuple[str, str]:
+        """
+        결과 파일 저장
+
+        Args:
+            directory: 저장할 폴더
+            name: 파일 이름 앞부분
+
+        Returns:
+            (str, str): 접힌 스택 파일, 요약 파일 경로
+        """
+        os.makedirs(directory, exist_ok=True)
+        collapsed_path = os.path.join(directory, f"{name}.collapsed")
+        summary_path = os.path.join(directory, f"{name}_top.txt")
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(self.summary(title))
+        return collapsed_path, summary_path
+
+
+@contextmanager
+def profile_run(output_dir: str, name: str, enabled: bool = True,
+                current_thread_only: bool = False) -> Iterator[Optional[SamplingProfiler]]:
+    """
+    블록 실행을 프로파일링하고 output_dir/profile/ 아래에 결과 저장 (예외가 나도 저장)
+
+    Args:
+        output_dir: 성적표 출력 폴더
+        name: 결과 파일 이름 (예: 'process', 'report')
+        enabled: False면 아무것도 하지 않음 (요청/체크박스 값을 그대로 넘기는 용도)
+        current_thread_only: 현재 스레드만 기록 (웹 요청 스레드처럼 다른 요청과 섞이는 경우)
+    """
+    if not enabled:
+        yield None
+        return
+    profiler = SamplingProfiler(thread_ids={threading.get_ident()} if current_thread_only else None)
+    profiler.start()
+    print(f"[프로파일] 시작: {name}")
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        directory = os.path.join(output_dir, PROFILE_DIR_NAME)
+        try:
+            collapsed_path, summary_path = profiler.save(directory, name, title=name)
+            print(f"[프로파일] 저장: {collapsed_path}, {summary_path} ({profiler.elapsed:.1f}초)")
+        except Exception as e:
+            print(f"[프로파일] 결과 저장 실패: {str(e)}")
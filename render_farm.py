@@ -0,0 +1,263 @@
+"""
+데스크톱 앱용 멀티프로세스 PDF 출력
+- 워커 프로세스(spawn)마다 자기 브라우저를 하나씩 띄우고, 학생 묶음을 작업 큐에서 가져가 출력
+- 진행 상황은 이벤트 큐로 전달 → GUI는 root.after로 poll()만 호출 (메인 스레드가 멈추지 않음)
+- 일시정지/취소는 공유 이벤트로 전달 (워커는 다음 학생을 시작하기 전에 확인)
+"""
+
+import os
+import queue
+import multiprocessing
+from typing import Any, Dict, List, Tuple
+
+from metrics import TimingSummary
+
+
+# 워커 프로세스 수 (0이면 CPU 코어 수)
+DEFAULT_WORKERS = int(os.environ.get('RENDER_FARM_WORKERS', '0')) or os.cpu_count() or 1
+# 워커 하나가 동시에 출력하는 페이지 수 (브라우저 1개의 컨텍스트 수)
+DEFAULT_PAGES_PER_WORKER = int(os.environ.get('RENDER_FARM_PAGES', '2'))
+# 작업 1개의 학생 수 (작을수록 워커 간 부하가 고르고, 클수록 큐 오버헤드가 적음)
+TASK_SIZE = 10
+# 일시정지 중 취소 여부를 확인하는 간격 (초)
+PAUSE_CHECK_INTERVAL = 0.2
+
+# 이벤트 종류 (워커 → GUI)
+RESULT = 'result'    # 학생 1명 출력 결과
+OUTPUT = 'output'    # 통합 PDF 1개 완료
+ERROR = 'error'      # 워커 오류 (남은 작업은 다른 워커가 처리)
+EXIT = 'exit'        # 워커 종료 (단계별 시간 포함)
+
+# 결과 중 GUI로 보내는 항목
+RESULT_KEYS = ('key', 'success', 'cached', 'error', 'output_pdf')
+
+
+class RenderFarm:
+    """
+    프로세스 풀 기반 PDF 출력
+
+    사용 예 (Tkinter):
+        farm = RenderFarm()
+        farm.start(students, "output", "학생 성적표")
+        root.after(100, poll)   # poll()에서 farm.poll() 결과 처리 후 farm.finished가 아니면 다시 예약
+    """
+
+    def __init__(self, workers: int = None, pages_per_worker: int = None, task_size: int = TASK_SIZE):
+        self.max_workers = max(1, workers or DEFAULT_WORKERS)
+        self.pages_per_worker = max(1, pages_per_worker or DEFAULT_PAGES_PER_WORKER)
+        self.task_size = max(1, task_size)
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._tasks = None
+        self._events = None
+        self._running = None
+        self._cancelled = None
+        self._processes: List[multiprocessing.Process] = []
+        self._exited: set = set()
+
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.errors: List[str] = []
+        self.timings = TimingSummary()
+
+    # ------------------------------------------------------------------
+    # 시작 / 제어
+    # ------------------------------------------------------------------
+    def start(self, students: List[Dict[str, Any]], output_dir: str, pdf_title: str = "학생 성적표",
+              save_html: bool = False, merge: bool = False, profile: bool = False):
+        """
+        워커 프로세스를 띄우고 출력 시작 (바로 반환)
+
+        Args:
+            students: process_all_data() 결과의 학생 데이터 목록
+            output_dir: 출력 폴더
+            pdf_title: 성적표 제목
+            save_html: HTML 파일도 함께 저장할지 여부
+            merge: 전체 학생을 PDF 하나로 (한 문서이므로 워커 1개에서 출력)
+            profile: 워커마다 output_dir/profile/report_worker<N>.* 프로파일 저장
+        """
+        if self._processes:
+            raise RuntimeError("이미 실행 중인 출력 작업이 있습니다.")
+
+        self.total = len(students)
+        if merge:
+            tasks = [students] if students else []
+        else:
+            tasks = [students[i:i + self.task_size] for i in range(0, len(students), self.task_size)]
+        workers = min(self.max_workers, len(tasks)) if tasks else 0
+
+        self._tasks = self._ctx.Queue()
+        self._events = self._ctx.Queue()
+        self._running = self._ctx.Event()
+        self._running.set()
+        self._cancelled = self._ctx.Event()
+        for task in tasks:
+            self._tasks.put(task)
+        for _ in range(workers):
+            self._tasks.put(None)
+
+        options = {
+            'output_dir': output_dir,
+            'pdf_title': pdf_title,
+            'save_html': save_html,
+            'merge': merge,
+            'profile': profile,
+            'pages': self.pages_per_worker,
+        }
+        for index in range(workers):
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(index, self._tasks, self._events, self._running, self._cancelled, options),
+                name=f"render-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        print(f"[출력] 워커 {workers}개 시작 (작업 {len(tasks)}개, 워커당 동시 {self.pages_per_worker}페이지)")
+
+    def pause(self):
+        """일시정지 (진행 중인 페이지는 끝내고, 다음 학생을 시작하지 않음)"""
+        if self._running is not None:
+            self._running.clear()
+
+    def resume(self):
+        if self._running is not None:
+            self._running.set()
+
+    @property
+    def paused(self) -> bool:
+        return self._running is not None and not self._running.is_set()
+
+    def cancel(self):
+        """취소 (진행 중인 페이지가 끝나면 워커 종료, 남은 학생은 출력하지 않음)"""
+        if self._cancelled is not None:
+            self._cancelled.set()
+            self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled is not None and self._cancelled.is_set()
+
+    # ------------------------------------------------------------------
+    # 진행 상황
+    # ------------------------------------------------------------------
+    def poll(self, max_events: int = 500) -> List[Tuple[str, int, Any]]:
+        """
+        쌓인 이벤트를 기다리지 않고 가져옴 (GUI 스레드에서 호출)
+
+        Returns:
+            List[(종류, 워커 번호, 내용)]: RESULT는 결과 dict, OUTPUT은 통합 PDF 결과 dict,
+                                          ERROR는 오류 메시지, EXIT는 단계별 시간 dict
+        """
+        events = []
+        if self._events is None:
+            return events
+        while len(events) < max_events:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            self._handle(event)
+            events.append(event)
+
+        # 종료 이벤트 없이 죽은 워커 (강제 종료 등)
+        if not events:
+            for index, process in enumerate(self._processes):
+                if index not in self._exited and not process.is_alive() and process.exitcode not in (0, None):
+                    self._exited.add(index)
+                    message = f"워커 {index} 비정상 종료 (exit code {process.exitcode})"
+                    self.errors.append(message)
+                    events.append((ERROR, index, message))
+        return events
+
+    def _handle(self, event: Tuple[str, int, Any]):
+        kind, index, payload = event
+        if kind == RESULT:
+            if payload['success']:
+                self.done += 1
+            else:
+                self.failed += 1
+        elif kind == OUTPUT:
+            self.done += len(payload['students'])
+        elif kind == ERROR:
+            self.errors.append(payload)
+        elif kind == EXIT:
+            self._exited.add(index)
+            self.timings.merge(payload)
+
+    @property
+    def finished(self) -> bool:
+        """모든 워커가 끝났는지 (종료 이벤트를 poll()로 받은 뒤에 True)"""
+        return len(self._exited) >= len(self._processes)
+
+    def close(self, timeout: float = 5):
+        """워커 정리 (끝나지 않은 워커는 강제 종료)"""
+        self.cancel()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(1)
+        if self._tasks is not None:
+            # 취소로 남은 작업이 있어도 종료 시 큐 스레드가 기다리지 않도록
+            self._tasks.cancel_join_thread()
+        self._processes = []
+
+
+def _worker_main(index: int, tasks, events, running, cancelled, options: Dict[str, Any]):
+    """워커 프로세스 진입점 (자기 브라우저 1개로 작업 큐의 학생 묶음을 차례로 출력)"""
+    # 브라우저 풀 설정은 import 시점에 읽으므로 먼저 지정
+    os.environ['PDF_POOL_BROWSERS'] = '1'
+    os.environ['PDF_POOL_CONTEXTS'] = str(options['pages'])
+
+    from html_pdf_generator import HTMLPDFGenerator
+    from browser_pool import close_browser_pool
+    from metrics import collect_timings, get_metrics
+    from profiling import profile_run
+
+    def should_cancel() -> bool:
+        # 출력 이벤트 루프에서도 불리므로 기다리지 않음
+        return cancelled.is_set()
+
+    def wait_if_paused():
+        # 일시정지 중이면 재개/취소될 때까지 대기 (루프 밖 스레드에서 호출, 진행 중인 페이지는 계속 출력)
+        while not running.wait(PAUSE_CHECK_INTERVAL):
+            if cancelled.is_set():
+                return
+
+    def on_result(result):
+        events.put((RESULT, index, {key: result.get(key) for key in RESULT_KEYS}))
+
+    def on_output(output):
+        events.put((OUTPUT, index, output))
+
+    output_dir = options['output_dir']
+    timings = None
+    try:
+        with collect_timings() as timings, \
+                profile_run(output_dir, f"report_worker{index}", enabled=options['profile']):
+            generator = HTMLPDFGenerator()
+            while True:
+                students = tasks.get()
+                if students is not None:
+                    wait_if_paused()
+                if students is None or should_cancel():
+                    break
+                if options['merge']:
+                    generator.generate_merged_pdf(students, output_dir, options['pdf_title'],
+                                                  on_output=on_output, should_cancel=should_cancel,
+                                                  wait_if_paused=wait_if_paused)
+                else:
+                    generator.generate_html_based_pdfs(students, output_dir, options['pdf_title'],
+                                                       options['save_html'], on_result=on_result,
+                                                       should_cancel=should_cancel,
+                                                       wait_if_paused=wait_if_paused)
+    except Exception as e:
+        events.put((ERROR, index, f"워커 {index} 오류: {str(e)}"))
+    finally:
+        close_browser_pool()
+        # spawn 프로세스는 atexit을 거치지 않으므로 측정값을 직접 저장
+        get_metrics().flush()
+        events.put((EXIT, index, timings.as_dict() if timings is not None else {}))
+
@@ -0,0 +1,327 @@
+"""
+세션별 DataProcessor 저장소
+TTL/LRU로 오래된 세션을 정리하고, 세션별/전체 메모리 한도(DataFrame 크기 기준)를 지키며
+한동안 쓰지 않은 세션은 디스크(Parquet 또는 pickle)로 내렸다가 다시 접근하면 복원
+
+저장소는 프로세스마다 따로 있으므로 웹 서버는 gunicorn 워커 1개 + 스레드로 실행 (Procfile, railway.json)
+"""
+
+import os
+import re
+import sys
+import time
+import pickle
+import shutil
+import itertools
+import pathlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from data_processor import DataProcessor
+from frame_store import write_frame, read_frame, frame_nbytes
+
+
+BASE_DIR = pathlib.Path(__file__).parent
+DEFAULT_SPILL_DIR = BASE_DIR / "cache" / "sessions"
+
+# 세션 ID 형식 (파일 경로로도 쓰므로 엄격하게 검사)
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+MB = 1024 * 1024
+
+
+class SessionMemoryError(Exception):
+    """세션 하나의 데이터가 메모리 한도를 넘었을 때"""
+
+
+# 학생별 결과 dict 크기를 추정할 때 재는 표본 수
+SAMPLE_SIZE = 100
+
+
+def _object_nbytes(value: Any) -> int:
+    """dict/list 안쪽까지 포함한 객체 크기 (결과 dict 1개 정도의 작은 객체용)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_object_nbytes(k) + _object_nbytes(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_object_nbytes(v) for v in value)
+    return size
+
+
+def _mapping_nbytes(mapping: Dict[Any, Any]) -> int:
+    """dict 크기 (표본 항목의 평균 크기 × 항목 수)"""
+    if not mapping:
+        return 0
+    sample = list(itertools.islice(mapping.items(), SAMPLE_SIZE))
+    per_item = sum(_object_nbytes(k) + _object_nbytes(v) for k, v in sample) / len(sample)
+    return sys.getsizeof(mapping) + int(per_item * len(mapping))
+
+
+def processor_nbytes(processor: DataProcessor) -> int:
+    """
+    DataProcessor가 들고 있는 데이터 크기
+
+    과목/등급컷 DataFrame, 학생명에 더해 처리 결과 캐시(process_all_data 결과, 학생-과목 통합 표와
+    그 결과)도 포함
+    """
+    total = sum(frame_nbytes(df) for df in processor.subject_data.values())
+    if isinstance(processor.grade_cutoff_data, pd.DataFrame):
+        total += frame_nbytes(processor.grade_cutoff_data)
+    total += _mapping_nbytes(processor.student_names)
+    table, results = processor.cached_results()
+    if table is not None:
+        total += frame_nbytes(table)
+    total += sum(_mapping_nbytes(result) for result in results)
+    return total
+
+
+class _Entry:
+    __slots__ = ('processor', 'last_access', 'nbytes')
+
+    def __init__(self, processor: DataProcessor, nbytes: int = 0):
+        self.processor = processor
+        self.last_access = time.time()
+        self.nbytes = nbytes
+
+
+class SessionStore:
+    """
+    세션 ID → DataProcessor
+
+    - get(): 메모리 → 디스크(내려둔 세션) → 새로 생성 순으로 찾음
+    - update(): 데이터를 올린 뒤 호출해 메모리 사용량 갱신 (세션 한도 초과 시 SessionMemoryError)
+    - 정리(maintain): TTL이 지난 세션 삭제, 유휴 세션/전체 한도 초과분은 오래 안 쓴 순서로 디스크에 내림
+    """
+
+    # 아래 속성을 디스크에 내릴 때 함께 저장 (DataFrame은 frame_store로 따로 저장)
+    STATE_ATTRIBUTES = ('student_names', 'standard_scores', 'grade_standard_scores', 'subject_codes',
+                        'subject_hashes')
+
+    def __init__(self, ttl: float = 2 * 3600, max_sessions: int = 100,
+                 session_max_bytes: int = 64 * MB, total_max_bytes: int = 256 * MB,
+                 spill_idle: Optional[float] = 600, spill_dir: pathlib.Path = DEFAULT_SPILL_DIR,
+                 maintain_interval: float = 30):
+        """
+        Args:
+            ttl: 마지막 접근 후 세션을 유지할 시간(초)
+            max_sessions: 메모리에 둘 최대 세션 수 (넘으면 오래 안 쓴 세션부터 디스크로)
+            session_max_bytes: 세션 하나의 최대 데이터 크기
+            total_max_bytes: 메모리에 둘 전체 세션 데이터 크기
+            spill_idle: 이 시간(초) 동안 안 쓴 세션은 디스크로 (None이면 유휴 기준으로는 내리지 않음)
+            spill_dir: 디스크 저장 위치 (None이면 내리지 않고 삭제)
+            maintain_interval: 정리 작업 최소 간격(초)
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.session_max_bytes = session_max_bytes
+        self.total_max_bytes = total_max_bytes
+        self.spill_idle = spill_idle
+        self.spill_dir = pathlib.Path(spill_dir) if spill_dir is not None else None
+        self.maintain_interval = maintain_interval
+        self._sessions: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._maintained_at = 0.0
+
+    # ------------------------------------------------------------------
+    # 조회 / 갱신
+    # ------------------------------------------------------------------
+    @staticmethod
+    def is_valid_id(session_id: Optional[str]) -> bool:
+        return bool(session_id) and SESSION_ID_PATTERN.match(session_id) is not None
+
+    def get(self, session_id: str) -> DataProcessor:
+        """세션의 DataProcessor (없으면 디스크에서 복원하거나 새로 생성)"""
+        if not self.is_valid_id(session_id):
+            raise ValueError("유효하지 않은 세션 ID입니다.")
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                processor = self._restore(session_id)
+                entry = _Entry(processor or DataProcessor(), processor_nbytes(processor) if processor else 0)
+                self._sessions[session_id] = entry
+            else:
+                self._sessions.move_to_end(session_id)
+            entry.last_access = time.time()
+        self.maintain()
+        return entry.processor
+
+    def update(self, session_id: str):
+        """
+        세션 데이터 크기 다시 계산 (업로드/처리 후 호출)
+
+        처리 결과 캐시 때문에 한도를 넘으면 캐시만 버림 (다음 처리 때 전체를 다시 계산)
+
+        Raises:
+            SessionMemoryError: 입력 데이터만으로 세션 한도를 넘은 경우 (해당 세션 데이터는 비움)
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            entry.nbytes = processor_nbytes(entry.processor)
+            entry.last_access = time.time()
+            table, results = entry.processor.cached_results()
+            if entry.nbytes > self.session_max_bytes and (table is not None or results):
+                entry.processor.invalidate_processed_data()
+                entry.nbytes = processor_nbytes(entry.processor)
+            if entry.nbytes > self.session_max_bytes:
+                nbytes = entry.nbytes
+                self._sessions[session_id] = _Entry(DataProcessor())
+                raise SessionMemoryError(
+                    f"업로드한 데이터가 너무 큽니다. ({nbytes / MB:.1f}MB, 최대 {self.session_max_bytes / MB:.0f}MB)"
+                )
+        self.maintain(force=True)
+
+    def discard(self, session_id: str):
+        """세션 삭제 (메모리와 디스크 모두)"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        self._remove_spilled(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 메모리 세션 수 / 데이터 크기"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'bytes': sum(entry.nbytes for entry in self._sessions.values()),
+            }
+
+    # ------------------------------------------------------------------
+    # 정리
+    # ------------------------------------------------------------------
+    def maintain(self, force: bool = False):
+        """만료 세션 삭제, 유휴/초과 세션 디스크로 내리기 (maintain_interval마다 한 번)"""
+        now = time.time()
+        if not force and now - self._maintained_at < self.maintain_interval:
+            return
+        self._maintained_at = now
+
+        with self._lock:
+            to_spill = []
+            # OrderedDict는 오래 안 쓴 세션이 앞쪽
+            for session_id, entry in list(self._sessions.items()):
+                idle = now - entry.last_access
+                if idle > self.ttl:
+                    del self._sessions[session_id]
+                elif self.spill_idle is not None and idle > self.spill_idle:
+                    to_spill.append((session_id, self._sessions.pop(session_id)))
+
+            total = sum(entry.nbytes for entry in self._sessions.values())
+            # 가장 최근 세션 하나는 항상 메모리에 유지
+            while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or total > self.total_max_bytes):
+                session_id, entry = self._sessions.popitem(last=False)
+                total -= entry.nbytes
+                to_spill.append((session_id, entry))
+
+            # 저장이 끝나기 전에 같은 세션을 다시 요청하면 빈 세션이 만들어지므로 잠금 안에서 저장
+            for session_id, entry in to_spill:
+                self._spill(session_id, entry.processor)
+        self._expire_spilled(now)
+
+    # ------------------------------------------------------------------
+    # 디스크 저장 / 복원
+    # ------------------------------------------------------------------
+    def _session_dir(self, session_id: str) -> pathlib.Path:
+        return self.spill_dir / session_id
+
+    def _spill(self, session_id: str, processor: DataProcessor):
+        """세션 데이터를 디스크에 저장 (데이터가 없으면 버림)"""
+        if self.spill_dir is None or (not processor.subject_data and not processor.student_names):
+            return
+        session_dir = self._session_dir(session_id)
+        tmp_dir = session_dir.with_name(session_dir.name + ".tmp")
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+
+            frames = {}
+            for index, (subject, df) in enumerate(processor.subject_data.items()):
+                frames[subject] = os.path.basename(write_frame(df, str(tmp_dir / f"subject_{index}")))
+            grade_cutoff = processor.grade_cutoff_data
+            if isinstance(grade_cutoff, pd.DataFrame):
+                grade_cutoff = {'frame': os.path.basename(write_frame(grade_cutoff, str(tmp_dir / "grade_cutoff")))}
+
+            state = {name: getattr(processor, name) for name in self.STATE_ATTRIBUTES if hasattr(processor, name)}
+            with open(tmp_dir / "state.pkl", 'wb') as f:
+                pickle.dump({'frames': frames, 'grade_cutoff': grade_cutoff, 'state': state}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+            shutil.rmtree(session_dir, ignore_errors=True)
+            os.replace(tmp_dir, session_dir)
+        except Exception as e:
+            print(f"[세션] 디스크 저장 실패 ({session_id[:8]}): {str(e)}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _restore(self, session_id: str) -> Optional[DataProcessor]:
+        """디스크에 내려둔 세션 복원 (복원 후 디스크 사본은 삭제)"""
+        if self.spill_dir is None:
+            return None
+        session_dir = self._session_dir(session_id)
+        state_path = session_dir / "state.pkl"
+        if not state_path.exists():
+            return None
+        try:
+            with open(state_path, 'rb') as f:
+                saved = pickle.load(f)
+            processor = DataProcessor()
+            for name, value in saved['state'].items():
+                setattr(processor, name, value)
+            processor.subject_data = {
+                subject: read_frame(str(session_dir / filename)) for subject, filename in saved['frames'].items()
+            }
+            grade_cutoff = saved['grade_cutoff']
+            if isinstance(grade_cutoff, dict) and set(grade_cutoff) == {'frame'}:
+                grade_cutoff = read_frame(str(session_dir / grade_cutoff['frame']))
+            processor.grade_cutoff_data = grade_cutoff
+            processor.invalidate_subject_code_index()
+            processor.invalidate_processed_data()
+        except Exception as e:
+            print(f"[세션] 디스크 복원 실패 ({session_id[:8]}): {str(e)}")
+            processor = None
+        self._remove_spilled(session_id)
+        return processor
+
+    def _remove_spilled(self, session_id: str):
+        if self.spill_dir is not None:
+            shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def _expire_spilled(self, now: float):
+        """디스크에 내려둔 세션 중 TTL이 지난 것 삭제"""
+        if self.spill_dir is None or not self.spill_dir.exists():
+            return
+        for session_dir in self.spill_dir.iterdir():
+            try:
+                if now - session_dir.stat().st_mtime > self.ttl:
+                    shutil.rmtree(session_dir, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """
+    프로세스 공유 세션 저장소
+
+    환경 변수: SESSION_TTL_MINUTES, SESSION_MAX, SESSION_MAX_MB, SESSION_TOTAL_MB,
+              SESSION_SPILL_IDLE_MINUTES (0이면 유휴 세션을 내리지 않음), SESSION_SPILL_DIR
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                spill_idle = float(os.environ.get('SESSION_SPILL_IDLE_MINUTES', '10')) * 60
+                _store = SessionStore(
+                    ttl=float(os.environ.get('SESSION_TTL_MINUTES', '120')) * 60,
+                    max_sessions=int(os.environ.get('SESSION_MAX', '100')),
+                    session_max_bytes=int(float(os.environ.get('SESSION_MAX_MB', '64')) * MB),
+                    total_max_bytes=int(float(os.environ.get('SESSION_TOTAL_MB', '256')) * MB),
+                    spill_idle=spill_idle or None,
+                    spill_dir=pathlib.Path(os.environ.get('SESSION_SPILL_DIR', DEFAULT_SPILL_DIR)),
+                )
+    return _store
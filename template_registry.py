@@ -0,0 +1,136 @@
+"""
+Jinja2 템플릿 레지스트리
+컴파일된 템플릿과 템플릿별 컨텍스트 생성 함수를 프로세스 단위로 공유
+"""
+
+import os
+import pathlib
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template, meta, select_autoescape
+
+
+BASE_DIR = pathlib.Path(__file__).parent
+TEMPLATES_DIR = BASE_DIR / "templates"
+BYTECODE_CACHE_DIR = BASE_DIR / "cache" / "jinja"
+
+# 컨텍스트 생성 함수: (학생 데이터, 옵션...) -> 템플릿 컨텍스트
+ContextBuilder = Callable[..., Dict[str, Any]]
+
+
+class TemplateRegistry:
+    """
+    템플릿 이름 → (컴파일된 템플릿, 컨텍스트 생성 함수)
+
+    - 템플릿은 처음 요청될 때 한 번만 컴파일하고, 바이트코드는 디스크에 캐시해
+      다음 프로세스 시작 시에도 파싱을 건너뜀
+    - auto_reload가 꺼져 있으면 렌더링마다 파일 변경 여부를 확인하지 않음 (clear()로 갱신)
+    """
+
+    def __init__(self, templates_dir: pathlib.Path = TEMPLATES_DIR,
+                 bytecode_cache_dir: Optional[pathlib.Path] = BYTECODE_CACHE_DIR,
+                 auto_reload: bool = False):
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            try:
+                os.makedirs(bytecode_cache_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(str(bytecode_cache_dir))
+            except OSError as e:
+                print(f"[템플릿] 바이트코드 캐시 폴더를 만들 수 없어 메모리 캐시만 사용합니다: {str(e)}")
+
+        self.templates_dir = pathlib.Path(templates_dir)
+        self.auto_reload = auto_reload
+        self.env = Environment(
+            loader=FileSystemLoader(self.templates_dir),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=bytecode_cache,
+            auto_reload=auto_reload,
+        )
+        self._templates: Dict[str, Template] = {}
+        self._builders: Dict[str, ContextBuilder] = {}
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, builder: ContextBuilder):
+        """템플릿에 컨텍스트 생성 함수 연결"""
+        self._builders[name] = builder
+
+    def get(self, name: str) -> Template:
+        """컴파일된 템플릿 반환 (최초 1회 컴파일)"""
+        template = self._templates.get(name)
+        if template is None or (self.auto_reload and not template.is_up_to_date):
+            with self._lock:
+                template = self.env.get_template(name)
+                self._templates[name] = template
+                self._versions.pop(name, None)
+        return template
+
+    def precompile(self, *names: str):
+        """템플릿을 미리 컴파일 (이름이 없으면 등록된 템플릿 전체)"""
+        for name in names or tuple(self._builders):
+            self.get(name)
+
+    def version(self, name: str) -> str:
+        """템플릿과 include/extends한 템플릿 소스 전체의 해시 (출력 캐시 키용)"""
+        version = self._versions.get(name)
+        if version is None:
+            digest = hashlib.sha256()
+            pending, seen = [name], set()
+            while pending:
+                current = pending.pop(0)
+                if current in seen:
+                    continue
+                seen.add(current)
+                source, _, _ = self.env.loader.get_source(self.env, current)
+                digest.update(current.encode('utf-8'))
+                digest.update(source.encode('utf-8'))
+                referenced = meta.find_referenced_templates(self.env.parse(source))
+                pending.extend(sorted(ref for ref in referenced if ref))
+            version = digest.hexdigest()[:16]
+            self._versions[name] = version
+        return version
+
+    def build_context(self, name: str, data: Any, **options) -> Dict[str, Any]:
+        """등록된 컨텍스트 생성 함수로 템플릿 컨텍스트 생성"""
+        builder = self._builders.get(name)
+        if builder is None:
+            raise KeyError(f"컨텍스트 생성 함수가 등록되지 않은 템플릿입니다: {name}")
+        return builder(data, **options)
+
+    def render(self, name: str, data: Any, **options) -> str:
+        """데이터 1건을 HTML 문자열로 렌더링"""
+        return self.get(name).render(**self.build_context(name, data, **options))
+
+    def render_many(self, name: str, items: Iterable[Any], **options) -> Iterator[str]:
+        """여러 건을 차례로 HTML 문자열로 렌더링 (템플릿 조회는 한 번만)"""
+        template = self.get(name)
+        builder = self._builders.get(name)
+        if builder is None:
+            raise KeyError(f"컨텍스트 생성 함수가 등록되지 않은 템플릿입니다: {name}")
+        for data in items:
+            yield template.render(**builder(data, **options))
+
+    def clear(self):
+        """컴파일된 템플릿 캐시 비우기 (템플릿 파일 수정 후 호출)"""
+        with self._lock:
+            self._templates.clear()
+            self._versions.clear()
+            if self.env.cache is not None:
+                self.env.cache.clear()
+
+
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """프로세스 공유 템플릿 레지스트리 반환"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateRegistry(
+                    auto_reload=os.environ.get('TEMPLATE_AUTO_RELOAD', '').lower() in ('1', 'true', 'yes')
+                )
+    return _registry
@@ -0,0 +1,126 @@
+"""browser_pool: 브라우저 재시작 동시성 (가짜 Playwright 사용)"""
+
+import asyncio
+
+import pytest
+
+import browser_pool
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        if not self.browser.connected:
+            raise RuntimeError("browser closed")
+        return FakePage(self.browser)
+
+
+class FakeBrowser:
+    def __init__(self, launched):
+        self.connected = True
+        launched.append(self)
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        return FakeContext(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def launch(self, **kwargs):
+        # 실제 Chromium처럼 시작에 시간이 걸려야 동시 시작 경쟁이 드러남
+        await asyncio.sleep(0.02)
+        return FakeBrowser(self.launched)
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakePlaywright()
+    monkeypatch.setattr(browser_pool, 'async_playwright', lambda: fake)
+    pool = browser_pool.BrowserPool(browsers=1, contexts_per_browser=4)
+    pool.fake = fake
+    yield pool
+    pool.close()
+
+
+async def _ok(page):
+    await asyncio.sleep(0.01)
+    return page.browser
+
+
+def test_concurrent_first_renders_launch_once(pool):
+    async def run():
+        return await asyncio.gather(*[pool.render(_ok) for _ in range(8)])
+
+    browsers = pool.submit(run())
+    assert len(pool.fake.launched) == 1
+    assert all(browser is pool.fake.launched[0] for browser in browsers)
+
+
+def test_crash_relaunches_once_without_leaking(pool):
+    crashes = {'left': 4}
+
+    async def crash_then_ok(page):
+        await asyncio.sleep(0.01)
+        if crashes['left']:
+            crashes['left'] -= 1
+            page.browser.connected = False
+            raise RuntimeError("crash")
+        return page.browser
+
+    async def run():
+        await pool.render(_ok)
+        return await asyncio.gather(*[pool.render(crash_then_ok) for _ in range(4)])
+
+    pool.submit(run())
+    assert len(pool.fake.launched) == 2
+    alive = [browser for browser in pool.fake.launched if browser.connected]
+    assert alive == [pool._slots[0].browser]
+    pool.close()
+    assert not any(browser.connected for browser in pool.fake.launched)
+
+
+def test_timeout_cancels_and_recycles_browser(pool):
+    async def hang(page):
+        await asyncio.sleep(60)
+
+    with pytest.raises(TimeoutError):
+        pool.run(hang, timeout=0.2)
+
+    async def settled():
+        while pool._slots[0].in_flight:
+            await asyncio.sleep(0.01)
+
+    # 취소된 작업의 정리(브라우저 교체)가 끝날 때까지
+    pool.submit(settled(), timeout=5)
+    hung = pool.fake.launched[0]
+    assert not hung.connected
+    browser = pool.run(_ok)
+    assert browser is not hung and browser.connected
+    assert len(pool.fake.launched) == 2
+    assert pool._slots[0].in_flight == 0
+    assert pool._tokens.qsize() == pool.capacity
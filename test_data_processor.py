@@ -0,0 +1,251 @@
+"""data_processor: 표 단위 통합/등급 계산이 기존 행 단위 처리, 전체 재계산과 같은 결과인지"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+from omr_scorer import AnswerKey, OMRScorer
+
+SAMPLES = (('국어', 'sample_korean.csv'), ('수학', 'sample_math.csv'), ('영어', 'sample_english.csv'),
+           ('한국사', 'sample_history.csv'), ('탐구', 'sample_inquiry.csv'))
+OMR_DIR = '11월더프'
+SUBJECT_CODES = {'화법과 작문': '01', '언어와 매체': '02', '확률과 통계': '03', '미적분': '04',
+                 '생활과 윤리': '11', '한국지리': '13'}
+
+
+def _reference_process(processor: DataProcessor):
+    """변경 전 process_all_data()의 행 단위 처리 (iterrows + 과목 정보 1건씩 계산)"""
+    if processor.grade_cutoff_data is None:
+        processor._set_default_grade_cutoffs()
+    absent = ['결시', 'absent', '미응시', '불참', 'nan', 'none']
+
+    def coerce(value):
+        try:
+            if pd.isna(value) or value == '' or str(value).strip().lower() in absent:
+                return 0
+            value = float(value)
+            return 0 if value < 0 else value
+        except (ValueError, TypeError):
+            return 0
+
+    student_data = {}
+    for subject, df in processor.subject_data.items():
+        for _, row in df.iterrows():
+            try:
+                exam_number = str(row['수험번호']).strip()
+                if not exam_number or exam_number in ('nan', 'None') or exam_number not in processor.student_names:
+                    continue
+                student_name = processor.student_names[exam_number]
+                if not student_name or student_name in ('nan', 'None'):
+                    continue
+                if len(student_name) > 20 or any(char in student_name for char in '<>|?*'):
+                    continue
+            except Exception:
+                continue
+            student = student_data.setdefault(
+                exam_number, {'name': student_name, 'student_id': exam_number, 'subjects': {}})
+            try:
+                subject_info = {
+                    'subject_name': str(row['선택과목']).strip() if pd.notna(row['선택과목']) else '',
+                    'subject_code': str(row['선택과목코드']).strip() if pd.notna(row['선택과목코드']) else '',
+                    'total_score': coerce(row['총점']),
+                    'correct_count': coerce(row['정답수']),
+                    'wrong_answers': processor._parse_wrong_answers(row['오답번호']),
+                }
+            except Exception:
+                subject_info = {'subject_name': '', 'subject_code': '', 'total_score': 0,
+                                'correct_count': 0, 'wrong_answers': []}
+            student['subjects'][subject] = subject_info
+    for student in student_data.values():
+        for subject_info in student['subjects'].values():
+            subject_info.update(processor._calculate_grade_and_score(subject_info))
+    return student_data
+
+
+def _cutoffs(shift=0):
+    """SUBJECT_CODES 과목의 등급컷/표점 (shift만큼 화법과 작문 등급컷 이동)"""
+    cutoffs = {subject: {grade: 95 - grade * 9 for grade in range(1, 10)} for subject in SUBJECT_CODES}
+    cutoffs['화법과 작문'] = {grade: 96 - grade * 8 + shift for grade in range(1, 10)}
+    cutoffs['미적분'] = {1: 88, 2: 80, 3: 84, 4: 60, 5: 50, 6: 40, 7: 30, 8: 20, 9: 0}  # 내림차순이 아닌 컷
+    cutoffs['한국지리'] = {grade: 45 - grade * 5 for grade in range(1, 10)}
+    grade_standard_scores = {subject: {grade: 140 - grade * 8 for grade in range(1, 10)} for subject in SUBJECT_CODES}
+    del grade_standard_scores['언어와 매체'][4]  # 등급별 표점이 빠진 등급은 만점 표점으로 계산
+    standard_scores = {subject: 150 for subject in SUBJECT_CODES}
+    standard_scores['한국지리'] = 0
+    return cutoffs, standard_scores, grade_standard_scores
+
+
+def _configure(processor: DataProcessor, shift=0):
+    cutoffs, standard_scores, grade_standard_scores = _cutoffs(shift)
+    processor.set_subject_codes(SUBJECT_CODES)
+    processor.set_grade_cutoff_data(cutoffs)
+    processor.set_standard_scores(standard_scores)
+    processor.set_grade_standard_scores(grade_standard_scores)
+    return processor
+
+
+def _messy_frame(codes, n=400, seed=0):
+    """결시/음수/문자 점수, 다양한 오답번호, 공백·없는 수험번호, 같은 학생 중복 행이 섞인 과목 데이터"""
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 101, size=n).astype(object)
+    specials = ['결시', 'Absent', ' 미응시 ', '', None, np.nan, -5, '-3', 'abc', '88.5', ' 91 ', 0, '0']
+    pick = rng.random(n) < 0.15
+    scores[pick] = [specials[i] for i in rng.integers(0, len(specials), size=int(pick.sum()))]
+    wrong = ['3, 7,12', '없음', '1 2, 5', '결시', np.nan, '4,,5', ' 7 ', '１２, 3', '12a, 3', '', '²', '29',
+             '007, 10', '3 ,4 , 5']
+    ids = [f" {2024001 + i} " if i % 17 == 0 else str(2024001 + i) for i in rng.integers(0, n + 20, size=n)]
+    ids[5] = np.nan
+    return pd.DataFrame({
+        '수험번호': ids,
+        '과목코드': rng.choice(codes, size=n),
+        '총점': scores,
+        '만점': 100,
+        '정답수': rng.choice([10, 20, '결시', -1, 'x', np.nan, 45.0], size=n),
+        '오답번호': [wrong[i] for i in rng.integers(0, len(wrong), size=n)],
+        '선택과목': rng.choice(['', '화법과 작문', np.nan, ' 선택 '], size=n),
+        '선택과목코드': rng.choice(codes, size=n),
+    })
+
+
+def _messy_processor(seed=0, shift=0, frames=None):
+    processor = DataProcessor()
+    names = {str(2024001 + i): f"학생{i}" for i in range(380)}
+    names['2024003'] = '이상한<이름>'
+    names['2024004'] = 'nan'
+    names['2024007'] = '가' * 21
+    processor.student_names = names
+    frames = frames or {
+        '국어': _messy_frame(['1', '2', '01', '2.0', '99'], seed=seed),
+        '수학': _messy_frame(['3', '4', ' 04 '], seed=seed + 1),
+        '탐구': _messy_frame(['11', '13', '12', ''], seed=seed + 2),
+    }
+    for subject, df in frames.items():
+        processor.set_subject_data(subject, df)
+    return _configure(processor, shift)
+
+
+def test_process_matches_row_by_row_on_sample_files():
+    processor = DataProcessor()
+    processor.load_student_names('sample_students.csv')
+    for subject, path in SAMPLES:
+        processor.load_subject_data(subject, path)
+
+    result = processor.process_all_data()
+
+    assert list(result.items()) == list(_reference_process(processor).items())
+
+
+def test_process_matches_row_by_row_on_scored_omr_files():
+    processor = DataProcessor()
+    processor.load_student_names(os.path.join(OMR_DIR, 'students.csv'))
+    for subject, name in (('국어', 'korean'), ('수학', 'math'), ('영어', 'english')):
+        scorer = OMRScorer(AnswerKey.from_file(os.path.join(OMR_DIR, f"11dupu{name}.csv")))
+        for scored_subject, df in scorer.score_file(os.path.join(OMR_DIR, f"{name}.csv"), subject).items():
+            processor.set_subject_data(scored_subject, df)
+    _configure(processor)
+
+    result = processor.process_all_data()
+
+    assert list(result.items()) == list(_reference_process(processor).items())
+
+
+def test_process_matches_row_by_row_on_messy_data():
+    processor = _messy_processor()
+
+    result = processor.process_all_data()
+
+    assert list(result.items()) == list(_reference_process(processor).items())
+
+
+def test_wrong_answers_column_matches_parse_wrong_answers():
+    processor = DataProcessor()
+    column = _messy_frame(['1'], n=500)['오답번호']
+    columns = [
+        column,
+        column.astype('string'),
+        pd.Series(['3, 99999999999999999999', '4']),  # int64 범위를 넘는 번호
+        pd.Series([29.0, np.nan, 3.0]),
+        pd.Series([12, 7, 0]),
+        pd.Series([np.nan, None, '']),
+        pd.Series([], dtype=object),
+    ]
+    for column in columns:
+        expected = [processor._parse_wrong_answers(value) for value in column.tolist()]
+        assert processor._wrong_answers_column(column) == expected
+
+
+@pytest.mark.parametrize('use_defaults', [True, False])
+def test_calculate_grades_batch_matches_scalar(use_defaults):
+    processor = DataProcessor()
+    if use_defaults:
+        processor._set_default_grade_cutoffs()
+    else:
+        _configure(processor)
+    rng = np.random.default_rng(3)
+    codes = np.array(rng.choice(['1', '01', '2.0', ' 03 ', '04', '11', '13', '12', '99', '', None], size=600),
+                     dtype=object)
+    scores = np.concatenate([rng.integers(0, 101, size=500).astype(float), rng.uniform(0, 100, size=100)])
+    scores[::37] = 0
+    scores[1::41] = 88  # 등급컷 경계
+
+    grades, standard_scores, percentiles = processor.calculate_grades_batch(codes, scores)
+
+    for code, score, grade, standard_score, percentile in zip(codes, scores, grades, standard_scores, percentiles):
+        expected = processor._calculate_grade_and_score({'total_score': score, 'subject_code': code})
+        batch = [None if value != value else value for value in (grade, standard_score, percentile)]
+        assert batch == [expected['grade'], expected['standard_score'], expected['percentile']]
+
+
+def test_regrade_matches_full_processing():
+    processor = _messy_processor()
+    before = processor.process_all_data()
+
+    cutoffs, _, _ = _cutoffs(shift=3)
+    processor.set_grade_cutoff_data(cutoffs)
+    regraded = processor.process_all_data()
+
+    full = _messy_processor(shift=3).process_all_data()
+    assert list(regraded.items()) == list(full.items())
+    changed = {student_id for student_id in full if full[student_id] != before[student_id]}
+    assert changed
+    assert set(processor.changed_student_ids) == changed
+    # 바뀌지 않은 학생은 이전 결과를 그대로 공유
+    assert all(regraded[student_id] is before[student_id] for student_id in before if student_id not in changed)
+
+
+def test_replace_subject_data_matches_full_processing():
+    processor = _messy_processor()
+    before = processor.process_all_data()
+
+    math = processor.subject_data['수학']
+    replaced = math.iloc[10:].copy()
+    replaced.loc[replaced.index[:50], '총점'] = 77
+    new_student = replaced.iloc[:1].assign(수험번호='2024379')
+    replaced = pd.concat([replaced, new_student], ignore_index=True)
+    changed_ids = processor.replace_subject_data('수학', replaced)
+    incremental = processor.process_all_data()
+
+    frames = dict(processor.subject_data)
+    full = _messy_processor(frames=frames).process_all_data()
+    assert list(incremental.items()) == list(full.items())
+    changed = {student_id for student_id in full if full[student_id] != before.get(student_id)}
+    assert changed
+    assert set(changed_ids) == changed
+    assert set(processor.changed_student_ids) == changed
+
+
+def test_update_subject_rows_matches_full_processing():
+    processor = _messy_processor()
+    scored = processor.subject_data['국어'].drop_duplicates('수험번호', keep='last').dropna(subset=['수험번호'])
+    processor.set_subject_data('국어', scored)
+    before = processor.process_all_data()
+    updates = scored[['수험번호', '총점', '오답번호']].iloc[::7].assign(총점=55.0, 오답번호='1, 2')
+    changed_ids = processor.update_subject_rows('국어', updates)
+    incremental = processor.process_all_data()
+
+    full = _messy_processor(frames=dict(processor.subject_data)).process_all_data()
+    assert list(incremental.items()) == list(full.items())
+    assert set(changed_ids) == {student_id for student_id in full if full[student_id] != before[student_id]}
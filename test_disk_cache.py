@@ -0,0 +1,58 @@
+"""disk_cache: PDF/데이터 캐시 공통 용량 관리"""
+
+import os
+
+import pandas as pd
+
+from dataset_cache import DatasetCache
+from disk_cache import SharedCache
+from pdf_cache import PDFCache
+
+
+def _pdf(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"%" * size)
+    return str(path)
+
+
+def test_pdf_cache_evicts_least_recently_used(tmp_path):
+    cache = PDFCache(tmp_path / "cache", max_bytes=250)
+    keys = [PDFCache.make_key(str(i)) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, _pdf(tmp_path, f"{i}.pdf", 100))
+        os.utime(cache._path(key), (i, i))
+    # 첫 번째를 다시 사용 → 두 번째가 가장 오래 안 쓴 파일
+    assert cache.get(keys[0], str(tmp_path / "out0.pdf"))
+
+    cache.put(keys[2], _pdf(tmp_path, "2.pdf", 100))
+
+    assert cache._path(keys[0]).exists()
+    assert not cache._path(keys[1]).exists()
+    assert cache._path(keys[2]).exists()
+    assert cache._total_bytes == 200
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_dataset_cache_round_trip_and_clear(tmp_path):
+    cache = DatasetCache(tmp_path / "cache")
+    df = pd.DataFrame({'수험번호': ['1', '2'], '총점': [90.0, 80.0]})
+    key = DatasetCache.derive_key('0' * 64, 'subject', 1)
+
+    assert cache.get(key) is None
+    cache.put(key, df)
+    pd.testing.assert_frame_equal(cache.get(key), df)
+    assert cache._scan_size() == cache._total_bytes > 0
+
+    cache.clear()
+    assert not cache.contains(key)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_shared_cache_is_created_once_and_can_be_disabled(tmp_path, monkeypatch):
+    created = []
+    shared = SharedCache('TEST_DISK_CACHE_ENABLED', lambda: created.append(1) or PDFCache(tmp_path))
+
+    assert shared.get() is shared.get()
+    assert len(created) == 1
+    monkeypatch.setenv('TEST_DISK_CACHE_ENABLED', '0')
+    assert shared.get() is None
@@ -0,0 +1,124 @@
+"""ingest: 청크/스트림 읽기가 파일 전체를 한 번에 읽던 기존 방식과 같은 결과인지"""
+
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+from ingest import SNIFF_BYTES, read_subject_file, read_subject_stream
+from upload_stream import UploadPipe
+
+SAMPLES = ('sample_korean.csv', 'sample_math.csv', 'sample_english.csv', 'sample_history.csv',
+           'sample_inquiry.csv')
+
+
+def _old_read(path):
+    """변경 전 load_subject_data()의 읽기/정리 (파일 전체를 읽은 뒤 빈 행 제거, 숫자 변환)"""
+    try:
+        df = pd.read_csv(path, encoding='utf-8-sig')
+    except UnicodeDecodeError:
+        df = pd.read_csv(path, encoding='cp949')
+    df = df.dropna(subset=['수험번호', '총점'])
+    df['총점'] = pd.to_numeric(df['총점'], errors='coerce')
+    df['만점'] = pd.to_numeric(df['만점'], errors='coerce')
+    df['과목코드'] = df['과목코드'].astype(str)
+    return df
+
+
+def _messy_csv(path, encoding='utf-8-sig', n=1500):
+    """청크/인코딩 판별 범위(64KB)를 넘는 크기에 빈 행, 결시/문자 점수, 선택과목 컬럼이 섞인 채점결과"""
+    rng = np.random.default_rng(0)
+    scores = rng.integers(0, 101, size=n).astype(str).astype(object)
+    scores[rng.random(n) < 0.05] = ''
+    scores[rng.random(n) < 0.03] = '결시'
+    ids = np.array([str(250000 + i) for i in range(n)], dtype=object)
+    ids[rng.random(n) < 0.02] = ''
+    pd.DataFrame({
+        '수험번호': ids,
+        '과목코드': rng.choice(['1', '2', '11'], size=n),
+        '총점': scores,
+        '만점': 100,
+        '정답수': [f"{i}/45" for i in rng.integers(0, 46, size=n)],
+        '오답번호': rng.choice(['없음', '3, 7, 12', '1', ''], size=n),
+        '선택과목': rng.choice(['화법과 작문', '언어와 매체'], size=n),
+        '선택과목코드': rng.choice(['01', '02'], size=n),
+        '비고': '무시되는 컬럼',
+    }).to_csv(path, index=False, encoding=encoding)
+    return str(path)
+
+
+def _paths(tmp_path):
+    return [*SAMPLES, _messy_csv(tmp_path / 'messy.csv'), _messy_csv(tmp_path / 'messy_cp949.csv', 'cp949')]
+
+
+def _trickle(path, size=1000):
+    """업로드 받는 중처럼 size 바이트씩 들어오는 스트림"""
+    pipe = UploadPipe()
+
+    def feed():
+        with open(path, 'rb') as f:
+            while data := f.read(size):
+                pipe.feed(data)
+        pipe.finish()
+
+    threading.Thread(target=feed, daemon=True).start()
+    return io.BufferedReader(pipe)
+
+
+def test_file_read_matches_old_full_read(tmp_path):
+    for path in _paths(tmp_path):
+        df, stats = read_subject_file(path, chunk_rows=700)
+        old = _old_read(path)
+
+        assert stats.rows - stats.dropped == len(df) == len(old)
+        # 기존 방식은 빈 수험번호가 있으면 수험번호가 실수(250001.0)가 되므로 숫자로 비교
+        np.testing.assert_array_equal(pd.to_numeric(df['수험번호']), pd.to_numeric(old['수험번호']))
+        assert df['과목코드'].astype(str).tolist() == old['과목코드'].tolist()
+        for column in ('총점', '만점'):
+            np.testing.assert_array_equal(df[column].to_numpy(dtype=float), old[column].to_numpy(dtype=float))
+        for column in ('정답수', '오답번호', '선택과목'):
+            if column in old.columns:
+                assert [None if pd.isna(v) else str(v) for v in df[column]] == \
+                       [None if pd.isna(v) else str(v) for v in old[column]]
+        # 기존 방식은 선택과목코드 앞자리 0이 빠지므로(01 → 1) 등급 계산에 쓰는 정리된 코드로 비교
+        if '선택과목코드' in old.columns:
+            assert list(map(DataProcessor._normalize_subject_code, df['선택과목코드'])) == \
+                   list(map(DataProcessor._normalize_subject_code, old['선택과목코드']))
+
+
+@pytest.mark.parametrize('chunk_rows', [13, 700, None])
+def test_stream_matches_file(tmp_path, chunk_rows):
+    for path in _paths(tmp_path):
+        expected, expected_stats = read_subject_file(path, chunk_rows=chunk_rows)
+
+        df, stats = read_subject_stream(_trickle(path), chunk_rows=chunk_rows)
+
+        pd.testing.assert_frame_equal(df, expected)
+        assert (stats.rows, stats.dropped, stats.invalid, stats.chunks) == \
+               (expected_stats.rows, expected_stats.dropped, expected_stats.invalid, expected_stats.chunks)
+        # 청크 크기와 관계없이 같은 값 (과목코드 범주 순서는 처음 나온 순서라 청크 크기에 따라 다름)
+        whole, _ = read_subject_file(path, chunk_rows=10 ** 6)
+        pd.testing.assert_frame_equal(df, whole, check_categorical=False)
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'cp949'])
+def test_stream_prefix_cut_inside_character(tmp_path, encoding):
+    # 인코딩 판별용 앞부분(SNIFF_BYTES)의 마지막 바이트가 한글 글자의 첫 바이트인 파일
+    header = '수험번호,과목코드,총점,만점,정답수,오답번호,선택과목\n'.encode(encoding)
+    rows = [f"{250000 + i},1,90,100,40,없음,화법과 작문\n".encode(encoding) for i in range(2000)]
+    data = header
+    while len(data) + len(rows[0]) < SNIFF_BYTES - 100:
+        data += rows.pop()
+    prefix = f"{250000 + len(rows)},1,90,100,40,없음,".encode(encoding)
+    data += prefix + b'x' * (SNIFF_BYTES - 1 - len(data) - len(prefix)) + '가나\n'.encode(encoding)
+    assert data.index('가'.encode(encoding)) == SNIFF_BYTES - 1
+    path = tmp_path / 'cut.csv'
+    path.write_bytes(data)
+
+    df, _ = read_subject_stream(_trickle(str(path)))
+
+    pd.testing.assert_frame_equal(df, read_subject_file(str(path))[0])
+    assert df['선택과목'].iloc[-1].endswith('가나')
@@ -0,0 +1,56 @@
+"""item_analysis: OMR 응답표 문항 분석 (복수정답 포함)"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from item_analysis import ItemAnalysis
+from omr_scorer import AnswerKey, OMRScorer
+
+
+def _answer_key():
+    return AnswerKey.from_frame(pd.DataFrame({
+        '과목번호': ['1', '1'],
+        '문항': [1, 2],
+        '정답': ['3,5', '2'],
+        '배점': [3, 2],
+    }))
+
+
+def _sheet():
+    return pd.DataFrame({
+        '수험번호': ['1001', '1002', '1003', '1004'],
+        '과목코드': ['1', '1', '1', '1'],
+        'Q1': [5, 3, 4, np.nan],
+        'Q2': [2, 2, 2, 1],
+    })
+
+
+def test_multi_answer_item_accepts_every_answer():
+    analysis = ItemAnalysis.from_omr(_answer_key(), _sheet())
+
+    assert analysis.scores.tolist() == [5, 5, 2, 0]
+    assert analysis.wrong[:, 0].tolist() == [False, False, True, True]
+    assert analysis.wrong_counts().tolist() == [2, 1]
+
+
+def test_from_omr_matches_scorer_totals():
+    answer_key = _answer_key()
+    sheet = _sheet()
+    analysis = ItemAnalysis.from_omr(answer_key, sheet)
+    scored = OMRScorer(answer_key).score_sheet(sheet, '국어')
+
+    totals = pd.to_numeric(scored.set_index('수험번호')['총점'])
+    assert analysis.scores.tolist() == totals.loc[analysis.student_ids.tolist()].tolist()
+
+
+def test_chart_without_matplotlib_fails_loudly(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'matplotlib', None)
+    analysis = ItemAnalysis.from_omr(_answer_key(), _sheet())
+
+    with pytest.raises(ImportError, match='matplotlib'):
+        analysis.export(str(tmp_path))
+    paths = analysis.export(str(tmp_path), chart=False)
+    assert set(paths) == {'wrong_distribution', 'item_table'}
@@ -0,0 +1,51 @@
+"""job_queue: 재시작 후 남은 실행 중 작업 정리 (pid가 다른 프로세스에 다시 쓰인 경우 포함)"""
+
+import os
+import sqlite3
+import time
+
+import pytest
+
+import job_queue
+from job_queue import FAILED, RUNNING, JobQueue
+
+
+def _running_job(queue: JobQueue, job_id: str, pid, pid_start):
+    with queue._transaction() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, handler, status, pid, pid_start, created_at, started_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, 'job_queue:run_report_job', RUNNING, pid, pid_start, time.time(), time.time() - 60),
+        )
+
+
+@pytest.mark.skipif(job_queue._process_start(os.getpid()) is None, reason="/proc 없음")
+def test_reap_fails_jobs_whose_pid_was_reused(tmp_path):
+    queue = JobQueue(tmp_path)
+    pid = os.getpid()
+    _running_job(queue, 'alive', pid, job_queue._process_start(pid))
+    # 재시작 전 작업 프로세스의 pid를 지금은 다른 프로세스(이 테스트 프로세스)가 쓰는 경우
+    _running_job(queue, 'reused', pid, 'other-boot:1')
+    _running_job(queue, 'legacy', pid, None)
+
+    queue._reap()
+
+    assert queue.get('alive')['status'] == RUNNING
+    assert queue.get('reused')['status'] == FAILED
+    assert queue.get('legacy')['status'] == RUNNING
+
+
+def test_opens_db_without_pid_start_column(tmp_path):
+    with sqlite3.connect(tmp_path / 'jobs.db') as conn:
+        conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, handler TEXT NOT NULL, status TEXT NOT NULL, "
+                     "total INTEGER NOT NULL DEFAULT 0, done INTEGER NOT NULL DEFAULT 0, "
+                     "failed INTEGER NOT NULL DEFAULT 0, cancel_requested INTEGER NOT NULL DEFAULT 0, "
+                     "pid INTEGER, error TEXT, result TEXT, created_at REAL NOT NULL, started_at REAL, "
+                     "finished_at REAL)")
+    conn.close()
+    queue = JobQueue(tmp_path)
+    _running_job(queue, 'dead', 2 ** 22 + 1, 'boot:1')
+
+    queue._reap()
+
+    assert queue.get('dead')['status'] == FAILED
@@ -0,0 +1,169 @@
+"""omr_scorer: 행렬 채점과 정답 정정이 한 명씩 채점/전체 재채점과 같은 결과인지"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+from omr_scorer import AnswerKey, OMRScorer, apply_answer_correction, normalize_code
+
+OMR_DIR = '11월더프'
+COMPARED_COLUMNS = ['수험번호', '과목코드', '총점', '만점', '정답수', '오답번호']
+
+
+def _key_frame():
+    """과목번호 1, 2 (복수정답 1문항, 주관식 1문항, 정답이 비어 있는 1문항 포함)"""
+    rows = []
+    for code in ('1', '2'):
+        for item in range(1, 9):
+            rows.append({'과목번호': code, '문항': item, '정답': str((item + int(code)) % 5 + 1), '배점': 2 + item % 3})
+    rows[2]['정답'] = '3,5'      # 1번 과목 3번 복수정답
+    rows[7]['정답'] = '40'       # 1번 과목 8번 주관식
+    rows[12]['배점'] = 4
+    rows[13]['정답'] = ''        # 2번 과목 6번 정답 없음 (채점 제외)
+    return pd.DataFrame(rows)
+
+
+def _sheet(n=300, seed=0):
+    """과목코드 1, 2와 정답표에 없는 9, 빈 응답/범위 밖 응답 포함"""
+    rng = np.random.default_rng(seed)
+    responses = rng.integers(1, 6, size=(n, 8)).astype(float)
+    responses[rng.random((n, 8)) < 0.05] = np.nan
+    responses[rng.random(n) < 0.3, 7] = 40
+    responses[rng.random(n) < 0.02, 0] = 99
+    sheet = pd.DataFrame(responses, columns=[f"Q{i}" for i in range(1, 9)])
+    sheet.insert(0, '과목코드', rng.choice(['1', '2', '9'], size=n, p=[0.5, 0.45, 0.05]))
+    sheet.insert(0, '수험번호', [str(250000 + i) for i in range(n)])
+    return sheet
+
+
+def _reference_scores(answer_key: AnswerKey, sheet: pd.DataFrame) -> pd.DataFrame:
+    """한 명씩, 문항 하나씩 채점 (행렬 채점의 기준)"""
+    records = []
+    for _, row in sheet.iterrows():
+        code = normalize_code(row['과목코드'])
+        if code not in answer_key.keys:
+            continue
+        items, answers, points = answer_key.keys[code]
+        total, correct, wrong = 0.0, 0, []
+        for item, answer, point in zip(items.tolist(), answers.tolist(), points.tolist()):
+            if pd.isna(answer) and item not in answer_key.alternatives.get(code, {}):
+                continue
+            response = row.get(f"Q{item}")
+            accepted = answer_key.alternatives.get(code, {}).get(item, [answer])
+            if response is not None and not pd.isna(response) and float(response) in list(accepted):
+                total += point
+                correct += 1
+            else:
+                wrong.append(str(item))
+        records.append({
+            '수험번호': normalize_code(row['수험번호']),
+            '과목코드': code,
+            '총점': total,
+            '만점': float(points.sum()),
+            '정답수': correct,
+            '오답번호': ', '.join(wrong) if wrong else '없음',
+        })
+    return pd.DataFrame(records, columns=COMPARED_COLUMNS)
+
+
+def _scored(scorer: OMRScorer, subject: str) -> pd.DataFrame:
+    return scorer.states[subject].frame()[COMPARED_COLUMNS].reset_index(drop=True)
+
+
+def test_score_matrix_matches_row_by_row_scoring():
+    answer_key = AnswerKey.from_frame(_key_frame())
+    sheet = _sheet()
+    scorer = OMRScorer(answer_key)
+
+    scorer.score(sheet, '국어')
+
+    expected = _reference_scores(answer_key, sheet)
+    pd.testing.assert_frame_equal(_scored(scorer, '국어'), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('key_file, sheet_file, result_file', [
+    ('11dupukorean.csv', 'korean.csv', '11월더프채점결과_20251103_143841.csv'),
+    ('11dupuenglish.csv', 'english.csv', '영어_채점결과_20251103_151140.csv'),
+])
+def test_score_file_matches_previous_scoring_results(key_file, sheet_file, result_file):
+    # 이 코드베이스 밖에서 만든 기존 채점결과 파일과 같은 점수/오답번호
+    scorer = OMRScorer(AnswerKey.from_file(os.path.join(OMR_DIR, key_file)))
+    result = next(iter(scorer.score_file(os.path.join(OMR_DIR, sheet_file), '과목').values()))
+    previous = pd.read_csv(os.path.join(OMR_DIR, result_file))
+
+    previous['수험번호'] = [normalize_code(value) for value in previous['수험번호']]
+    merged = result.merge(previous, on='수험번호', suffixes=('', '_이전'))
+    assert len(merged) == len(previous) == len(result)
+    assert (merged['총점'] == merged['총점_이전']).all()
+    assert (merged['오답번호'] == merged['오답번호_이전'].fillna('없음')).all()
+    assert (merged['정답수'].astype(str) == merged['정답수_이전'].str.split('/').str[0]).all()
+
+
+@pytest.mark.parametrize('code, item, answers, points', [
+    ('1', 1, 4, None),          # 정답 정정
+    ('1', 2, '2,4', None),      # 복수정답 인정
+    ('1', 3, 3, None),          # 복수정답 → 단일 정답
+    ('2', 5, '1,2,3', 6),       # 복수정답 + 배점 변경
+    ('1', 8, 40, 1),            # 주관식 배점만 변경
+    ('2', 6, 2, None),          # 비어 있던 정답 입력
+    ('2', 6, '2,4', 3),         # 비어 있던 정답에 복수정답 + 배점
+])
+def test_apply_key_change_matches_full_rescoring(code, item, answers, points):
+    sheet = _sheet(seed=1)
+    scorer = OMRScorer(AnswerKey.from_frame(_key_frame()))
+    scorer.score(sheet, '국어')
+    before = _scored(scorer, '국어')
+
+    changes = scorer.correct_answer(code, item, answers, points)
+
+    key_frame = _key_frame()
+    target = (key_frame['과목번호'] == code) & (key_frame['문항'] == item)
+    key_frame.loc[target, '정답'] = str(answers)
+    if points is not None:
+        key_frame.loc[target, '배점'] = points
+    full = OMRScorer(AnswerKey.from_frame(key_frame))
+    full.score(sheet, '국어')
+    after = _scored(full, '국어')
+    pd.testing.assert_frame_equal(_scored(scorer, '국어'), after, check_dtype=False)
+
+    # 바뀌었다고 알려준 학생 = 전후 결과가 다른 학생 (배점이 바뀌면 만점이 바뀌므로 과목번호 전체)
+    differs = (before.drop(columns='수험번호') != after.drop(columns='수험번호')).any(axis=1)
+    reported = set(changes['국어']['수험번호']) if '국어' in changes else set()
+    assert set(after.loc[differs, '수험번호']) <= reported
+    assert reported <= set(after.loc[after['과목코드'] == code, '수험번호'])
+    if points is None:
+        assert reported == set(after.loc[differs, '수험번호'])
+
+
+def test_answer_correction_in_processor_matches_full_processing():
+    sheet = _sheet(seed=2)
+    names = {student_id: f"학생{i}" for i, student_id in enumerate(sheet['수험번호'])}
+
+    def processor_for(scorer):
+        processor = DataProcessor()
+        processor.student_names = dict(names)
+        processor.set_grade_cutoff_data({'국어': {grade: 36 - grade * 4 for grade in range(1, 10)}})
+        processor.set_standard_scores({'국어': 150})
+        processor.set_grade_standard_scores({'국어': {grade: 150 - grade * 10 for grade in range(1, 10)}})
+        processor.set_subject_codes({'국어': '1'})
+        for subject, result in scorer.score(sheet, '국어').items():
+            processor.set_subject_data(subject, result)
+        return processor
+
+    scorer = OMRScorer(AnswerKey.from_frame(_key_frame()))
+    processor = processor_for(scorer)
+    before = processor.process_all_data()
+
+    changed = apply_answer_correction(processor, scorer, '1', 2, '2,4')
+    incremental = processor.process_all_data()
+
+    key_frame = _key_frame()
+    key_frame.loc[(key_frame['과목번호'] == '1') & (key_frame['문항'] == 2), '정답'] = '2,4'
+    full = processor_for(OMRScorer(AnswerKey.from_frame(key_frame))).process_all_data()
+
+    assert list(incremental.items()) == list(full.items())
+    assert set(changed) == {sid for sid in full if full[sid] != before[sid]}
+    assert set(processor.changed_student_ids) == set(changed)
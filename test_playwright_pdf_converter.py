@@ -0,0 +1,78 @@
+"""playwright_pdf_converter: 배치 출력 일시정지 (가짜 Playwright 사용)"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import browser_pool
+import playwright_pdf_converter
+from playwright_pdf_converter import PlaywrightPDFConverter, batch_to_pdf_sync
+from test_browser_pool import FakePlaywright
+
+
+PRINT_SECONDS = 0.1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakePlaywright()
+    monkeypatch.setattr(browser_pool, 'async_playwright', lambda: fake)
+    pool = browser_pool.BrowserPool(browsers=1, contexts_per_browser=2)
+    monkeypatch.setattr(playwright_pdf_converter, 'get_browser_pool', lambda: pool)
+    started = []
+
+    async def print_string(page, html_string, output_pdf, format="A4", margin=None):
+        started.append((html_string, time.perf_counter()))
+        await asyncio.sleep(PRINT_SECONDS)
+
+    monkeypatch.setattr(PlaywrightPDFConverter, 'print_string', print_string)
+    pool.started = started
+    yield pool
+    pool.close()
+
+
+def test_pause_does_not_stall_pages_in_flight(pool, tmp_path):
+    items = [{"html": str(i), "output_pdf": str(tmp_path / f"{i}.pdf"), "key": i} for i in range(4)]
+    calls = []
+
+    def wait_if_paused():
+        # 두 번째 항목을 시작하기 전에 일시정지 (첫 항목은 출력 중)
+        calls.append(time.perf_counter())
+        if len(calls) == 2:
+            time.sleep(0.5)
+
+    start = time.perf_counter()
+    results = batch_to_pdf_sync(items, concurrency=2, timeout=0.3, wait_if_paused=wait_if_paused)
+
+    # 일시정지가 제한 시간보다 길어도 진행 중이던 항목은 성공
+    assert [r["error"] for r in results] == [None] * 4
+    assert all(r["success"] for r in results)
+    # 일시정지 동안에는 다음 항목을 시작하지 않음
+    second_start = dict(pool.started)["1"]
+    assert second_start - start >= 0.5
+
+
+def test_cancel_stops_remaining_items(pool, tmp_path):
+    items = [{"html": str(i), "output_pdf": str(tmp_path / f"{i}.pdf"), "key": i} for i in range(6)]
+
+    results = batch_to_pdf_sync(items, concurrency=1, should_cancel=lambda: len(pool.started) >= 2)
+
+    assert [r["key"] for r in results] == [0, 1]
+
+
+def test_items_are_produced_off_the_event_loop(pool, tmp_path):
+    threads = []
+
+    def items():
+        # 지연 생성(HTML 렌더링, 파일 저장)은 브라우저 풀 루프 스레드에서 실행되면 안 됨
+        for i in range(4):
+            threads.append(threading.current_thread().name)
+            yield {"html": str(i), "output_pdf": str(tmp_path / f"{i}.pdf"), "key": i}
+
+    results = batch_to_pdf_sync(items(), concurrency=2)
+
+    assert len(results) == 4
+    assert len(threads) == 4
+    assert "browser-pool" not in threads
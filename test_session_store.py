@@ -0,0 +1,57 @@
+"""session_store: 세션 메모리 사용량 (처리 결과 캐시 포함)"""
+
+import pytest
+
+from data_processor import DataProcessor
+from session_store import MB, SessionMemoryError, SessionStore, processor_nbytes
+
+SESSION_ID = 'a' * 32
+
+
+def _processor():
+    processor = DataProcessor()
+    processor.load_student_names('sample_students.csv')
+    for subject, path in (('국어', 'sample_korean.csv'), ('수학', 'sample_math.csv')):
+        processor.load_subject_data(subject, path)
+    return processor
+
+
+def test_processed_caches_are_counted():
+    processor = _processor()
+    inputs = processor_nbytes(processor)
+
+    processor.process_all_data()
+    table, results = processor.cached_results()
+
+    assert table is not None and results
+    assert processor_nbytes(processor) > inputs
+
+
+def test_update_drops_processed_caches_over_limit():
+    store = SessionStore(spill_dir=None)
+    processor = store.get(SESSION_ID)
+    loaded = _processor()
+    processor.student_names = loaded.student_names
+    processor.subject_data = loaded.subject_data
+    processor.invalidate_processed_data()
+    inputs = processor_nbytes(processor)
+    processor.process_all_data()
+    store.session_max_bytes = inputs + 1
+
+    store.update(SESSION_ID)
+
+    assert store.get(SESSION_ID) is processor
+    assert processor.cached_results() == (None, [])
+    assert processor.subject_data
+    # 캐시를 버린 뒤에도 다시 처리할 수 있음
+    assert processor.process_all_data()
+
+
+def test_update_rejects_inputs_over_limit():
+    store = SessionStore(spill_dir=None, session_max_bytes=1 * MB)
+    processor = store.get(SESSION_ID)
+    processor.student_names = {str(i): 'x' * 100 for i in range(20000)}
+
+    with pytest.raises(SessionMemoryError):
+        store.update(SESSION_ID)
+    assert not store.get(SESSION_ID).student_names
@@ -0,0 +1,71 @@
+"""upload_stream: 받는 중 과목 파일 읽기"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import upload_stream
+from ingest import read_subject_file
+from upload_store import UploadStore
+from upload_stream import SubjectPart
+
+SAMPLE = 'sample_korean.csv'
+CHUNK = 256
+
+
+@pytest.fixture
+def busy_executor(monkeypatch):
+    """작업 스레드 1개가 다른 일로 막혀 있는 풀 (release.set()으로 풀어줌)"""
+    monkeypatch.setattr(upload_stream, 'get_dataset_cache', lambda: None)
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    executor.submit(release.wait)
+    executor.release = release
+    yield executor
+    release.set()
+    executor.shutdown()
+
+
+def _chunks():
+    with open(SAMPLE, 'rb') as f:
+        data = f.read()
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+def _assert_same_as_file(part):
+    df, stats = part.result()
+    expected, expected_stats = read_subject_file(SAMPLE)
+    pd.testing.assert_frame_equal(df, expected)
+    assert stats.rows == expected_stats.rows
+
+
+def test_queued_part_does_not_buffer_in_memory(busy_executor, tmp_path):
+    part = SubjectPart('subject_국어', SAMPLE, UploadStore(tmp_path).writer(SAMPLE), '국어', busy_executor)
+    for chunk in _chunks():
+        part.write(chunk)
+    assert part._pipe is None
+
+    part.close()
+    busy_executor.release.set()
+
+    _assert_same_as_file(part)
+    assert part._pipe is None
+
+
+def test_part_started_mid_upload_reads_saved_prefix(busy_executor, tmp_path):
+    part = SubjectPart('subject_국어', SAMPLE, UploadStore(tmp_path).writer(SAMPLE), '국어', busy_executor)
+    chunks = _chunks()
+    half = len(chunks) // 2
+    for chunk in chunks[:half]:
+        part.write(chunk)
+
+    busy_executor.release.set()
+    while part._pipe is None:
+        threading.Event().wait(0.01)
+    for chunk in chunks[half:]:
+        part.write(chunk)
+    part.close()
+
+    _assert_same_as_file(part)
@@ -0,0 +1,249 @@
+"""
+업로드 파일 저장소 (내용 주소 방식)
+- 파일은 내용의 SHA-256을 이름으로 한 번만 저장 (objects/ab/<해시>.csv) → 같은 파일을 여러 세션이 올려도 1개,
+  이름이 같은 다른 파일이 서로 덮어쓰지 않음
+- 세션별 목록(manifest): sessions/<세션 ID>.json (파트 이름 → 원래 파일명/해시/크기/시각)
+- 어느 세션 목록에도 없는 파일은 정리 때 삭제 → 디스크 사용량은 업로드 횟수가 아니라 서로 다른 내용 수에 비례
+- 같은 해시로 데이터 캐시(dataset_cache) 키를 만들므로, 어느 세션이든 한 번 읽은 파일은 파싱 없이 바로 로드
+"""
+
+import os
+import json
+import time
+import hashlib
+import pathlib
+import tempfile
+import threading
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from session_store import SESSION_ID_PATTERN
+
+
+BASE_DIR = pathlib.Path(__file__).parent
+DEFAULT_STORE_DIR = BASE_DIR / "uploads"
+COPY_CHUNK_SIZE = 1024 * 1024
+# 목록에 기록되기 전의 파일을 지우지 않도록, 최근에 저장/사용된 파일은 정리에서 제외
+DEFAULT_GRACE_SECONDS = 60 * 60
+# 정리(collect_garbage) 최소 간격
+DEFAULT_COLLECT_INTERVAL = 10 * 60
+
+
+class StoreWriter:
+    """
+    저장소에 파일 1개 쓰기 (임시 파일에 쓰면서 해시 계산 → commit()으로 해시 이름 확정)
+
+    with 문 없이 write()를 여러 번 부른 뒤 commit() 또는 abort()
+    """
+
+    def __init__(self, store: 'UploadStore', ext: str):
+        self.store = store
+        self.ext = ext
+        self.size = 0
+        self._digest = hashlib.sha256()
+        store.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=store.tmp_dir, suffix=ext)
+        self._file: BinaryIO = os.fdopen(fd, 'wb')
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+
+    def read_back(self) -> bytes:
+        """지금까지 쓴 내용 (임시 파일에서 다시 읽음)"""
+        self._file.flush()
+        with open(self._tmp_path, 'rb') as f:
+            return f.read(self.size)
+
+    def commit(self) -> Tuple[str, str]:
+        """
+        쓰기 완료 (같은 내용이 이미 있으면 임시 파일을 버리고 기존 파일 사용)
+
+        Returns:
+            (str, str): 내용 SHA-256, 저장된 파일 경로
+        """
+        self._file.close()
+        content_hash = self._digest.hexdigest()
+        path = self.store.object_path(content_hash, self.ext)
+        try:
+            # 이미 있으면 사용 시각만 갱신 (정리 대상에서 제외되도록)
+            os.utime(path)
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp_path, path)
+        return content_hash, str(path)
+
+    def abort(self):
+        """쓰기 중단 (임시 파일 삭제)"""
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class UploadStore:
+    """
+    내용 해시 → 업로드 파일, 세션 ID → 업로드 목록
+
+    저장된 파일은 여러 세션이 함께 쓰므로 수정하지 않음 (읽기 전용)
+    """
+
+    def __init__(self, root: pathlib.Path = DEFAULT_STORE_DIR, ttl: float = 120 * 60,
+                 grace: float = DEFAULT_GRACE_SECONDS, collect_interval: float = DEFAULT_COLLECT_INTERVAL):
+        """
+        Args:
+            root: 저장소 폴더 (objects/, sessions/, tmp/)
+            ttl: 세션 목록 보관 시간 (초, 마지막 업로드 기준, 세션 TTL과 같게)
+            grace: 목록에 없어도 지우지 않는 최근 파일 기준 (초)
+            collect_interval: 정리 최소 간격 (초)
+        """
+        self.root = pathlib.Path(root)
+        self.objects_dir = self.root / "objects"
+        self.sessions_dir = self.root / "sessions"
+        self.tmp_dir = self.root / "tmp"
+        self.ttl = ttl
+        self.grace = grace
+        self.collect_interval = collect_interval
+        self._lock = threading.Lock()
+        self._collected_at = 0.0
+
+    # ------------------------------------------------------------------
+    # 파일 저장
+    # ------------------------------------------------------------------
+    def object_path(self, content_hash: str, ext: str) -> pathlib.Path:
+        return self.objects_dir / content_hash[:2] / f"{content_hash}{ext}"
+
+    def writer(self, filename: str) -> StoreWriter:
+        """받는 대로 쓰는 저장 (확장자는 원래 파일명에서, 읽는 쪽이 형식을 확장자로 판단)"""
+        return StoreWriter(self, os.path.splitext(filename)[1].lower())
+
+    def put(self, stream: BinaryIO, filename: str) -> Tuple[str, str]:
+        """
+        파일 객체 내용 저장
+
+        Returns:
+            (str, str): 내용 SHA-256, 저장된 파일 경로
+        """
+        writer = self.writer(filename)
+        try:
+            while True:
+                data = stream.read(COPY_CHUNK_SIZE)
+                if not data:
+                    break
+                writer.write(data)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    # ------------------------------------------------------------------
+    # 세션 목록
+    # ------------------------------------------------------------------
+    def _manifest_path(self, session_id: str) -> pathlib.Path:
+        if not SESSION_ID_PATTERN.match(session_id or ''):
+            raise ValueError("유효하지 않은 세션 ID입니다.")
+        return self.sessions_dir / f"{session_id}.json"
+
+    def manifest(self, session_id: str) -> Dict[str, Dict[str, Any]]:
+        """세션 업로드 목록 (파트 이름 → filename/hash/path/size/uploaded_at, 없으면 빈 dict)"""
+        try:
+            with open(self._manifest_path(session_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def record(self, session_id: str, name: str, filename: str, content_hash: str, path: str):
+        """세션 목록에 파일 기록 (같은 파트 이름은 새 파일로 교체)"""
+        manifest_path = self._manifest_path(session_id)
+        with self._lock:
+            manifest = self.manifest(session_id)
+            manifest[name] = {
+                'filename': filename,
+                'hash': content_hash,
+                'path': os.path.relpath(path, self.root),
+                'size': os.path.getsize(path),
+                'uploaded_at': time.time(),
+            }
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, manifest_path)
+
+    def discard_session(self, session_id: str):
+        """세션 목록 삭제 (다른 세션이 쓰지 않는 파일은 다음 정리 때 삭제)"""
+        try:
+            self._manifest_path(session_id).unlink()
+        except (FileNotFoundError, ValueError):
+            pass
+
+    # ------------------------------------------------------------------
+    # 정리
+    # ------------------------------------------------------------------
+    def maybe_collect(self):
+        """collect_interval마다 한 번 정리"""
+        now = time.time()
+        if now - self._collected_at < self.collect_interval:
+            return
+        self._collected_at = now
+        self.collect_garbage(now)
+
+    def collect_garbage(self, now: Optional[float] = None) -> int:
+        """
+        TTL이 지난 세션 목록과 어느 목록에도 없는 파일 삭제
+
+        Returns:
+            int: 삭제한 파일 수
+        """
+        now = time.time() if now is None else now
+        referenced = set()
+        with self._lock:
+            if self.sessions_dir.exists():
+                for manifest_path in self.sessions_dir.glob("*.json"):
+                    try:
+                        if now - manifest_path.stat().st_mtime > self.ttl:
+                            manifest_path.unlink()
+                            continue
+                        with open(manifest_path, 'r', encoding='utf-8') as f:
+                            referenced.update(entry['path'] for entry in json.load(f).values())
+                    except (FileNotFoundError, ValueError, KeyError):
+                        continue
+
+        removed = 0
+        for directory, pattern in ((self.objects_dir, "*/*"), (self.tmp_dir, "*")):
+            if not directory.exists():
+                continue
+            for path in directory.glob(pattern):
+                try:
+                    if os.path.relpath(path, self.root) in referenced or now - path.stat().st_mtime <= self.grace:
+                        continue
+                    path.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+        if removed:
+            print(f"[업로드저장소] 쓰지 않는 파일 {removed}개 정리")
+        return removed
+
+
+_store: Optional[UploadStore] = None
+_store_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """
+    프로세스 공유 업로드 저장소
+
+    환경 변수: UPLOAD_STORE_DIR (기본 uploads), SESSION_TTL_MINUTES (세션 목록 보관 시간)
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = UploadStore(
+                    pathlib.Path(os.environ.get('UPLOAD_STORE_DIR', DEFAULT_STORE_DIR)),
+                    ttl=float(os.environ.get('SESSION_TTL_MINUTES', '120')) * 60,
+                )
+    return _store
@@ -0,0 +1,313 @@
+"""
+업로드 스트림 처리
+multipart 본문을 받는 대로 파트별로 나눠, 과목 파일은 받는 동안 작업 스레드가 바로 읽기/정리
+- CSV는 받은 만큼씩 청크 단위로 읽고(ingest.read_subject_stream), XLSX는 다 받은 직후 읽음
+- 과목끼리는 스레드 풀에서 동시에 읽으므로, 마지막 바이트를 받으면 읽기/검증이 거의 끝나 있음
+- 작업 스레드가 아직 시작하지 않은 과목은 메모리에 쌓지 않고 저장만 함
+  (시작할 때 그때까지 저장된 부분부터 이어 읽고, 이미 다 받았으면 저장된 파일을 읽음)
+- 받은 내용은 업로드 저장소(upload_store, 내용 해시 이름)에 저장하면서 해시도 함께 계산
+- 다 받은 과목 파일의 해시가 데이터 캐시에 있으면(어느 세션이든 읽은 적 있는 파일) 파싱 생략
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from dataset_cache import DatasetCache, get_dataset_cache
+from ingest import FORMAT_VERSION, read_subject_file, read_subject_stream
+from upload_store import StoreWriter, UploadStore
+
+
+# 요청 본문을 한 번에 읽는 크기
+READ_SIZE = 64 * 1024
+# 과목 파일을 동시에 읽는 스레드 수 (모든 요청이 공유)
+DEFAULT_WORKERS = int(os.environ.get('UPLOAD_PARSE_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+
+
+class PipeDetached(Exception):
+    """읽는 도중 통로가 닫힘 (같은 내용이 이미 캐시에 있어 읽기를 그만둔 경우)"""
+
+
+class UploadPipe(io.RawIOBase):
+    """
+    받는 스레드가 feed()로 넣고 읽는 스레드가 read()로 꺼내는 바이트 통로
+    (데이터가 올 때까지 기다림, 받는 쪽은 기다리지 않도록 크기 제한 없음 -
+    읽는 스레드가 시작한 뒤에만 연결하므로 쌓이는 양은 받는 속도와 읽는 속도의 차이만큼)
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._finished = False
+        self._detached = False
+        self._cond = threading.Condition()
+
+    def feed(self, data: bytes):
+        with self._cond:
+            if self._detached:
+                return
+            self._buffer += data
+            self._cond.notify()
+
+    def finish(self):
+        """받기 끝 (남은 데이터를 다 읽으면 EOF)"""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def detach(self):
+        """더 읽지 않음 (남은/이후 데이터는 버리고, 읽고 있던 쪽은 PipeDetached)"""
+        with self._cond:
+            self._detached = True
+            self._buffer.clear()
+            self._cond.notify_all()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        with self._cond:
+            while not self._buffer and not self._finished and not self._detached:
+                self._cond.wait()
+            if self._detached:
+                raise PipeDetached("읽기가 취소되었습니다.")
+            size = min(len(buffer), len(self._buffer))
+            buffer[:size] = self._buffer[:size]
+            del self._buffer[:size]
+            return size
+
+
+class FilePart:
+    """업로드 파일 파트 1개 (받는 대로 업로드 저장소에 저장, 다 받으면 path/content_hash 확정)"""
+
+    def __init__(self, name: str, filename: str, writer: StoreWriter):
+        self.name = name
+        self.filename = filename
+        self.path: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self._writer = writer
+
+    @property
+    def size(self) -> int:
+        return self._writer.size
+
+    def write(self, data: bytes):
+        self._writer.write(data)
+
+    def close(self):
+        self.content_hash, self.path = self._writer.commit()
+
+    def abort(self):
+        """받다가 중단 (불완전한 파일 삭제)"""
+        self._writer.abort()
+
+
+class SubjectPart(FilePart):
+    """
+    과목 파일 파트 - 저장과 동시에 작업 스레드가 읽기/정리
+
+    result()는 read_subject_file과 같은 (DataFrame, IngestStats)를 돌려주고
+    (데이터 캐시에 이미 있는 내용이라 읽지 않았으면 None),
+    content_key는 DatasetCache.make_key(저장된 파일)와 같은 값
+
+    읽기 작업은 바로 스레드 풀에 넣지만, 통로(UploadPipe)는 작업 스레드가 시작할 때 연결
+    (풀이 바빠 기다리는 동안 받은 내용은 저장소 파일에만 있음)
+    """
+
+    def __init__(self, name: str, filename: str, writer: StoreWriter, subject: str, executor: ThreadPoolExecutor):
+        super().__init__(name, filename, writer)
+        self.subject = subject
+        self.content_key: Optional[str] = None
+        # 다 받은 내용이 데이터 캐시에 이미 있음 (읽기 중단)
+        self.cached = False
+        self.aborted = False
+        self._pipe: Optional[UploadPipe] = None
+        # 받기 끝(저장 확정 또는 중단) - 이후에는 통로를 연결하지 않음
+        self._closed = False
+        self._lock = threading.Lock()
+        self._received = threading.Event()
+        self._future: Future = executor.submit(self._parse)
+
+    def write(self, data: bytes):
+        with self._lock:
+            super().write(data)
+            if self._pipe is not None:
+                self._pipe.feed(data)
+
+    def close(self):
+        with self._lock:
+            super().close()
+            self._closed = True
+        self.content_key = DatasetCache.derive_key(self.content_hash, 'subject', FORMAT_VERSION)
+        cache = get_dataset_cache()
+        self.cached = cache is not None and cache.contains(self.content_key)
+        if self.cached and self._pipe is not None:
+            # 어느 세션이든 이미 읽은 내용 → 진행 중인 읽기를 멈춤 (DataProcessor가 캐시에서 로드)
+            self._pipe.detach()
+        self._finish()
+
+    def abort(self):
+        with self._lock:
+            self.aborted = True
+            super().abort()
+            self._closed = True
+        self._finish()
+
+    def _finish(self):
+        if self._pipe is not None:
+            self._pipe.finish()
+        self._received.set()
+
+    def _attach(self) -> Optional[UploadPipe]:
+        """
+        작업 스레드 시작 시 통로 연결 (아직 받는 중인 CSV만)
+
+        그때까지 저장된 부분을 먼저 넣고, 이후 받는 내용은 write()가 이어서 넣음
+        """
+        if self._writer.ext != '.csv':
+            return None
+        with self._lock:
+            if self._closed:
+                return None
+            pipe = UploadPipe()
+            pipe.feed(self._writer.read_back())
+            self._pipe = pipe
+            return pipe
+
+    def _parse(self):
+        pipe = self._attach()
+        if pipe is not None:
+            try:
+                try:
+                    return read_subject_stream(io.BufferedReader(pipe))
+                finally:
+                    pipe.detach()
+            except PipeDetached:
+                return None
+            except UnicodeDecodeError:
+                # 앞부분 이후에 다른 인코딩의 글자가 나옴 → 다 받은 파일로 다시 읽음 (다음 인코딩 시도)
+                print(f"[경고] {self.subject}: 받는 중 인코딩 판별 실패, 저장된 파일로 다시 읽습니다.")
+        # XLSX는 파일 끝(목차)이 있어야 읽을 수 있으므로 다 받은 뒤 읽음
+        # (CSV도 작업 스레드가 시작하기 전에 다 받았으면 저장된 파일을 읽음)
+        self._received.wait()
+        if self.aborted:
+            raise RuntimeError("업로드가 중단되었습니다.")
+        if self.cached:
+            return None
+        return read_subject_file(self.path)
+
+    def result(self):
+        """읽기 결과 (끝날 때까지 기다림, 읽기 중 예외는 그대로 던짐)"""
+        return self._future.result()
+
+
+class ReceivedUpload:
+    """받은 요청 본문 (폼 필드, 저장된 파일, 읽는 중인 과목 파일)"""
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        # 파일 파트 이름 → 원래 파일명 (건너뛴 파트 포함)
+        self.filenames: Dict[str, str] = {}
+        # 일반 파일 파트 이름 → 파트 (다 받은 뒤 path 확정)
+        self.files: Dict[str, FilePart] = {}
+        # 과목 이름 → 과목 파일 파트
+        self.subjects: Dict[str, SubjectPart] = {}
+
+    def parts(self) -> List[FilePart]:
+        """다 받은 모든 파일 파트"""
+        return list(self.files.values()) + list(self.subjects.values())
+
+
+def receive_upload(stream: BinaryIO, boundary: str, store: UploadStore, accept: Callable[[str, str], bool],
+                   subject_prefix: str = 'subject_', max_form_memory_size: Optional[int] = None,
+                   max_parts: Optional[int] = None) -> ReceivedUpload:
+    """
+    multipart/form-data 본문을 받는 대로 처리
+
+    Args:
+        stream: 요청 본문 스트림 (크기 한도가 적용된 request.stream)
+        boundary: multipart 경계 문자열
+        store: 파일을 저장할 업로드 저장소
+        accept: (파트 이름, 원래 파일명) → 받을지 여부 (False면 그 파트는 버림, 형식 검증)
+        subject_prefix: 과목 파일 파트 이름 접두사 (subject_국어 → 과목 '국어')
+        max_form_memory_size: 폼 필드 1개의 최대 크기
+        max_parts: 최대 파트 수
+
+    Returns:
+        ReceivedUpload: 과목 파일은 읽기가 진행 중일 수 있으므로 SubjectPart.result()로 결과를 받음
+    """
+    decoder = MultipartDecoder(boundary.encode('latin-1'), max_form_memory_size, max_parts=max_parts)
+    upload = ReceivedUpload()
+    current = None
+    field_data: List[bytes] = []
+    try:
+        while True:
+            data = stream.read(READ_SIZE)
+            decoder.receive_data(data or None)
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, Field):
+                    current = event
+                    field_data = []
+                elif isinstance(event, File):
+                    current = _open_part(upload, event, store, accept, subject_prefix)
+                elif isinstance(event, Data):
+                    if isinstance(current, Field):
+                        field_data.append(event.data)
+                        if not event.more_data:
+                            upload.fields.setdefault(current.name, b"".join(field_data).decode('utf-8', 'replace'))
+                    elif current is not None:
+                        current.write(event.data)
+                        if not event.more_data:
+                            current.close()
+                            current = None
+                event = decoder.next_event()
+            if isinstance(event, Epilogue) or not data:
+                break
+    except BaseException:
+        if isinstance(current, FilePart):
+            current.abort()
+        raise
+    if isinstance(current, FilePart):
+        # 본문이 파트 중간에 끝남
+        current.abort()
+        raise ValueError(f"업로드가 중간에 끊겼습니다: {current.filename}")
+    return upload
+
+
+def _open_part(upload: ReceivedUpload, event: File, store: UploadStore, accept: Callable[[str, str], bool],
+               subject_prefix: str) -> Optional[FilePart]:
+    """파일 파트 시작 (건너뛸 파트면 None)"""
+    if event.name in upload.filenames:
+        # 같은 이름의 파트는 처음 것만 사용
+        return None
+    filename = event.filename or ''
+    upload.filenames[event.name] = filename
+    if not accept(event.name, filename):
+        return None
+    writer = store.writer(filename)
+    if event.name.startswith(subject_prefix):
+        part = SubjectPart(event.name, filename, writer, event.name[len(subject_prefix):], get_parse_executor())
+        upload.subjects[part.subject] = part
+        return part
+    part = FilePart(event.name, filename, writer)
+    upload.files[event.name] = part
+    return part
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_parse_executor() -> ThreadPoolExecutor:
+    """업로드 파일 읽기용 공유 스레드 풀 (UPLOAD_PARSE_WORKERS, 기본 CPU 코어 수·최대 4)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DEFAULT_WORKERS, thread_name_prefix='upload-parse')
+    return _executor